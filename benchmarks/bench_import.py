@@ -0,0 +1,178 @@
+"""Measure how long the integration's modules take to import.
+
+Each module is imported in a fresh interpreter under ``python -X importtime``
+after the Home Assistant modules that are loaded at startup anyway, so only
+the integration's own cost (and the libraries it pulls in) is counted:
+
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --modules config_flow,sensor --runs 15
+
+Reported per module: the median cumulative import time across runs and the
+imports that contribute most of it, by their own (self) time.
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Not imported from bench_update_cycle, which needs Home Assistant
+REPO_ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+PACKAGE = "custom_components.eg4_inverter"
+
+# What Home Assistant has imported before it loads a custom integration
+BASELINE = (
+    "aiohttp",
+    "voluptuous",
+    "homeassistant.core",
+    "homeassistant.config_entries",
+    "homeassistant.helpers.config_validation",
+    "homeassistant.helpers.entity_platform",
+    "homeassistant.helpers.update_coordinator",
+    "homeassistant.components.http",
+    "homeassistant.components.sensor",
+    "homeassistant.components.binary_sensor",
+)
+
+# The package itself is imported at startup, config_flow when HA preloads
+# flows, the rest when the first entry is set up
+DEFAULT_MODULES = "__init__,config_flow,services,views,coordinator,sensor,binary_sensor"
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _module_name(module: str) -> str:
+    return PACKAGE if module == "__init__" else f"{PACKAGE}.{module}"
+
+
+def _parse(stderr: str, module: str) -> tuple[int, dict[str, int]]:
+    """Cumulative microseconds of ``module`` and self time of what it imported."""
+    lines = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        lines.append((int(self_us), int(cumulative_us), name))
+
+    # Top level lines close one import statement each; the last one is ours
+    end = max(i for i, (_, _, name) in enumerate(lines) if name.strip() == module)
+    start = max(
+        (i for i, (_, _, name) in enumerate(lines[:end]) if not name.startswith("  ")),
+        default=-1,
+    )
+    own = {name.strip(): self_us for self_us, _, name in lines[start + 1 : end + 1]}
+    return lines[end][1], own
+
+
+def measure(python: str, module: str, runs: int, baseline: bool) -> dict:
+    """Import ``module`` ``runs`` times and summarise the import times."""
+    name = _module_name(module)
+    code = (f"import {', '.join(BASELINE)}; " if baseline else "") + f"import {name}"
+    totals = []
+    contributors = {}
+    for _ in range(runs):
+        proc = subprocess.run(
+            [python, "-X", "importtime", "-c", code],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode:
+            raise RuntimeError(f"importing {name} failed:\n{proc.stderr[-2000:]}")
+        total, own = _parse(proc.stderr, name)
+        totals.append(total)
+        for imported, self_us in own.items():
+            contributors.setdefault(imported, []).append(self_us)
+
+    top = sorted(
+        ((imported, statistics.median(samples)) for imported, samples in contributors.items()),
+        key=lambda item: item[1],
+        reverse=True,
+    )
+    return {
+        "module": module,
+        "import_ms": {
+            "median": round(statistics.median(totals) / 1000, 2),
+            "min": round(min(totals) / 1000, 2),
+            "max": round(max(totals) / 1000, 2),
+        },
+        "modules_imported": len(contributors),
+        "top_ms": {imported: round(us / 1000, 2) for imported, us in top[:8]},
+    }
+
+
+def _print_case(case: dict, top: int) -> None:
+    print(
+        f"{case['module']:<14} {case['import_ms']['median']:>8.1f}ms median "
+        f"({case['import_ms']['min']:.1f}-{case['import_ms']['max']:.1f}) "
+        f"{case['modules_imported']:>4} modules",
+        flush=True,
+    )
+    for imported, ms in list(case["top_ms"].items())[:top]:
+        print(f"    {ms:>7.2f}ms  {imported}")
+
+
+def main(args) -> int:
+    results = []
+    for module in [m.strip() for m in args.modules.split(",") if m.strip()]:
+        case = measure(args.python, module, args.runs, not args.no_baseline)
+        _print_case(case, args.top)
+        results.append(case)
+
+    output = args.output or RESULTS_DIR / (
+        "import_" + datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ") + ".json"
+    )
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(
+        json.dumps(
+            {
+                "revision": _git_revision(),
+                "created": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "runs": args.runs,
+                "baseline": not args.no_baseline,
+                "results": results,
+            },
+            indent=2,
+        )
+        + "\n"
+    )
+    print(f"Results written to {output}")
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modules", default=DEFAULT_MODULES, help="comma separated module names")
+    parser.add_argument("--runs", type=int, default=9, help="fresh interpreters per module")
+    parser.add_argument("--top", type=int, default=5, help="contributors printed per module")
+    parser.add_argument("--python", default=sys.executable, help="interpreter to measure")
+    parser.add_argument(
+        "--no-baseline",
+        action="store_true",
+        help="do not pre-import Home Assistant (headless modules such as collector)",
+    )
+    parser.add_argument("--output", help="result file (default: results/import_<timestamp>.json)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(main(parse_args()))
@@ -0,0 +1,172 @@
+"""Measure the memory EG4 entities keep after setup.
+
+Sets up one config entry per inverter against the mock portal, with 16
+battery units each by default, and reports what stays allocated:
+
+    python benchmarks/bench_memory.py
+    python benchmarks/bench_memory.py --inverters 1,4 --batteries 16,32
+
+Reported per case: memory retained by the whole setup (tracemalloc, after
+garbage collection), the same per entity, and the bytes each entity object
+holds on its own, i.e. its attribute dict plus the attribute values no
+other entity shares.
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+from homeassistant.helpers.entity_platform import async_get_platforms
+from pytest_homeassistant_custom_component.common import async_test_home_assistant
+
+from bench_update_cycle import (
+    DOMAIN,
+    REPO_ROOT,
+    RESULTS_DIR,
+    _git_revision,
+    _ints,
+    setup_entries,
+    start_http,
+)
+from mock_portal import MockPortal
+
+DEFAULT_BATTERIES = "16"
+DEFAULT_INVERTERS = "1,4,8"
+
+# Values small enough that CPython shares them anyway
+_IMMUTABLE = (bool, int, float, type(None))
+
+
+def _entities(hass) -> list:
+    return [
+        entity
+        for platform in async_get_platforms(hass, DOMAIN)
+        for entity in platform.entities.values()
+    ]
+
+
+def _own_bytes(entities) -> list[int]:
+    """Bytes per entity in its ``__dict__`` and the values only it references."""
+    owners = {}
+    for entity in entities:
+        for value in vars(entity).values():
+            owners[id(value)] = owners.get(id(value), 0) + 1
+
+    sizes = []
+    for entity in entities:
+        attrs = vars(entity)
+        size = sys.getsizeof(attrs)
+        for value in attrs.values():
+            if isinstance(value, _IMMUTABLE) or owners[id(value)] > 1:
+                continue
+            size += sys.getsizeof(value)
+            if isinstance(value, dict):
+                size += sum(sys.getsizeof(v) for v in value.values())
+            elif isinstance(value, (list, tuple, set, frozenset)):
+                size += sum(sys.getsizeof(v) for v in value)
+        sizes.append(size)
+    return sizes
+
+
+async def run_case(config_dir, inverters, batteries) -> dict:
+    """Set up ``inverters`` config entries and measure what they retain."""
+    portal = MockPortal(inverters=inverters, batteries=batteries, latency=0)
+    base_url = await portal.start()
+    shutil.rmtree(Path(config_dir) / ".storage", ignore_errors=True)
+
+    async with async_test_home_assistant(config_dir=config_dir) as hass:
+        await start_http(hass)
+
+        gc.collect()
+        tracemalloc.start()
+        before, _ = tracemalloc.get_traced_memory()
+        entries = await setup_entries(hass, base_url, portal.serials)
+        gc.collect()
+        after, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        entities = _entities(hass)
+        own = _own_bytes(entities)
+        retained_kib = (after - before) / 1024
+
+        for entry in entries:
+            await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_stop(force=True)
+
+    await portal.stop()
+    return {
+        "inverters": inverters,
+        "batteries": batteries,
+        "entities": len(entities),
+        "retained_kib": round(retained_kib, 1),
+        "retained_per_entity_b": round(retained_kib * 1024 / len(entities)),
+        "own_per_entity_b": {
+            "median": statistics.median(own),
+            "max": max(own),
+        },
+    }
+
+
+def _print_case(case: dict) -> None:
+    print(
+        f"{case['inverters']:>3} inv {case['batteries']:>3} bat "
+        f"{case['entities']:>5} ent | retained {case['retained_kib']:>9.1f}KiB "
+        f"({case['retained_per_entity_b']:>6}B/ent) | own "
+        f"{case['own_per_entity_b']['median']:>6}B/ent median "
+        f"{case['own_per_entity_b']['max']:>6}B max",
+        flush=True,
+    )
+
+
+async def main(args) -> int:
+    results = []
+    with tempfile.TemporaryDirectory(prefix="eg4_bench_") as config_dir:
+        os.symlink(REPO_ROOT / "custom_components", Path(config_dir) / "custom_components")
+        for inverters in _ints(args.inverters):
+            for batteries in _ints(args.batteries):
+                case = await run_case(config_dir, inverters, batteries)
+                _print_case(case)
+                results.append(case)
+
+    output = args.output or RESULTS_DIR / (
+        "memory_" + datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ") + ".json"
+    )
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(
+        json.dumps(
+            {
+                "revision": _git_revision(),
+                "created": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "results": results,
+            },
+            indent=2,
+        )
+        + "\n"
+    )
+    print(f"Results written to {output}")
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--inverters", default=DEFAULT_INVERTERS, help="comma separated counts")
+    parser.add_argument("--batteries", default=DEFAULT_BATTERIES, help="comma separated counts")
+    parser.add_argument("--output", help="result file (default: results/memory_<timestamp>.json)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
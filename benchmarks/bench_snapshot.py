@@ -0,0 +1,200 @@
+"""Compare API model objects with lazy snapshots for one poll's responses.
+
+Fetches the runtime, battery and energy responses from the mock portal
+once, then times what each poll did to them before and after snapshot.py:
+
+    python benchmarks/bench_snapshot.py
+    python benchmarks/bench_snapshot.py --batteries 4,16,32 --repeat 2000
+
+"models": json.loads, the eg4_inverter_api model objects and the deep copy
+core.py kept as its cache. "snapshot": the transport's JSON decoder and the
+snapshot.py views. Both then read every field an entity is defined for.
+Reported per poll in microseconds: decode, build (models/views plus the
+copy), read, and their total. Needs no Home Assistant.
+"""
+
+import argparse
+import asyncio
+import copy
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import aiohttp
+from eg4_inverter_api.constants import (
+    INVERTER_BATTERY_ENDPOINT,
+    INVERTER_ENERGY_ENDPOINT,
+    INVERTER_RUNTIME_ENDPOINT,
+)
+from eg4_inverter_api.models import BatteryData, BatteryUnit, EnergyData, RuntimeData
+
+from bench_import import REPO_ROOT, RESULTS_DIR, _git_revision
+from mock_portal import MockPortal
+
+sys.path.insert(0, str(REPO_ROOT))
+from custom_components.eg4_inverter.registry import DEFINITIONS  # noqa: E402
+from custom_components.eg4_inverter.snapshot import BatterySnapshot, Snapshot  # noqa: E402
+from custom_components.eg4_inverter.transport import json_loads  # noqa: E402
+
+DEFAULT_BATTERIES = "1,4,16,32"
+ENDPOINTS = {
+    "runtime": INVERTER_RUNTIME_ENDPOINT,
+    "battery": INVERTER_BATTERY_ENDPOINT,
+    "energy": INVERTER_ENERGY_ENDPOINT,
+}
+
+
+async def fetch_bodies(batteries: int) -> dict[str, bytes]:
+    """The raw response bodies of one poll of the first inverter."""
+    portal = MockPortal(inverters=1, batteries=batteries, latency=0)
+    base_url = await portal.start()
+    bodies = {}
+    async with aiohttp.ClientSession() as session:
+        for kind, endpoint in ENDPOINTS.items():
+            async with session.post(
+                base_url + endpoint, data=f"serialNum={portal.serials[0]}"
+            ) as response:
+                bodies[kind] = await response.read()
+    await portal.stop()
+    return bodies
+
+
+def _battery_model(response: dict) -> BatteryData:
+    # As EG4InverterAPI.get_inverter_battery_async builds it
+    return BatteryData(
+        remainCapacity=response.get("remainCapacity"),
+        fullCapacity=response.get("fullCapacity"),
+        totalNumber=response.get("totalNumber"),
+        totalVoltageText=response.get("totalVoltageText"),
+        currentText=response.get("currentText"),
+        battery_units=[BatteryUnit(**unit) for unit in response.get("batteryArray", [])],
+    )
+
+
+def build_models(decoded: dict) -> dict:
+    data = {
+        "runtime": RuntimeData(**decoded["runtime"]),
+        "battery": _battery_model(decoded["battery"]),
+        "energy": EnergyData(**decoded["energy"]),
+    }
+    # core.py cached a deep copy of every part
+    for value in data.values():
+        copy.deepcopy(value)
+    return data
+
+
+def build_snapshots(decoded: dict) -> dict:
+    return {
+        "runtime": Snapshot(decoded["runtime"]),
+        "battery": BatterySnapshot(decoded["battery"]),
+        "energy": Snapshot(decoded["energy"]),
+    }
+
+
+def read_fields(data: dict, fields: dict, unit_fields: list) -> int:
+    """Read what the entities are defined for; returns the number of reads."""
+    reads = 0
+    for group, keys in fields.items():
+        part = data[group]
+        for key in keys:
+            getattr(part, key, None)
+            reads += 1
+    for unit in data["battery"].battery_units:
+        for key in unit_fields:
+            getattr(unit, key, None)
+            reads += 1
+    return reads
+
+
+def measure(bodies: dict, loads, build, repeat: int) -> dict:
+    """Median microseconds per poll of each stage over ``repeat`` polls."""
+    fields = {
+        group: [d.key for d in DEFINITIONS.group(group)]
+        for group in ("runtime", "battery", "energy")
+    }
+    unit_fields = [d.key for d in DEFINITIONS.group("battery_unit")]
+    stages = {"decode_us": [], "build_us": [], "read_us": [], "total_us": []}
+    reads = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        decoded = {kind: loads(body) for kind, body in bodies.items()}
+        decoded_at = time.perf_counter()
+        data = build(decoded)
+        built_at = time.perf_counter()
+        reads = read_fields(data, fields, unit_fields)
+        end = time.perf_counter()
+        stages["decode_us"].append((decoded_at - start) * 1e6)
+        stages["build_us"].append((built_at - decoded_at) * 1e6)
+        stages["read_us"].append((end - built_at) * 1e6)
+        stages["total_us"].append((end - start) * 1e6)
+    result = {name: round(statistics.median(samples), 1) for name, samples in stages.items()}
+    result["reads"] = reads
+    return result
+
+
+def _print_case(case: dict) -> None:
+    for path in ("models", "snapshot"):
+        r = case[path]
+        print(
+            f"{case['batteries']:>3} bat {path:<8} | decode {r['decode_us']:>8.1f}us "
+            f"build {r['build_us']:>8.1f}us read {r['read_us']:>7.1f}us "
+            f"total {r['total_us']:>8.1f}us ({r['reads']} reads)",
+            flush=True,
+        )
+    print(f"{'':>8}speedup {case['speedup']:.1f}x")
+
+
+def main(args) -> int:
+    results = []
+    for batteries in [int(v) for v in args.batteries.split(",") if v.strip()]:
+        bodies = asyncio.run(fetch_bodies(batteries))
+        models = measure(bodies, json.loads, build_models, args.repeat)
+        snapshot = measure(bodies, json_loads, build_snapshots, args.repeat)
+        case = {
+            "batteries": batteries,
+            "response_bytes": sum(len(body) for body in bodies.values()),
+            "models": models,
+            "snapshot": snapshot,
+            "speedup": round(models["total_us"] / snapshot["total_us"], 2),
+        }
+        _print_case(case)
+        results.append(case)
+
+    output = args.output or RESULTS_DIR / (
+        "snapshot_" + datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ") + ".json"
+    )
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(
+        json.dumps(
+            {
+                "revision": _git_revision(),
+                "created": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "json_loads": f"{json_loads.__module__}.{json_loads.__name__}",
+                "repeat": args.repeat,
+                "results": results,
+            },
+            indent=2,
+        )
+        + "\n"
+    )
+    print(f"Results written to {output}")
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batteries", default=DEFAULT_BATTERIES, help="comma separated counts")
+    parser.add_argument("--repeat", type=int, default=1000, help="polls timed per path")
+    parser.add_argument("--output", help="result file (default: results/snapshot_<timestamp>.json)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(main(parse_args()))
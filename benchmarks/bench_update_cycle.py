@@ -0,0 +1,323 @@
+"""Measure EG4 update cycles against the mock portal.
+
+Runs the integration (coordinator, sensor and binary_sensor platforms)
+inside a test Home Assistant instance for every combination of inverter
+and battery counts, and writes one JSON result file per run:
+
+    python benchmarks/bench_update_cycle.py
+    python benchmarks/bench_update_cycle.py --inverters 1 --batteries 4,16 --cycles 10
+    python benchmarks/bench_update_cycle.py --compare benchmarks/results/baseline.json
+
+Reported per case: setup time, and per cycle the wall time, CPU time,
+allocated bytes (tracemalloc peak, measured in separate cycles so tracing
+does not skew the timings) and state writes.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import shutil
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+from homeassistant import loader
+from homeassistant.const import EVENT_STATE_CHANGED, EVENT_STATE_REPORTED
+from homeassistant.core import callback
+from homeassistant.setup import async_setup_component
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_test_home_assistant,
+    get_test_instance_port,
+)
+
+from mock_portal import MockPortal
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+DOMAIN = "eg4_inverter"
+
+DEFAULT_BATTERIES = "1,2,4,8,16,32"
+DEFAULT_INVERTERS = "1,2,5,10"
+
+# Metrics compared against a baseline, and the change that counts as a regression
+COMPARED = ("setup_s", "wall_ms", "cpu_ms", "alloc_kib", "state_writes")
+
+
+def _ints(value: str) -> list[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def _summary(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+    return {
+        "median": round(statistics.median(ordered), 3),
+        "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        "min": round(ordered[0], 3),
+        "max": round(ordered[-1], 3),
+    }
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def _refresh_all(hass, coordinators) -> None:
+    await asyncio.gather(*(c.async_refresh() for c in coordinators))
+    await hass.async_block_till_done()
+
+
+async def start_http(hass) -> None:
+    """Let the loader find the integration and give it an HTTP server."""
+    # The test instance disables custom integrations
+    hass.data.pop(loader.DATA_CUSTOM_COMPONENTS, None)
+    await async_setup_component(
+        hass,
+        "http",
+        {"http": {"server_host": "127.0.0.1", "server_port": get_test_instance_port()}},
+    )
+
+
+async def setup_entries(hass, base_url: str, serials, deadband_filtering=False) -> list:
+    """Add and set up one config entry per inverter serial."""
+    entries = [
+        MockConfigEntry(
+            domain=DOMAIN,
+            title=f"EG4 {serial}",
+            unique_id=serial,
+            data={
+                "username": "bench",
+                "password": "bench",
+                "base_url": base_url,
+                "serial_number": serial,
+                "ignore_ssl": False,
+                # Cycles are driven by hand; keep the timers out of the way
+                "runtime_interval_seconds": 3600,
+                "settings_interval_seconds": 3600,
+                "backfill_days": 0,
+                "deadband_filtering": deadband_filtering,
+            },
+        )
+        for serial in serials
+    ]
+    for entry in entries:
+        entry.add_to_hass(hass)
+        if not await hass.config_entries.async_setup(entry.entry_id):
+            raise RuntimeError(f"Setup of {entry.title} failed")
+    await hass.async_block_till_done()
+    return entries
+
+
+async def run_case(
+    config_dir, inverters, batteries, cycles, alloc_cycles, latency, jitter, deadband_filtering
+) -> dict:
+    """Set up ``inverters`` config entries and time ``cycles`` refreshes."""
+    portal = MockPortal(inverters=inverters, batteries=batteries, latency=latency, jitter=jitter)
+    base_url = await portal.start()
+    # Start every case without the Stores left behind by the previous one
+    shutil.rmtree(Path(config_dir) / ".storage", ignore_errors=True)
+
+    async with async_test_home_assistant(config_dir=config_dir) as hass:
+        await start_http(hass)
+
+        writes = 0
+
+        @callback
+        def _count(event) -> None:
+            nonlocal writes
+            writes += 1
+
+        @callback
+        def _any(event_data) -> bool:
+            return True
+
+        hass.bus.async_listen(EVENT_STATE_CHANGED, _count)
+        # state_reported (write without a change) needs an event filter
+        hass.bus.async_listen(EVENT_STATE_REPORTED, _count, event_filter=_any)
+
+        started = time.perf_counter()
+        entries = await setup_entries(hass, base_url, portal.serials, deadband_filtering)
+        setup_s = time.perf_counter() - started
+
+        coordinators = [hass.data[DOMAIN][entry.entry_id] for entry in entries]
+        entity_count = len(hass.states.async_entity_ids())
+        requests_before = portal.requests
+
+        # Warm up once so first-write costs don't land in the samples
+        await _refresh_all(hass, coordinators)
+
+        wall, cpu, state_writes = [], [], []
+        for _ in range(cycles):
+            writes = 0
+            wall_start = time.perf_counter()
+            cpu_start = time.process_time()
+            await _refresh_all(hass, coordinators)
+            cpu.append((time.process_time() - cpu_start) * 1000)
+            wall.append((time.perf_counter() - wall_start) * 1000)
+            state_writes.append(writes)
+
+        alloc = []
+        tracemalloc.start()
+        for _ in range(alloc_cycles):
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+            await _refresh_all(hass, coordinators)
+            _, peak = tracemalloc.get_traced_memory()
+            alloc.append((peak - baseline) / 1024)
+        tracemalloc.stop()
+
+        requests_per_cycle = (portal.requests - requests_before) / (
+            cycles + alloc_cycles + 1
+        )
+        for entry in entries:
+            await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_stop(force=True)
+
+    await portal.stop()
+    return {
+        "inverters": inverters,
+        "batteries": batteries,
+        "entities": entity_count,
+        "setup_s": round(setup_s, 3),
+        "wall_ms": _summary(wall),
+        "cpu_ms": _summary(cpu),
+        "alloc_kib": _summary(alloc) if alloc else None,
+        "state_writes": _summary(state_writes),
+        "requests_per_cycle": round(requests_per_cycle, 2),
+        "portal_kib": round(portal.bytes_sent / 1024, 1),
+    }
+
+
+def _metric(case: dict, name: str) -> float | None:
+    value = case.get(name)
+    return value.get("median") if isinstance(value, dict) else value
+
+
+def compare(results: list[dict], baseline: list[dict], threshold: float) -> list[str]:
+    """Lines describing medians that moved by more than ``threshold``."""
+    previous = {(c["inverters"], c["batteries"]): c for c in baseline}
+    regressions = []
+    for case in results:
+        before = previous.get((case["inverters"], case["batteries"]))
+        if before is None:
+            continue
+        for name in COMPARED:
+            new, old = _metric(case, name), _metric(before, name)
+            if not new or not old:
+                continue
+            change = (new - old) / old
+            if change > threshold:
+                regressions.append(
+                    f"{case['inverters']} inverter(s) x {case['batteries']} batteries: "
+                    f"{name} {old} -> {new} (+{change:.0%})"
+                )
+    return regressions
+
+
+def _print_case(case: dict) -> None:
+    alloc = case["alloc_kib"]["median"] if case["alloc_kib"] else "-"
+    print(
+        f"{case['inverters']:>3} inv {case['batteries']:>3} bat "
+        f"{case['entities']:>5} ent | setup {case['setup_s']:>7.3f}s | "
+        f"wall {case['wall_ms']['median']:>8.2f}ms cpu {case['cpu_ms']['median']:>8.2f}ms "
+        f"alloc {alloc:>9}KiB writes {case['state_writes']['median']:>6}",
+        flush=True,
+    )
+
+
+async def main(args) -> int:
+    results = []
+    # One config dir for the whole run: HA caches the custom_components path
+    with tempfile.TemporaryDirectory(prefix="eg4_bench_") as config_dir:
+        os.symlink(REPO_ROOT / "custom_components", Path(config_dir) / "custom_components")
+        for inverters in _ints(args.inverters):
+            for batteries in _ints(args.batteries):
+                case = await run_case(
+                    config_dir,
+                    inverters,
+                    batteries,
+                    args.cycles,
+                    args.alloc_cycles,
+                    args.latency,
+                    args.jitter,
+                    args.deadband_filtering,
+                )
+                _print_case(case)
+                results.append(case)
+
+    output = args.output or RESULTS_DIR / (
+        datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ") + ".json"
+    )
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(
+        json.dumps(
+            {
+                "revision": _git_revision(),
+                "created": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "settings": {
+                    "cycles": args.cycles,
+                    "alloc_cycles": args.alloc_cycles,
+                    "latency": args.latency,
+                    "jitter": args.jitter,
+                    "deadband_filtering": args.deadband_filtering,
+                },
+                "results": results,
+            },
+            indent=2,
+        )
+        + "\n"
+    )
+    print(f"Results written to {output}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--inverters", default=DEFAULT_INVERTERS, help="comma separated counts")
+    parser.add_argument("--batteries", default=DEFAULT_BATTERIES, help="comma separated counts")
+    parser.add_argument("--cycles", type=int, default=20, help="timed cycles per case")
+    parser.add_argument(
+        "--alloc-cycles", type=int, default=5, help="cycles traced with tracemalloc (0 to skip)"
+    )
+    parser.add_argument("--latency", type=float, default=0.02, help="portal latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.005, help="latency jitter in seconds")
+    parser.add_argument(
+        "--deadband-filtering", action="store_true", help="turn the entries' deadbands on"
+    )
+    parser.add_argument("--output", help="result file (default: results/<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier result file to check for regressions")
+    parser.add_argument(
+        "--threshold", type=float, default=0.2, help="relative change that counts as a regression"
+    )
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
@@ -0,0 +1,223 @@
+"""Stand-in for the EG4 portal endpoints the integration talks to."""
+
+import asyncio
+import random
+from datetime import datetime, timedelta
+
+from aiohttp import web
+
+from eg4_inverter_api.constants import (
+    INVERTER_BATTERY_ENDPOINT,
+    INVERTER_ENERGY_ENDPOINT,
+    INVERTER_PARAMETER_READ,
+    INVERTER_RUNTIME_ENDPOINT,
+    LOGIN_ENDPOINT,
+)
+
+HISTORY_DAY_POWER_ENDPOINT = "/WManage/api/analyze/chart/dayMultiLine"
+
+
+class MockPortal:
+    """aiohttp app answering like the portal, with configurable latency.
+
+    Every response waits ``latency`` +/- ``jitter`` seconds. The account
+    holds ``inverters`` inverters with ``batteries`` battery units each.
+    Values drift a little on every call so state writes look realistic.
+    """
+
+    def __init__(self, inverters=1, batteries=4, latency=0.05, jitter=0.0, seed=0):
+        self.serials = [f"BENCH{n:05d}" for n in range(inverters)]
+        self.batteries = batteries
+        self.latency = latency
+        self.jitter = jitter
+        self.requests = 0
+        self.bytes_sent = 0
+        # Client (host, port) pairs seen; one per TCP connection opened
+        self.connections = set()
+        self._random = random.Random(seed)
+        self._runner = None
+        self.base_url = None
+
+    @web.middleware
+    async def _count_connections(self, request, handler):
+        self.connections.add(request.transport.get_extra_info("peername"))
+        return await handler(request)
+
+    async def start(self) -> str:
+        app = web.Application(middlewares=[self._count_connections])
+        app.router.add_post(LOGIN_ENDPOINT, self._login)
+        app.router.add_post(INVERTER_RUNTIME_ENDPOINT, self._runtime)
+        app.router.add_post(INVERTER_ENERGY_ENDPOINT, self._energy)
+        app.router.add_post(INVERTER_BATTERY_ENDPOINT, self._battery)
+        app.router.add_post(INVERTER_PARAMETER_READ, self._parameters)
+        app.router.add_post(HISTORY_DAY_POWER_ENDPOINT, self._day_history)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://127.0.0.1:{port}"
+        return self.base_url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def _respond(self, payload: dict) -> web.Response:
+        delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        response = web.json_response(payload)
+        self.requests += 1
+        self.bytes_sent += len(response.body)
+        return response
+
+    def _jitter(self, value, spread):
+        return value + self._random.randint(-spread, spread)
+
+    async def _login(self, request):
+        inverters = [
+            {
+                "serialNum": serial,
+                "phase": 1,
+                "deviceType": 6,
+                "batteryType": "LITHIUM",
+                "fwVersion": "FAAB-2525",
+                "withbatteryData": True,
+            }
+            for serial in self.serials
+        ]
+        return await self._respond(
+            {
+                "success": True,
+                "plants": [{"plantId": 1, "name": "Bench Plant", "inverters": inverters}],
+            }
+        )
+
+    async def _runtime(self, request):
+        return await self._respond(
+            {
+                "success": True,
+                "lost": False,
+                "statusText": "normal",
+                "batteryType": "LITHIUM",
+                "batCapacity": 280 * self.batteries,
+                "vpv1": self._jitter(3800, 50),
+                "vpv2": self._jitter(3750, 50),
+                "vpv3": 0,
+                "ppv1": self._jitter(2400, 40),
+                "ppv2": self._jitter(2300, 40),
+                "ppv3": 0,
+                "vacr": self._jitter(2405, 5),
+                "vepsr": self._jitter(2401, 5),
+                "fac": self._jitter(5999, 2),
+                "feps": self._jitter(6000, 2),
+                "pToGrid": self._jitter(800, 30),
+                "pToUser": self._jitter(10, 10),
+                "tradiator1": self._jitter(41, 1),
+                "tradiator2": self._jitter(39, 1),
+                "soc": 76,
+                "vBat": self._jitter(532, 1),
+                "pCharge": self._jitter(2500, 40),
+                "pDisCharge": 0,
+                "batPower": self._jitter(2500, 40),
+                "maxChgCurrValue": 200,
+                "maxDischgCurrValue": 200,
+                "acCouplePower": 0,
+                "genPower": 0,
+                "genVolt": 0,
+                "genFreq": 0,
+                "consumptionPower": self._jitter(1400, 60),
+                "fwCode": "FAAB-2525",
+                "genDryContact": "OFF",
+                "_12KUsingGenerator": False,
+                "bmsCharge": True,
+                "bmsDischarge": True,
+            }
+        )
+
+    async def _energy(self, request):
+        return await self._respond(
+            {
+                "success": True,
+                "soc": 76,
+                "todayYieldingText": "21.4",
+                "totalYieldingText": "8123.5",
+                "todayDischargingText": "4.2",
+                "totalDischargingText": "3012.8",
+                "todayChargingText": "9.1",
+                "totalChargingText": "3320.4",
+                "todayUsageText": "14.9",
+                "totalUsageText": "6544.1",
+                "todayImportText": "0.4",
+                "totalImportText": "903.2",
+                "todayExportText": "6.1",
+                "totalExportText": "2210.7",
+                "totalCo2ReductionText": "4050.22 kG",
+                "totalCoalReductionText": "3248.80 kG",
+            }
+        )
+
+    async def _battery(self, request):
+        units = [
+            {
+                "batteryKey": f"BAT{index:02d}",
+                "batIndex": index,
+                "batterySn": f"SN{index:08d}",
+                "totalVoltage": self._jitter(5330, 3),
+                "current": self._jitter(90, 5),
+                "soc": 76,
+                "soh": 100 - index % 3,
+                "cycleCnt": 120 + index,
+                "batMaxCellTemp": self._jitter(240, 3),
+                "batMinCellTemp": self._jitter(220, 3),
+                "batMaxCellVoltage": self._jitter(3335, 2),
+                "batMinCellVoltage": self._jitter(3325, 2),
+                "fwVersionText": "2.17",
+                "noticeInfo": "",
+            }
+            for index in range(self.batteries)
+        ]
+        return await self._respond(
+            {
+                "success": True,
+                "remainCapacity": 210 * self.batteries,
+                "fullCapacity": 280 * self.batteries,
+                "totalNumber": self.batteries,
+                "totalVoltageText": "53.3",
+                "currentText": "45.2",
+                "batteryArray": units,
+            }
+        )
+
+    async def _parameters(self, request):
+        form = await request.post()
+        start = int(form.get("startRegister", 0))
+        payload = {
+            "success": True,
+            "inverterSn": form.get("inverterSn"),
+            "startRegister": start,
+            "pointNumber": 127,
+            "valueFrame": "00" * 254,
+        }
+        for register in range(start, start + 127):
+            payload[f"HOLD_REG_{register}"] = register % 97
+        if start == 0:
+            payload["HOLD_EPS_FREQ_SET"] = 60
+            payload["HOLD_EPS_VOLT_SET"] = 240
+        return await self._respond(payload)
+
+    async def _day_history(self, request):
+        form = await request.post()
+        day = datetime.fromisoformat(form.get("dateText"))
+        samples = [
+            {
+                "time": (day + timedelta(minutes=5 * n)).strftime("%Y-%m-%d %H:%M:%S"),
+                "solarPv": max(0, 4000 - abs(144 - n) * 40),
+                "gridPower": 200 - n,
+                "batteryDischarging": 150 - n,
+                "consumption": 1200,
+            }
+            for n in range(288)
+        ]
+        return await self._respond({"success": True, "data": samples})
@@ -1,32 +1,150 @@
 import logging
-from homeassistant.config_entries import ConfigEntry
-from homeassistant.helpers.typing import ConfigType
-from homeassistant.core import HomeAssistant
-from .const import DOMAIN, PLATFORMS
-from .coordinator import EG4DataCoordinator
+from typing import TYPE_CHECKING
+
+from .const import (
+    CONF_SERIAL_NUMBER,
+    CONF_SITE,
+    DATA_SITE,
+    DOMAIN,
+    PLATFORMS,
+    SIGNAL_SITE_MEMBERS_CHANGED,
+)
+
+if TYPE_CHECKING:
+    from homeassistant.config_entries import ConfigEntry
+    from homeassistant.core import HomeAssistant
+    from homeassistant.helpers.typing import ConfigType
 
 _LOGGER = logging.getLogger(__name__)
 
 
-async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+def _import_integration() -> None:
+    """Import what async_setup registers: the services and the local endpoints.
+
+    Kept out of module scope so the headless collector can import this
+    package without Home Assistant installed. The polling side is imported
+    by the first entry that needs it, see _import_entry_modules.
+    """
+    from . import services, views  # noqa: F401
+
+
+def _import_entry_modules(site_entry: bool, with_backfill: bool) -> None:
+    """Import an entry's modules and build the definition registry."""
+    if site_entry:
+        from . import site  # noqa: F401
+    else:
+        from . import coordinator, feed  # noqa: F401
+
+        if with_backfill:
+            from . import backfill  # noqa: F401
+    from .registry import DEFINITIONS
+
+    DEFINITIONS.load()
+
+
+async def async_setup(hass: "HomeAssistant", config: "ConfigType") -> bool:
     """Set up EG4 Inverter via configuration.yaml (if required in future)."""
     _LOGGER.info("EG4 Inverter integration async_setup() called")
+    await hass.async_add_import_executor_job(_import_integration)
+    from .services import async_setup_services
+    from .views import EG4MetricsView, EG4SnapshotView, EG4StreamView
+
     hass.data.setdefault(DOMAIN, {})
+
+    # Local consumers read the coordinators' snapshots instead of the portal
+    hass.http.register_view(EG4SnapshotView())
+    hass.http.register_view(EG4StreamView())
+    hass.http.register_view(EG4MetricsView())
+
+    async_setup_services(hass)
     return True
 
 
-async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+async def async_migrate_entry(hass: "HomeAssistant", entry: "ConfigEntry") -> bool:
+    """Key inverter entries by serial number (1.1 -> 1.2)."""
+    if entry.version > 1:
+        return False
+    if entry.minor_version < 2:
+        unique_id = entry.unique_id
+        serial_number = entry.data.get(CONF_SERIAL_NUMBER)
+        # 1.1 used "EG4 Inverter Integration - <base url>"; entries without a
+        # serial polled the account's first inverter and keep their old id
+        if not entry.data.get(CONF_SITE) and serial_number:
+            taken = any(
+                other.unique_id == serial_number
+                for other in hass.config_entries.async_entries(DOMAIN)
+                if other.entry_id != entry.entry_id
+            )
+            if taken:
+                _LOGGER.warning(
+                    "Inverter %s is configured twice, keeping the old id of %s",
+                    serial_number,
+                    entry.title,
+                )
+            else:
+                unique_id = serial_number
+        hass.config_entries.async_update_entry(entry, unique_id=unique_id, minor_version=2)
+    return True
+
+
+async def async_setup_site_entry(hass: "HomeAssistant", entry: "ConfigEntry") -> bool:
+    """Set up the site aggregate of every inverter entry."""
+    await hass.async_add_import_executor_job(_import_entry_modules, True, False)
+    from .site import EG4SiteCoordinator
+
+    coordinator = EG4SiteCoordinator(hass, entry)
+    await coordinator.async_aggregate()
+    coordinator.async_start()
+    hass.data[DATA_SITE] = coordinator
+    await hass.config_entries.async_forward_entry_setups(entry, ["sensor"])
+    return True
+
+
+async def async_setup_entry(hass: "HomeAssistant", entry: "ConfigEntry") -> bool:
+    from homeassistant.helpers.dispatcher import async_dispatcher_send
+
+    if entry.data.get(CONF_SITE):
+        return await async_setup_site_entry(hass, entry)
+
+    recorder = "recorder" in hass.config.components
+    await hass.async_add_import_executor_job(_import_entry_modules, False, recorder)
+    from .coordinator import EG4DataCoordinator
+    from .feed import EG4Feed
+
+    # The coordinator registers its own async_shutdown with the entry
     coordinator = EG4DataCoordinator(hass, entry)
     await coordinator.async_config_entry_first_refresh()
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][entry.entry_id] = coordinator
 
+    coordinator.feed = EG4Feed(coordinator)
+    entry.async_on_unload(coordinator.feed.async_close)
+
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    async_dispatcher_send(hass, SIGNAL_SITE_MEMBERS_CHANGED)
+
+    # Fill statistics gaps in the background, never blocking the poll loop
+    if recorder:
+        from .backfill import EG4HistoryBackfill
+
+        backfill = EG4HistoryBackfill(hass, entry, coordinator)
+        entry.async_create_background_task(
+            hass, backfill.async_run(), f"{DOMAIN} history backfill"
+        )
     return True
 
 
-async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+async def async_unload_entry(hass: "HomeAssistant", entry: "ConfigEntry") -> bool:
+    from homeassistant.helpers.dispatcher import async_dispatcher_send
+
+    if entry.data.get(CONF_SITE):
+        unload_ok = await hass.config_entries.async_unload_platforms(entry, ["sensor"])
+        if unload_ok:
+            hass.data.pop(DATA_SITE, None)
+        return unload_ok
+
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
         hass.data[DOMAIN].pop(entry.entry_id)
+        async_dispatcher_send(hass, SIGNAL_SITE_MEMBERS_CHANGED)
     return unload_ok
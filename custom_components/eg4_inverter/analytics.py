@@ -0,0 +1,161 @@
+"""Rack-level analytics over all battery units of one snapshot."""
+
+import logging
+import math
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    DOMAIN,
+    ANALYTICS_OUTLIER_MIN_DEVIATION_MV,
+    ANALYTICS_OUTLIER_Z_SCORE,
+    ANALYTICS_SAVE_DELAY_SECONDS,
+    ANALYTICS_SOH_MIN_POINTS,
+    ANALYTICS_SOH_WINDOW_DAYS,
+    ANALYTICS_STORAGE_VERSION,
+)
+from .registry import DEFINITIONS
+from .util import parse_float
+
+_LOGGER = logging.getLogger(__name__)
+
+# Per-unit fields, scaled to V / °C / % as their battery_unit sensors are
+_COLUMNS = (
+    "batMaxCellVoltage",
+    "batMinCellVoltage",
+    "batMaxCellTemp",
+    "batMinCellTemp",
+    "soh",
+    "cycleCnt",
+)
+
+
+def _columns(battery_units) -> tuple[list, dict]:
+    """Turn the unit objects into one list per field, in a single pass."""
+    scales = {key: DEFINITIONS.get("battery_unit", key).scale for key in _COLUMNS}
+    indexes = []
+    columns = {key: [] for key in _COLUMNS}
+    for unit in battery_units:
+        indexes.append(getattr(unit, "batIndex", None))
+        for key, scale in scales.items():
+            columns[key].append(parse_float(getattr(unit, key, None), scale))
+    return indexes, columns
+
+
+def _present(values) -> list[float]:
+    return [v for v in values if v is not None]
+
+
+def _slope_per_day(points) -> float | None:
+    """Least-squares slope of ``[(day, value), ...]``."""
+    if len(points) < 2:
+        return None
+    n = len(points)
+    mean_x = math.fsum(p[0] for p in points) / n
+    mean_y = math.fsum(p[1] for p in points) / n
+    var_x = math.fsum((p[0] - mean_x) ** 2 for p in points)
+    if var_x == 0:
+        return None
+    cov = math.fsum((p[0] - mean_x) * (p[1] - mean_y) for p in points)
+    return cov / var_x
+
+
+class BatteryFleetAnalytics:
+    """Cell imbalance, temperature spread and SOH trend across the rack.
+
+    Runs once per fresh battery snapshot. The daily mean SOH is kept in a
+    persisted window so the trend survives restarts.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
+        self._store = Store(
+            hass, ANALYTICS_STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.analytics"
+        )
+        self._soh_history = []
+
+    async def async_load(self) -> None:
+        data = await self._store.async_load() or {}
+        self._soh_history = [tuple(p) for p in data.get("soh_history", [])]
+
+    def _data_to_save(self) -> dict:
+        return {"soh_history": [list(p) for p in self._soh_history]}
+
+    def _record_soh(self, timestamp: float, soh: float) -> None:
+        """Keep one point per day (the latest mean SOH seen that day)."""
+        day = math.floor(timestamp / 86400)
+        if self._soh_history and self._soh_history[-1][0] == day:
+            self._soh_history[-1] = (day, soh)
+        else:
+            self._soh_history.append((day, soh))
+        cutoff = day - ANALYTICS_SOH_WINDOW_DAYS
+        self._soh_history = [p for p in self._soh_history if p[0] > cutoff]
+        self._store.async_delay_save(self._data_to_save, ANALYTICS_SAVE_DELAY_SECONDS)
+
+    def update(self, timestamp: float, battery_units) -> dict:
+        """Compute the rack summary for one snapshot of ``battery_units``."""
+        indexes, columns = _columns(battery_units or [])
+        result = {
+            "cellVoltageSpread": None,
+            "cellTemperatureSpread": None,
+            "worstModule": None,
+            "sohMean": None,
+            "sohTrend": None,
+            "module_deviation_mv": {},
+            "outliers": [],
+            "soh_history_days": len(self._soh_history),
+        }
+
+        max_v = _present(columns["batMaxCellVoltage"])
+        min_v = _present(columns["batMinCellVoltage"])
+        if max_v and min_v:
+            result["cellVoltageSpread"] = round(max(max_v) - min(min_v), 3)
+
+        max_t = _present(columns["batMaxCellTemp"])
+        min_t = _present(columns["batMinCellTemp"])
+        if max_t and min_t:
+            result["cellTemperatureSpread"] = round(max(max_t) - min(min_t), 1)
+
+        # Each module's mid cell voltage against the rack mean
+        mids = {
+            index: (hi + lo) / 2
+            for index, hi, lo in zip(
+                indexes, columns["batMaxCellVoltage"], columns["batMinCellVoltage"]
+            )
+            if hi is not None and lo is not None
+        }
+        if mids:
+            rack_mean = math.fsum(mids.values()) / len(mids)
+            deviation = {index: (mid - rack_mean) * 1000 for index, mid in mids.items()}
+            result["module_deviation_mv"] = {
+                str(index): round(dev, 1) for index, dev in deviation.items()
+            }
+            worst = max(deviation, key=lambda index: abs(deviation[index]))
+            result["worstModule"] = worst
+
+            if len(deviation) > 2:
+                stdev = math.sqrt(
+                    math.fsum(dev**2 for dev in deviation.values()) / len(deviation)
+                )
+                result["outliers"] = [
+                    index
+                    for index, dev in deviation.items()
+                    if abs(dev) >= ANALYTICS_OUTLIER_MIN_DEVIATION_MV
+                    and stdev > 0
+                    and abs(dev) / stdev >= ANALYTICS_OUTLIER_Z_SCORE
+                ]
+
+        soh = _present(columns["soh"])
+        if soh:
+            soh_mean = math.fsum(soh) / len(soh)
+            result["sohMean"] = round(soh_mean, 2)
+            self._record_soh(timestamp, soh_mean)
+            result["soh_history_days"] = len(self._soh_history)
+            if len(self._soh_history) >= ANALYTICS_SOH_MIN_POINTS:
+                slope = _slope_per_day(self._soh_history)
+                if slope is not None:
+                    # Percentage points per 30 days
+                    result["sohTrend"] = round(slope * 30, 3)
+
+        return result
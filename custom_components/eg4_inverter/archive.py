@@ -0,0 +1,228 @@
+"""Columnar archive of raw samples, partitioned by day.
+
+Layout: ``<root>/<serial>/<YYYY-MM-DD>/<column>.f64``. Every column is a
+flat file of little-endian float64 values, one per snapshot, with NaN where
+a snapshot had no value. ``_time.f64`` holds the UTC timestamps and is
+written last, so its length is the authoritative row count of a partition.
+Files can be memory-mapped as is, e.g. ``numpy.memmap(path, "<f8")``.
+
+Neither class needs Home Assistant; the writer is called from an executor.
+"""
+
+import math
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+
+from .const import ARCHIVE_FLUSH_ROWS
+from .core import iter_numeric_values
+
+# Raw portal values only; derived values can be recomputed from them
+ARCHIVE_GROUPS = ("runtime", "energy", "battery")
+
+TIME_COLUMN = "_time"
+COLUMN_SUFFIX = ".f64"
+_ITEM_SIZE = 8
+_NAN = struct.pack("<d", math.nan)
+_UNSAFE = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+def column_name(group: str, key: str, battery=None) -> str:
+    """Archive column of one value, e.g. "runtime.ppv1" or "battery_unit.0.soc"."""
+    name = f"{group}.{key}" if battery is None else f"{group}.{battery}.{key}"
+    return _UNSAFE.sub("_", name)
+
+
+def snapshot_row(data: dict, groups=ARCHIVE_GROUPS) -> dict[str, float]:
+    """Numeric values of one snapshot, keyed by archive column."""
+    return {
+        column_name(group, key, battery): value
+        for group, key, battery, value in iter_numeric_values(data, groups)
+    }
+
+
+def _pack(values) -> bytes:
+    packed = array("d", values)
+    if sys.byteorder != "little":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+class EG4ArchiveWriter:
+    """Append snapshots of one inverter to the archive, in batches.
+
+    Rows are buffered and written every ``flush_rows`` rows, on a new
+    partition and on ``close``. Thread safe, so it can be fed from any
+    executor thread.
+    """
+
+    def __init__(self, root: str, serial, flush_rows: int = ARCHIVE_FLUSH_ROWS) -> None:
+        self._dir = os.path.join(root, _UNSAFE.sub("_", str(serial)))
+        self._flush_rows = max(flush_rows, 1)
+        self._lock = threading.Lock()
+        self._partition = None
+        self._times = []
+        self._rows = []
+
+    def append(self, timestamp: float, row: dict[str, float]) -> None:
+        """Buffer one snapshot taken at ``timestamp`` (UTC seconds)."""
+        partition = datetime.fromtimestamp(timestamp, timezone.utc).date().isoformat()
+        with self._lock:
+            if partition != self._partition:
+                self._flush()
+                self._partition = partition
+            self._times.append(timestamp)
+            self._rows.append(row)
+            if len(self._rows) >= self._flush_rows:
+                self._flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush()
+
+    close = flush
+
+    def _flush(self) -> None:
+        if not self._rows:
+            return
+        path = os.path.join(self._dir, self._partition)
+        os.makedirs(path, exist_ok=True)
+        time_path = os.path.join(path, TIME_COLUMN + COLUMN_SUFFIX)
+        existing = (
+            os.path.getsize(time_path) // _ITEM_SIZE if os.path.exists(time_path) else 0
+        )
+
+        columns = set()
+        for row in self._rows:
+            columns.update(row)
+        for column in columns:
+            values = _pack(row.get(column, math.nan) for row in self._rows)
+            self._append_column(os.path.join(path, column + COLUMN_SUFFIX), existing, values)
+        # Columns absent from the whole batch still have to line up with _time
+        for name in os.listdir(path):
+            column = name[: -len(COLUMN_SUFFIX)]
+            if name.endswith(COLUMN_SUFFIX) and column != TIME_COLUMN and column not in columns:
+                self._append_column(
+                    os.path.join(path, name), existing, _NAN * len(self._rows)
+                )
+        self._append_column(time_path, existing, _pack(self._times))
+        self._times = []
+        self._rows = []
+
+    @staticmethod
+    def _append_column(path: str, rows: int, values: bytes) -> None:
+        """Append ``values`` after exactly ``rows`` rows, padding or truncating.
+
+        New columns are padded with NaN; a column left longer than _time by
+        an interrupted flush is cut back so it lines up again.
+        """
+        with open(path, "ab") as file:
+            size = file.tell() // _ITEM_SIZE
+            if size > rows:
+                file.truncate(rows * _ITEM_SIZE)
+                file.seek(rows * _ITEM_SIZE)
+            elif size < rows:
+                file.write(_NAN * (rows - size))
+            file.write(values)
+
+
+class EG4ArchiveReader:
+    """Range queries over the archive of one inverter, via mmap."""
+
+    def __init__(self, root: str, serial) -> None:
+        self._dir = os.path.join(root, _UNSAFE.sub("_", str(serial)))
+
+    def partitions(self) -> list[str]:
+        """Days with data, oldest first."""
+        if not os.path.isdir(self._dir):
+            return []
+        return sorted(
+            name
+            for name in os.listdir(self._dir)
+            if os.path.exists(os.path.join(self._dir, name, TIME_COLUMN + COLUMN_SUFFIX))
+        )
+
+    def columns(self) -> set[str]:
+        """Every column present in any partition."""
+        return {
+            name[: -len(COLUMN_SUFFIX)]
+            for partition in self.partitions()
+            for name in os.listdir(os.path.join(self._dir, partition))
+            if name.endswith(COLUMN_SUFFIX) and name != TIME_COLUMN + COLUMN_SUFFIX
+        }
+
+    def read(self, columns, start: float | None = None, end: float | None = None) -> dict:
+        """Values of ``columns`` with ``start <= time <= end``.
+
+        Returns a dict of lists keyed by column plus "time". Only the
+        partitions overlapping the range are opened, and only the rows in
+        range are copied out of them.
+        """
+        first = _day(start)
+        last = _day(end)
+        result = {TIME_COLUMN: []}
+        result.update({column: [] for column in columns})
+        for partition in self.partitions():
+            if (first and partition < first) or (last and partition > last):
+                continue
+            path = os.path.join(self._dir, partition)
+            with _Column(os.path.join(path, TIME_COLUMN + COLUMN_SUFFIX)) as times:
+                rows = len(times.values)
+                lo = 0 if start is None else bisect_left(times.values, start)
+                hi = rows if end is None else bisect_right(times.values, end)
+                if lo >= hi:
+                    continue
+                result[TIME_COLUMN].extend(times.values[lo:hi].tolist())
+            for column in columns:
+                with _Column(os.path.join(path, column + COLUMN_SUFFIX), rows) as values:
+                    chunk = values.values[lo:hi].tolist()
+                result[column].extend(chunk + [math.nan] * (hi - lo - len(chunk)))
+        result["time"] = result.pop(TIME_COLUMN)
+        return result
+
+
+def _day(timestamp: float | None) -> str | None:
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, timezone.utc).date().isoformat()
+
+
+class _Column:
+    """A column file mapped read-only, at most ``rows`` values long."""
+
+    def __init__(self, path: str, rows: int | None = None) -> None:
+        self._file = None
+        self._map = None
+        self._view = None
+        self.values = memoryview(b"").cast("d")
+        if not os.path.exists(path) or os.path.getsize(path) < _ITEM_SIZE:
+            return
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+        size = len(self._map) // _ITEM_SIZE
+        if rows is not None:
+            size = min(size, rows)
+        self.values = self._view[: size * _ITEM_SIZE].cast("d")
+        if sys.byteorder != "little":
+            swapped = array("d", self.values)
+            swapped.byteswap()
+            self.values.release()
+            self.values = memoryview(swapped)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.values.release()
+        if self._view is not None:
+            self._view.release()
+            self._map.close()
+            self._file.close()
+
@@ -0,0 +1,408 @@
+"""Backfill long-term statistics from the portal's intraday history."""
+
+import asyncio
+import logging
+from collections import deque
+from datetime import date, datetime, timedelta
+from itertools import islice
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import (
+    async_import_statistics,
+    get_last_short_term_statistics,
+    get_last_statistics,
+    statistics_during_period,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    CONF_BACKFILL_DAYS,
+    DEFAULT_BACKFILL_DAYS,
+    HISTORY_DAY_POWER_ENDPOINT,
+    BACKFILL_MAX_CONCURRENT_DAYS,
+    BACKFILL_MAX_RETRIES,
+    BACKFILL_MAX_SAMPLE_GAP_SECONDS,
+    BACKFILL_STORAGE_VERSION,
+)
+from .registry import DEFINITIONS
+from .util import parse_float
+
+_LOGGER = logging.getLogger(__name__)
+
+HOUR = timedelta(hours=1)
+
+
+def _floor_hour(value: datetime) -> datetime:
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def _row_start(row) -> datetime:
+    """Statistics rows carry either a timestamp or a datetime as start."""
+    start = row["start"]
+    if isinstance(start, (int, float)):
+        return dt_util.utc_from_timestamp(start)
+    return dt_util.as_utc(start)
+
+
+def _parse_sample_time(day: date, text) -> datetime | None:
+    """Parse a sample time which is either a full timestamp or a time of day."""
+    if not isinstance(text, str):
+        return None
+    parsed = dt_util.parse_datetime(text)
+    if parsed is None:
+        time_of_day = dt_util.parse_time(text)
+        if time_of_day is None:
+            return None
+        parsed = datetime.combine(day, time_of_day)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=dt_util.get_default_time_zone())
+    return dt_util.as_utc(parsed)
+
+
+def hourly_energy(day: date, samples: list[dict], series) -> dict:
+    """Integrate a day of power samples (W) into kWh per hour.
+
+    ``series`` is an iterable of ``(field, sign)`` pairs; signed fields are
+    flipped and clamped at zero so e.g. grid power splits into import/export.
+    Returns ``{hour_start_utc: {(field, sign): kWh}}``.
+    """
+    points = []
+    for sample in samples:
+        when = _parse_sample_time(day, sample.get("time"))
+        if when is not None:
+            points.append((when, sample))
+    points.sort(key=lambda p: p[0])
+
+    hours = {}
+    for (t0, s0), (t1, s1) in zip(points, points[1:]):
+        seconds = (t1 - t0).total_seconds()
+        if seconds <= 0 or seconds > BACKFILL_MAX_SAMPLE_GAP_SECONDS:
+            continue
+        boundary = _floor_hour(t0) + HOUR
+        for field, sign in series:
+            p0 = parse_float(s0.get(field))
+            p1 = parse_float(s1.get(field))
+            if p0 is None or p1 is None:
+                continue
+            p0 = max(p0 * sign, 0.0)
+            p1 = max(p1 * sign, 0.0)
+            if t1 <= boundary:
+                pieces = ((t0, seconds, (p0 + p1) / 2),)
+            else:
+                # Split the trapezoid where it crosses the hour boundary
+                head = (boundary - t0).total_seconds()
+                p_mid = p0 + (p1 - p0) * head / seconds
+                pieces = (
+                    (t0, head, (p0 + p_mid) / 2),
+                    (boundary, seconds - head, (p_mid + p1) / 2),
+                )
+            for start, length, mean_power in pieces:
+                bucket = hours.setdefault(_floor_hour(start), {})
+                key = (field, sign)
+                bucket[key] = bucket.get(key, 0.0) + mean_power * length / 3_600_000
+    return hours
+
+
+class EG4HistoryBackfill:
+    """Fill gaps in the energy statistics from the portal's day history.
+
+    Days are fetched newest first with a small look-ahead window, streamed
+    hour by hour, and every missing hour is anchored on the hour after it
+    (an existing statistic, a row imported earlier in the same pass, or the
+    current portal total), so the imported sums join the live ones without
+    a step. The end of the last completed pass is kept in a Store, so
+    later runs only scan from there; an interrupted pass starts over from the
+    same point and finds the hours it already imported in the recorder.
+    Hours that cannot be anchored hold the checkpoint back for at most
+    BACKFILL_MAX_RETRIES runs; hours on days the portal has no history for
+    never do.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, coordinator) -> None:
+        self._hass = hass
+        self._entry = entry
+        self._coordinator = coordinator
+        self._days = entry.data.get(CONF_BACKFILL_DAYS, DEFAULT_BACKFILL_DAYS)
+        self._store = Store(
+            hass, BACKFILL_STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.backfill"
+        )
+
+    def _targets(self) -> list[dict]:
+        """Energy sensors with a history series and a registered entity."""
+        registry = er.async_get(self._hass)
+        targets = []
+        for definition in DEFINITIONS.group("energy", "sensor"):
+            if definition.history_field is None:
+                continue
+            entity_id = registry.async_get_entity_id(
+                "sensor",
+                DOMAIN,
+                f"{self._entry.entry_id}_energy_{definition.key}",
+            )
+            if entity_id is None:
+                continue
+            targets.append(
+                {
+                    "statistic_id": entity_id,
+                    "key": definition.key,
+                    "unit": definition.unit,
+                    "series": (definition.history_field, definition.history_sign),
+                }
+            )
+        return targets
+
+    async def _async_existing_rows(self, statistic_ids, start, end) -> dict:
+        """Return ``{statistic_id: {hour: (state, sum)}}`` already recorded."""
+        result = await get_instance(self._hass).async_add_executor_job(
+            statistics_during_period,
+            self._hass,
+            start,
+            end,
+            set(statistic_ids),
+            "hour",
+            None,
+            {"state", "sum"},
+        )
+        return {
+            statistic_id: {
+                _row_start(row): (row.get("state"), row.get("sum"))
+                for row in result.get(statistic_id, [])
+            }
+            for statistic_id in statistic_ids
+        }
+
+    def _last_statistics(self, statistic_ids) -> dict:
+        """Newest recorded ``(state, sum)`` of each statistic, short-term first.
+
+        Runs in the recorder's executor.
+        """
+        result = {}
+        for statistic_id in statistic_ids:
+            for query in (get_last_short_term_statistics, get_last_statistics):
+                rows = query(self._hass, 1, statistic_id, False, {"state", "sum"})
+                if rows.get(statistic_id):
+                    row = rows[statistic_id][0]
+                    result[statistic_id] = (row.get("state"), row.get("sum"))
+                    break
+        return result
+
+    async def _async_fetch_day(self, day: date) -> list[dict] | None:
+        """The day's samples; empty if the portal has none, None if the fetch failed."""
+        payload = f"serialNum={self._coordinator.serial_number}&dateText={day.isoformat()}"
+        try:
+            response = await self._coordinator.async_portal_request(
+                HISTORY_DAY_POWER_ENDPOINT, payload
+            )
+        except Exception as err:
+            _LOGGER.warning("Backfill: failed to fetch history for %s: %s", day, err)
+            return None
+        if not response.get("success"):
+            _LOGGER.debug("Backfill: no history for %s: %s", day, response.get("error"))
+            return []
+        return response.get("data") or []
+
+    async def _async_iter_days(self, days):
+        """Yield ``(day, samples)`` in order with bounded concurrent fetches."""
+        days = iter(days)
+        pending = deque(
+            (day, asyncio.create_task(self._async_fetch_day(day)))
+            for day in islice(days, BACKFILL_MAX_CONCURRENT_DAYS)
+        )
+        try:
+            while pending:
+                day, task = pending.popleft()
+                samples = await task
+                next_day = next(days, None)
+                if next_day is not None:
+                    pending.append(
+                        (next_day, asyncio.create_task(self._async_fetch_day(next_day)))
+                    )
+                yield day, samples
+        finally:
+            for _, task in pending:
+                task.cancel()
+
+    async def _async_iter_hours(self, days, series, unserved: set):
+        """Stream ``(hour, energies)`` newest first across the given days.
+
+        Every hour of a fetched day is yielded, hours without samples with
+        empty energies. Days the portal returned nothing for are skipped and
+        added to ``unserved``; days whose fetch failed are only skipped.
+        """
+        tz = dt_util.get_default_time_zone()
+        async for day, samples in self._async_iter_days(days):
+            if samples is None:
+                continue
+            if not samples:
+                unserved.add(day)
+                continue
+            hours = hourly_energy(day, samples, series)
+            hour = dt_util.as_utc(datetime.combine(day, datetime.min.time(), tz))
+            day_end = dt_util.as_utc(
+                datetime.combine(day + timedelta(days=1), datetime.min.time(), tz)
+            )
+            day_hours = []
+            while hour < day_end:
+                day_hours.append(hour)
+                hour += HOUR
+            for hour in reversed(day_hours):
+                yield hour, hours.get(hour, {})
+
+    def _portal_total(self, key) -> float | None:
+        energy = (self._coordinator.data or {}).get("energy")
+        return parse_float(getattr(energy, key, None))
+
+    async def async_run(self) -> None:
+        """Import any hours missing from the recorder within the backfill window."""
+        if not self._days or self._days <= 0:
+            return
+        targets = self._targets()
+        if not targets:
+            return
+
+        now_hour = _floor_hour(dt_util.utcnow())
+        start = now_hour - timedelta(days=self._days)
+        checkpoint = await self._store.async_load() or {}
+        completed_until = dt_util.parse_datetime(checkpoint.get("completed_until") or "")
+        if completed_until is not None:
+            start = max(start, completed_until - HOUR)
+
+        statistic_ids = [t["statistic_id"] for t in targets]
+        existing = await self._async_existing_rows(statistic_ids, start, now_hour + HOUR)
+
+        missing = {}
+        hour = start
+        while hour < now_hour:
+            for statistic_id in statistic_ids:
+                if hour not in existing[statistic_id]:
+                    missing.setdefault(statistic_id, set()).add(hour)
+            hour += HOUR
+        if not missing:
+            checkpoint.pop("retries", None)
+            checkpoint["completed_until"] = now_hour.isoformat()
+            await self._store.async_save(checkpoint)
+            return
+
+        tz = dt_util.get_default_time_zone()
+        days = set()
+        for hours in missing.values():
+            for hour in hours:
+                days.add(hour.astimezone(tz).date())
+                days.add((hour + HOUR).astimezone(tz).date())
+        _LOGGER.info(
+            "Backfill: importing %d missing hours over %d days",
+            max(len(h) for h in missing.values()),
+            len(days),
+        )
+
+        # The hour after the newest missing one: the live portal total at now.
+        # Its sum continues the recorder's own, which did not start at the
+        # portal total: the newest recorded sum plus the state gained since.
+        last = await get_instance(self._hass).async_add_executor_job(
+            self._last_statistics, statistic_ids
+        )
+        anchors = {}
+        for target in targets:
+            total = self._portal_total(target["key"])
+            if total is None:
+                continue
+            state, recorded_sum = last.get(target["statistic_id"], (None, None))
+            if state is None or recorded_sum is None:
+                # Nothing recorded to join to yet
+                anchor_sum = total
+            else:
+                anchor_sum = recorded_sum + total - state
+            anchors[target["statistic_id"]] = (now_hour, total, anchor_sum)
+        next_energy = {}
+        rows = {statistic_id: [] for statistic_id in statistic_ids}
+        series = {t["series"] for t in targets}
+        current_day = None
+
+        imported = set()
+        unserved = set()
+        async for hour, energies in self._async_iter_hours(
+            sorted(days, reverse=True), series, unserved
+        ):
+            if hour > now_hour:
+                continue
+            day = hour.astimezone(tz).date()
+            if current_day is not None and day != current_day:
+                self._async_flush(targets, rows)
+            current_day = day
+
+            for target in targets:
+                statistic_id = target["statistic_id"]
+                energy = energies.get(target["series"], 0.0)
+                if hour in existing[statistic_id]:
+                    state, total = existing[statistic_id][hour]
+                    anchors[statistic_id] = (hour, state, total)
+                elif hour in missing.get(statistic_id, ()):
+                    anchor = anchors.get(statistic_id)
+                    if anchor is None or anchor[0] != hour + HOUR or anchor[1] is None:
+                        anchors.pop(statistic_id, None)
+                    else:
+                        used = next_energy.get(statistic_id, 0.0)
+                        state, total = anchor[1] - used, anchor[2] - used
+                        rows[statistic_id].append(
+                            StatisticData(start=hour, state=state, sum=total)
+                        )
+                        imported.add((statistic_id, hour))
+                        anchors[statistic_id] = (hour, state, total)
+                next_energy[statistic_id] = energy
+
+        self._async_flush(targets, rows)
+        skipped = {
+            hour
+            for statistic_id, hours in missing.items()
+            for hour in hours
+            if (statistic_id, hour) not in imported
+        }
+        # The portal no longer serves those days, retrying cannot help
+        retry = {hour for hour in skipped if hour.astimezone(tz).date() not in unserved}
+        if len(retry) < len(skipped):
+            _LOGGER.info(
+                "Backfill: skipped %d hours on days the portal has no history for",
+                len(skipped) - len(retry),
+            )
+        if retry:
+            retries = checkpoint.get("retries", 0) + 1
+            if retries < BACKFILL_MAX_RETRIES:
+                # Leave completed_until where it was so the next run retries them
+                checkpoint["retries"] = retries
+                await self._store.async_save(checkpoint)
+                _LOGGER.info("Backfill: %d hours could not be anchored, will retry", len(retry))
+                return
+            _LOGGER.info(
+                "Backfill: giving up on %d hours that could not be anchored in %d runs",
+                len(retry),
+                retries,
+            )
+        checkpoint.pop("retries", None)
+        checkpoint["completed_until"] = now_hour.isoformat()
+        await self._store.async_save(checkpoint)
+        _LOGGER.info("Backfill: finished up to %s", now_hour)
+
+    @callback
+    def _async_flush(self, targets, rows) -> None:
+        """Bulk import the buffered rows."""
+        for target in targets:
+            batch = rows[target["statistic_id"]]
+            if not batch:
+                continue
+            batch.reverse()
+            metadata = StatisticMetaData(
+                has_mean=False,
+                has_sum=True,
+                name=None,
+                source="recorder",
+                statistic_id=target["statistic_id"],
+                unit_of_measurement=target["unit"],
+            )
+            async_import_statistics(self._hass, metadata, list(batch))
+            batch.clear()
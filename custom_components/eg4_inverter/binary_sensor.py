@@ -1,25 +1,34 @@
+import functools
 import logging
-from typing import Any, Dict
 from homeassistant.components.binary_sensor import (
     BinarySensorEntity,
-    BinarySensorDeviceClass,
+    BinarySensorEntityDescription,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.typing import DiscoveryInfoType
 
 from .coordinator import EG4DataCoordinator
-from .const import DOMAIN
-from .definitions import (
-    PER_BATTERY_DEFS,
-    BATTERY_SUMMARY_SENSORS,
-    ENERGY_SENSORS,
-    RUNTIME_SENSORS,
-)
+from .const import DOMAIN, SIGNAL_BATTERIES_ADDED
+from .registry import DEFINITIONS, EntityDef
+from .topology import BatteryInfo
 
 _LOGGER = logging.getLogger(__name__)
 
+# Snapshot groups with one binary sensor per definition
+INVERTER_GROUPS = ("battery", "energy", "runtime")
+
+
+@functools.cache
+def binary_sensor_description(definition: EntityDef) -> BinarySensorEntityDescription:
+    """The entity description of a definition, shared by every entry."""
+    return BinarySensorEntityDescription(
+        key=definition.key,
+        name=definition.name,
+        device_class=definition.device_class,
+    )
+
 
 # -------------------------------------------------------------------------
 #   SETUP: CREATE ENTITIES FROM DEFINITIONS
@@ -32,47 +41,34 @@ async def async_setup_entry(
     """Set up EG4 inverter binary sensors from a config entry."""
     coordinator: EG4DataCoordinator = hass.data[DOMAIN][entry.entry_id]
 
-    entities = []
-
-    # BATTERY SUMMARY BINARY SENSORS
-    for sensor_def in BATTERY_SUMMARY_SENSORS:
-        if sensor_def.get("type", "") == "binary_sensor":
-            entities.append(
-                EG4InverterBinarySensor(coordinator, entry, sensor_def, "battery")
-            )
-
-    # ENERGY BINARY SENSORS
-    for sensor_def in ENERGY_SENSORS:
-        if sensor_def.get("type", "") == "binary_sensor":
-            entities.append(
-                EG4InverterBinarySensor(coordinator, entry, sensor_def, "energy")
-            )
-
-    # RUNTIME BINARY SENSORS
-    for sensor_def in RUNTIME_SENSORS:
-        if sensor_def.get("type", "") == "binary_sensor":
-            entities.append(
-                EG4InverterBinarySensor(coordinator, entry, sensor_def, "runtime")
-            )
-
-    # PER-BATTERY BINARY SENSORS
-    battery_data = coordinator.data.get("battery", {})
-    battery_units = battery_data.battery_units or []
-    for binfo in battery_units:
-        for subdef in PER_BATTERY_DEFS:
-            subdef = subdef.copy()
-            if subdef["type"] != "binary_sensor":
-                continue
-            name_template = subdef.get("name", "")
-            dynamic_name = name_template.format(binfo=binfo)
-            if name_template != dynamic_name:
-                subdef["name"] = dynamic_name
-            entities.append(
-                EG4PerBatteryBinarySensor(coordinator, entry, binfo, subdef)
-            )
-
+    # BATTERY SUMMARY, ENERGY AND RUNTIME BINARY SENSORS
+    entities = [
+        EG4InverterBinarySensor(coordinator, entry, definition)
+        for group in INVERTER_GROUPS
+        for definition in DEFINITIONS.group(group, "binary_sensor")
+    ]
+
+    # PER-BATTERY BINARY SENSORS, from the persisted topology
+    def battery_binary_sensors(units):
+        return [
+            EG4PerBatteryBinarySensor(coordinator, entry, binfo, definition)
+            for binfo in units
+            for definition in DEFINITIONS.group("battery_unit", "binary_sensor")
+        ]
+
+    entities.extend(battery_binary_sensors(coordinator.battery_topology.units))
     async_add_entities(entities)
 
+    @callback
+    def async_add_batteries(units) -> None:
+        async_add_entities(battery_binary_sensors(units))
+
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, SIGNAL_BATTERIES_ADDED.format(entry.entry_id), async_add_batteries
+        )
+    )
+
 
 # -------------------------------------------------------------------------
 # BASE BINARY SENSOR CLASSES
@@ -83,7 +79,10 @@ class EG4BaseBinarySensor(BinarySensorEntity):
     def __init__(self, coordinator, entry):
         """Initialize the base binary sensor."""
         self._coordinator = coordinator
-        self._entry = entry
+        # One dict per device, shared by all of its entities
+        self._attr_device_info = coordinator.device_info
+        # Snapshot key whose data age applies to this sensor, see core.DATA_KINDS
+        self._data_kind = None
 
     @property
     def should_poll(self) -> bool:
@@ -96,42 +95,41 @@ class EG4BaseBinarySensor(BinarySensorEntity):
             self._coordinator.async_add_listener(self.async_write_ha_state)
         )
 
-    @property
-    def available(self) -> bool:
-        """Return true if coordinator was able to update successfully."""
-        return self._coordinator.last_update_success
+    @callback
+    def async_write_ha_state(self) -> None:
+        """Write state, counted in the coordinator's metrics."""
+        self._coordinator.metrics.record_entity_write()
+        super().async_write_ha_state()
 
     @property
-    def device_info(self):
-        """Put all sensors under one device in the UI."""
-        return {
-            "identifiers": {(DOMAIN, self._entry.entry_id)},
-            "name": "EG4 Inverter",
-            "manufacturer": "EG4",
-        }
+    def available(self) -> bool:
+        """Return true if the last update succeeded and the data is not too old."""
+        if not self._coordinator.last_update_success:
+            return False
+        return self._data_kind is None or not self._coordinator.is_stale(self._data_kind)
 
 
 class EG4InverterBinarySensor(EG4BaseBinarySensor):
     """A binary sensor for defined data points in battery, runtime, or energy."""
 
-    def __init__(self, coordinator, entry, sensor_def: Dict[str, Any], parent_key: str):
+    def __init__(self, coordinator, entry, definition: EntityDef):
         super().__init__(coordinator, entry)
-        self._sensor_def = sensor_def
-        self._parent_key = parent_key
+        self._definition = definition
+        self._parent_key = definition.group
+        self._data_kind = definition.group
 
-        self._attr_unique_id = f"{entry.entry_id}_{parent_key}_{sensor_def['key']}"
-        self._attr_name = sensor_def.get("name", sensor_def["key"])
-        self._attr_device_class = sensor_def.get("device_class")
+        self._attr_unique_id = f"{entry.entry_id}_{definition.group}_{definition.key}"
+        self.entity_description = binary_sensor_description(definition)
 
     @property
     def is_on(self) -> bool:
         data = self._coordinator.data.get(self._parent_key, {})
         try:
-            raw_value = getattr(data, self._sensor_def["key"])
+            raw_value = getattr(data, self._definition.key)
         except Exception as e:
-            raw_value = data.get(self._sensor_def["key"], False)
+            raw_value = data.get(self._definition.key, False)
 
-        calc_func = self._sensor_def.get("calc")
+        calc_func = self._definition.calc
         if calc_func:
             return calc_func(data)
         return bool(raw_value)
@@ -143,27 +141,39 @@ class EG4PerBatteryBinarySensor(EG4BaseBinarySensor):
         self,
         coordinator,
         entry,
-        battery_info: Dict[str, Any],
-        sensor_def: Dict[str, Any],
+        battery_info: BatteryInfo,
+        definition: EntityDef,
     ):
         super().__init__(coordinator, entry)
-        self._battery_info = battery_info
-        self._sensor_def = sensor_def
+        # The module-level definition, not a copy; only the name is per battery
+        self._definition = definition
+        self._bat_index = battery_info.batIndex
+        self._data_kind = "battery"
 
         battery_idx = battery_info.batIndex or "Unknown"
-        key = sensor_def["key"]
+        key = definition.key
         self._attr_unique_id = f"{entry.entry_id}_battery_{battery_idx}_{key}"
-        self._attr_name = sensor_def.get("name", f"{battery_idx} {key}")
-        self._attr_device_class = sensor_def.get("device_class")
+        self.entity_description = binary_sensor_description(definition)
+        self._attr_name = definition.name.format(binfo=battery_info)
+
+    @property
+    def available(self) -> bool:
+        """Unavailable while the unit is missing from the battery data."""
+        return super().available and self._coordinator.battery_unit(self._bat_index) is not None
 
     @property
     def is_on(self) -> bool:
+        # Lookup battery by index in the latest data, not the setup snapshot
+        target = self._coordinator.battery_unit(self._bat_index)
+        if target is None:
+            return None
+
         try:
-            raw_value = getattr(self._battery_info, self._sensor_def["key"], None)
+            raw_value = getattr(target, self._definition.key, None)
         except Exception as e:
-            raw_value = self._battery_info.get(self._sensor_def["key"])
+            raw_value = target.get(self._definition.key)
 
-        calc_func = self._sensor_def.get("calc")
+        calc_func = self._definition.calc
         if calc_func:
-            return calc_func(self._battery_info)
+            return calc_func(target)
         return bool(raw_value)
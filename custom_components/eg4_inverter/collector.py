@@ -0,0 +1,298 @@
+"""Poll many inverters without Home Assistant and write samples to a sink.
+
+    python -m custom_components.eg4_inverter.collector sites.json csv:samples.csv
+
+``sites.json`` holds the poll interval and one entry per inverter::
+
+    {
+        "interval": 30,
+        "sites": [
+            {"username": "...", "password": "...", "serial_number": "..."},
+            {"username": "...", "password": "...", "serial_number": "...",
+             "base_url": "https://...", "ignore_ssl": true}
+        ]
+    }
+
+Every inverter is polled under one event loop. Sites share a connection
+pool but each keeps its own cookie jar, so several accounts can be polled
+side by side. Samples are normalized to (timestamp, serial, group, key,
+battery, value) rows and written to ``csv:PATH``, ``sqlite:PATH`` or
+``line:PATH`` (InfluxDB line protocol) on a dedicated writer thread.
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .const import (
+    CONF_BASE_URL,
+    CONF_IGNORE_SSL,
+    CONF_PASSWORD,
+    CONF_SERIAL_NUMBER,
+    CONF_USERNAME,
+    COLLECTOR_MAX_CONCURRENT_POLLS,
+    DEFAULT_BASE_URL,
+    DEFAULT_RUNTIME_INTERVAL_SECONDS,
+)
+from .archive import EG4ArchiveWriter, snapshot_row
+from .core import EG4PollCore, derived_values, iter_numeric_values
+from .transport import ConnectorPool, PortalTransport
+
+_LOGGER = logging.getLogger(__name__)
+
+SAMPLE_GROUPS = ("energy", "runtime", "battery", "derived")
+SETTINGS_GROUP = "settings"
+
+SAMPLE_COLUMNS = ("timestamp", "serial", "group", "key", "battery", "value")
+
+
+# ---------------------------------------------------------------------
+# Sinks, only ever called from the writer thread
+# ---------------------------------------------------------------------
+class CSVSink:
+    """Append rows to a CSV file, writing the header to a new file."""
+
+    def __init__(self, path: str) -> None:
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, "a", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        if new:
+            self._writer.writerow(SAMPLE_COLUMNS)
+
+    def write(self, rows) -> None:
+        self._writer.writerows(rows)
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class SQLiteSink:
+    """Insert rows into a ``samples`` table."""
+
+    def __init__(self, path: str) -> None:
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS samples (timestamp REAL, serial TEXT, "
+            '"group" TEXT, key TEXT, battery TEXT, value REAL)'
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS samples_serial_time ON samples (serial, timestamp)"
+        )
+
+    def write(self, rows) -> None:
+        with self._conn:
+            self._conn.executemany("INSERT INTO samples VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def _escape_tag(value) -> str:
+    return str(value).replace("\\", "\\\\").replace(",", "\\,").replace("=", "\\=").replace(" ", "\\ ")
+
+
+class LineProtocolSink:
+    """Append InfluxDB line protocol, one line per serial, group and battery."""
+
+    def __init__(self, path: str) -> None:
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, rows) -> None:
+        points = {}
+        for timestamp, serial, group, key, battery, value in rows:
+            points.setdefault((timestamp, serial, group, battery), []).append(
+                f"{_escape_tag(key)}={value}"
+            )
+        lines = []
+        for (timestamp, serial, group, battery), fields in points.items():
+            tags = f"serial={_escape_tag(serial)},group={_escape_tag(group)}"
+            if battery is not None:
+                tags += f",battery={_escape_tag(battery)}"
+            lines.append(f"eg4,{tags} {','.join(fields)} {int(timestamp * 1e9)}\n")
+        self._file.writelines(lines)
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+SINKS = {"csv": CSVSink, "sqlite": SQLiteSink, "line": LineProtocolSink}
+
+
+def open_sink(spec: str):
+    """Open a sink from ``kind:path``, e.g. ``sqlite:samples.db``."""
+    kind, _, path = spec.partition(":")
+    if kind not in SINKS or not path:
+        raise ValueError(f"Sink must be one of {', '.join(f'{k}:PATH' for k in SINKS)}, got {spec!r}")
+    return SINKS[kind](path)
+
+
+def sample_rows(serial, timestamp: float, data: dict, groups) -> list[tuple]:
+    """Normalize one snapshot into sink rows."""
+    return [
+        (timestamp, serial, group, key, battery, value)
+        for group, key, battery, value in iter_numeric_values(data, groups)
+    ]
+
+
+# ---------------------------------------------------------------------
+# Polling
+# ---------------------------------------------------------------------
+class EG4Collector:
+    """Poll every configured inverter on a shared schedule."""
+
+    def __init__(
+        self,
+        sites: list[dict],
+        sink,
+        interval: float = DEFAULT_RUNTIME_INTERVAL_SECONDS,
+        concurrency: int = COLLECTOR_MAX_CONCURRENT_POLLS,
+        with_settings: bool = False,
+        archive_dir: str | None = None,
+    ) -> None:
+        self._sites = sites
+        self._sink = sink
+        self._interval = interval
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._with_settings = with_settings
+        self._groups = SAMPLE_GROUPS + ((SETTINGS_GROUP,) if with_settings else ())
+        # One writer thread, so sinks never see concurrent writes
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="eg4_sink")
+        self._archive_dir = archive_dir
+        self._archives = {}
+        self.polls = 0
+        self.failures = 0
+        self.rows = 0
+
+    async def _async_write(self, rows) -> None:
+        if rows:
+            await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._sink.write, rows
+            )
+            self.rows += len(rows)
+
+    async def _async_archive(self, serial, timestamp: float, data: dict) -> None:
+        if self._archive_dir is None or "runtime" not in data["fresh"]:
+            return
+        if serial not in self._archives:
+            self._archives[serial] = EG4ArchiveWriter(self._archive_dir, serial)
+        await asyncio.get_running_loop().run_in_executor(
+            self._executor, self._archives[serial].append, timestamp, snapshot_row(data)
+        )
+
+    async def _async_poll_once(self, core: EG4PollCore) -> None:
+        async with self._semaphore:
+            try:
+                data = await core.async_poll()
+                if self._with_settings:
+                    try:
+                        await core.async_refresh_settings()
+                    except Exception as err:
+                        _LOGGER.warning("%s: failed to update settings: %s", core.serial_number, err)
+                    data["settings"] = core.settings
+            except Exception as err:
+                self.failures += 1
+                _LOGGER.warning("%s: poll failed: %s", core.serial_number, err)
+                return
+        self.polls += 1
+        timestamp = time.time()
+        data["derived"] = derived_values(data["runtime"])
+        await self._async_write(sample_rows(core.serial_number, timestamp, data, self._groups))
+        await self._async_archive(core.serial_number, timestamp, data)
+
+    async def _async_run_site(self, core: EG4PollCore, offset: float, cycles: int | None) -> None:
+        """Poll one inverter every interval, starting ``offset`` seconds late."""
+        await asyncio.sleep(offset)
+        next_poll = time.monotonic()
+        done = 0
+        while cycles is None or done < cycles:
+            await self._async_poll_once(core)
+            done += 1
+            next_poll += self._interval
+            await asyncio.sleep(max(next_poll - time.monotonic(), 0))
+
+    async def async_run(self, cycles: int | None = None, duration: float | None = None) -> None:
+        """Poll every site ``cycles`` times, for ``duration`` seconds or forever."""
+        # Sites on the same portal share kept-alive connections, without a limit
+        pool = ConnectorPool(limit_per_host=0)
+        apis = []
+        tasks = []
+        try:
+            for index, site in enumerate(self._sites):
+                transport = PortalTransport(pool, site.get(CONF_IGNORE_SSL, False))
+                api = transport.create_api(
+                    site[CONF_USERNAME],
+                    site[CONF_PASSWORD],
+                    site.get(CONF_BASE_URL, DEFAULT_BASE_URL),
+                )
+                apis.append(api)
+                core = EG4PollCore(api, site[CONF_SERIAL_NUMBER])
+                # Spread the sites over the interval instead of polling in bursts
+                offset = 0 if cycles == 1 else self._interval * index / len(self._sites)
+                tasks.append(asyncio.create_task(self._async_run_site(core, offset, cycles)))
+            if tasks:
+                await asyncio.wait(tasks, timeout=duration)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for api in apis:
+                await api.close()
+            await pool.async_close()
+            for archive in self._archives.values():
+                self._executor.submit(archive.close)
+            self._executor.shutdown(wait=True)
+            self._sink.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("config", help="JSON file with the interval and the sites to poll")
+    parser.add_argument("sink", help="csv:PATH, sqlite:PATH or line:PATH")
+    parser.add_argument("--once", action="store_true", help="poll every site once and exit")
+    parser.add_argument("--duration", type=float, help="stop after this many seconds")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=COLLECTOR_MAX_CONCURRENT_POLLS,
+        help="polls in flight at the same time",
+    )
+    parser.add_argument("--with-settings", action="store_true", help="also sample settings")
+    parser.add_argument("--archive", metavar="DIR", help="also append to a columnar archive")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+    with open(args.config, encoding="utf-8") as file:
+        config = json.load(file)
+
+    collector = EG4Collector(
+        config["sites"],
+        open_sink(args.sink),
+        interval=config.get("interval", DEFAULT_RUNTIME_INTERVAL_SECONDS),
+        concurrency=args.concurrency,
+        with_settings=args.with_settings,
+        archive_dir=args.archive,
+    )
+    try:
+        asyncio.run(collector.async_run(cycles=1 if args.once else None, duration=args.duration))
+    except KeyboardInterrupt:
+        pass
+    _LOGGER.info(
+        "%s polls, %s failed, %s rows written", collector.polls, collector.failures, collector.rows
+    )
+    return 1 if collector.failures and not collector.polls else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
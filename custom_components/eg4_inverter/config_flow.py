@@ -1,5 +1,7 @@
+import asyncio
 import logging
-from typing import Any
+import time
+from typing import TYPE_CHECKING, Any
 
 import voluptuous as vol
 
@@ -15,18 +17,6 @@ from homeassistant.const import (
 )
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import HomeAssistantError
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
-from eg4_inverter_api import EG4InverterAPI
-from eg4_inverter_api.exceptions import EG4APIError, EG4AuthError
-from eg4_inverter_api.models import (
-    APIResponse,
-    BatteryData,
-    BatteryUnit,
-    EnergyData,
-    Inverter,
-    RuntimeData,
-    InverterParameters,
-)
 from .const import (
     DOMAIN,
     CONF_USERNAME,
@@ -36,18 +26,38 @@ from .const import (
     CONF_IGNORE_SSL,
     CONF_RUNTIME_INTERVAL_SECONDS,
     CONF_SETTINGS_INTERVAL_SECONDS,
+    CONF_BACKFILL_DAYS,
+    CONF_ROLLING_WINDOWS,
+    CONF_ARCHIVE_DIR,
+    CONF_MAX_DATA_AGE_SECONDS,
+    CONF_TRACE_SAMPLE_EVERY,
+    CONF_DEADBAND_FILTERING,
+    CONF_SITE,
     DEFAULT_RUNTIME_INTERVAL_SECONDS,
     DEFAULT_SETTINGS_INTERVAL_SECONDS,
     DEFAULT_BASE_URL,
+    DEFAULT_BACKFILL_DAYS,
+    DEFAULT_ROLLING_WINDOWS,
+    DEFAULT_ARCHIVE_DIR,
+    DEFAULT_MAX_DATA_AGE_SECONDS,
+    DEFAULT_TRACE_SAMPLE_EVERY,
+    DEFAULT_DEADBAND_FILTERING,
+    DATA_LOGGED_IN_APIS,
+    DISCOVERY_MAX_CONCURRENT_PROBES,
+    DISCOVERY_PROBE_TIMEOUT_SECONDS,
 )
 
+if TYPE_CHECKING:
+    from eg4_inverter_api import EG4InverterAPI
+
 _LOGGER = logging.getLogger(__name__)
 
 STEP_USER_DATA_SCHEMA = vol.Schema(
     {
         vol.Required(CONF_USERNAME, default=""): str,
         vol.Required(CONF_PASSWORD, default=""): str,
-        vol.Required(CONF_SERIAL_NUMBER, default=""): str,
+        # Left empty, the inverters of the account are discovered and probed
+        vol.Optional(CONF_SERIAL_NUMBER, default=""): str,
         vol.Optional(CONF_BASE_URL, default=DEFAULT_BASE_URL): str,
         vol.Optional(CONF_IGNORE_SSL, default=False): bool,
         vol.Optional(
@@ -56,53 +66,127 @@ STEP_USER_DATA_SCHEMA = vol.Schema(
         vol.Optional(
             CONF_SETTINGS_INTERVAL_SECONDS, default=DEFAULT_SETTINGS_INTERVAL_SECONDS
         ): int,
+        vol.Optional(CONF_BACKFILL_DAYS, default=DEFAULT_BACKFILL_DAYS): int,
+        vol.Optional(CONF_ROLLING_WINDOWS, default=DEFAULT_ROLLING_WINDOWS): str,
+        vol.Optional(CONF_ARCHIVE_DIR, default=DEFAULT_ARCHIVE_DIR): str,
+        vol.Optional(
+            CONF_MAX_DATA_AGE_SECONDS, default=DEFAULT_MAX_DATA_AGE_SECONDS
+        ): int,
+        vol.Optional(
+            CONF_TRACE_SAMPLE_EVERY, default=DEFAULT_TRACE_SAMPLE_EVERY
+        ): int,
+        vol.Optional(
+            CONF_DEADBAND_FILTERING, default=DEFAULT_DEADBAND_FILTERING
+        ): bool,
     }
 )
 
 
+def _import_api() -> tuple:
+    from eg4_inverter_api.exceptions import EG4APIError, EG4AuthError
+
+    from .transport import PortalTransport, async_get_connector_pool
+
+    return PortalTransport, async_get_connector_pool, EG4APIError, EG4AuthError
+
+
+async def async_login(hass: HomeAssistant, data: dict[str, Any]) -> "EG4InverterAPI":
+    """Log in with the user's credentials, raising CannotConnect/InvalidAuth."""
+    # The flow module is loaded at startup; the API library only when used
+    (
+        PortalTransport,
+        async_get_connector_pool,
+        EG4APIError,
+        EG4AuthError,
+    ) = await hass.async_add_import_executor_job(_import_api)
+    # The same pooled transport as the entry, which takes this client over
+    transport = PortalTransport(async_get_connector_pool(hass), data[CONF_IGNORE_SSL])
+    api = transport.create_api(data[CONF_USERNAME], data[CONF_PASSWORD], data[CONF_BASE_URL])
+    try:
+        await api.login()
+    except Exception as err:
+        await api.close()
+        if isinstance(err, EG4AuthError):
+            raise InvalidAuth from err
+        if isinstance(err, EG4APIError):
+            raise CannotConnect from err
+        raise
+    return api
+
+
 async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str, Any]:
     """Validate the user input allows us to connect.
 
     Data has the keys from STEP_USER_DATA_SCHEMA with values provided by the user.
     """
-    session = async_get_clientsession(hass)
-    api = EG4InverterAPI(
-        data[CONF_USERNAME],
-        data[CONF_PASSWORD],
-        base_url=data[CONF_BASE_URL],
-        session=session,
-    )
-    try:
-        await api.login(ignore_ssl=data[CONF_IGNORE_SSL])
-        inverters = api.get_inverters()
-        _LOGGER.info(f"EG4 Inverter Login: {inverters}")
-
-        if data.get(CONF_SERIAL_NUMBER):
-            selected_inverter = [
-                x for x in inverters if x.serialNum == data.get(CONF_SERIAL_NUMBER)
-            ]
-            if len(selected_inverter) > 0:
-                selected_inverter = selected_inverter[0]
-                _LOGGER.info(f"EG4 Inverter Selected: {selected_inverter}")
-            else:
-                selected_inverter = None
-
-            api.set_selected_inverter(serialNum=data[CONF_SERIAL_NUMBER])
+    api = await async_login(hass, data)
+    await api.close()
+    inverters = api.get_inverters()
+    _LOGGER.info("EG4 Inverter Login: %s", inverters)
+
+    if data.get(CONF_SERIAL_NUMBER):
+        selected_inverter = [
+            x for x in inverters if x.serialNum == data.get(CONF_SERIAL_NUMBER)
+        ]
+        if len(selected_inverter) > 0:
+            selected_inverter = selected_inverter[0]
+            _LOGGER.info("EG4 Inverter Selected: %s", selected_inverter)
         else:
-            _LOGGER.warning(f"DEFAULT EG4 Inverter at index 0 Selected: {inverters[0]}")
-            api.set_selected_inverter(inverterIndex=0)
-    except EG4AuthError as err:
-        raise InvalidAuth from err
-    except EG4APIError as err:
-        raise CannotConnect from err
+            selected_inverter = None
+
+        api.set_selected_inverter(serialNum=data[CONF_SERIAL_NUMBER])
+    else:
+        _LOGGER.warning("DEFAULT EG4 Inverter at index 0 Selected: %s", inverters[0])
+        api.set_selected_inverter(inverterIndex=0)
     return {"title": f"EG4 Inverter Integration - {data[CONF_BASE_URL]}"}
 
 
+async def async_probe_inverters(api: "EG4InverterAPI", serials) -> dict[str, dict]:
+    """Read the runtime data of every inverter concurrently.
+
+    Returns per serial whether it answered ("ok", "error" or "timeout") and
+    how long it took. At most DISCOVERY_MAX_CONCURRENT_PROBES requests are in
+    flight; they share the api's logged-in session.
+    """
+    semaphore = asyncio.Semaphore(DISCOVERY_MAX_CONCURRENT_PROBES)
+
+    async def probe(serial) -> dict:
+        async with semaphore:
+            start = time.monotonic()
+            try:
+                async with asyncio.timeout(DISCOVERY_PROBE_TIMEOUT_SECONDS):
+                    # Internal API, the library version is pinned in manifest.json
+                    response = await api._request(
+                        "POST", api._inverter_runtime_url, f"serialNum={serial}"
+                    )
+            except TimeoutError:
+                return {"status": "timeout", "ms": None}
+            except Exception as err:
+                _LOGGER.debug("Probing inverter %s failed: %s", serial, err)
+                return {"status": "error", "ms": None}
+            ms = round((time.monotonic() - start) * 1000)
+            return {"status": "ok" if response.get("success") else "error", "ms": ms}
+
+    results = await asyncio.gather(*(probe(serial) for serial in serials))
+    return dict(zip(serials, results))
+
+
+def _probe_label(inverter, probe: dict) -> str:
+    plant = getattr(inverter, "plantName", None)
+    name = f"{inverter.serialNum} ({plant})" if plant else inverter.serialNum
+    if probe["status"] == "ok":
+        return f"{name} - online, {probe['ms']} ms"
+    return f"{name} - {probe['status']}"
+
+
 class EG4InverterConfigFlow(ConfigFlow, domain=DOMAIN):
     """Handle a config flow for EG4 Inverter Integration."""
 
     VERSION = 1
+    # 1.2: inverter entries are keyed by serial number, see async_migrate_entry
+    MINOR_VERSION = 2
     _input_data: dict[str, Any]
+    _api: "EG4InverterAPI | None" = None
 
     @staticmethod
     @callback
@@ -111,17 +195,51 @@ class EG4InverterConfigFlow(ConfigFlow, domain=DOMAIN):
         return OptionsFlowHandler(config_entry)
         # return ExampleOptionsFlowHandler(config_entry)
 
+    @callback
+    def async_remove(self) -> None:
+        """Close the client, unless the entry this flow created took it over."""
+        handed_over = self.hass.data.get(DATA_LOGGED_IN_APIS, {}).pop(self.flow_id, None)
+        for api in (self._api, handed_over):
+            if api is not None:
+                self.hass.async_create_task(api.close())
+        self._api = None
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> ConfigFlowResult:
-        _LOGGER.debug("EG4 Inverter async_step_user() called")
         """Handle the initial step."""
+        _LOGGER.debug("EG4 Inverter async_step_user() called")
+        entries = self._async_current_entries()
+        inverters = [entry for entry in entries if not entry.data.get(CONF_SITE)]
+        # A site aggregate only makes sense for parallel inverters
+        if (
+            user_input is None
+            and len(inverters) >= 2
+            and len(inverters) == len(entries)
+        ):
+            return self.async_show_menu(step_id="user", menu_options=["account", "site"])
+        return await self.async_step_account(user_input)
+
+    async def async_step_site(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Add the site device totalling every inverter entry."""
+        await self.async_set_unique_id(CONF_SITE)
+        self._abort_if_unique_id_configured()
+        return self.async_create_entry(title="EG4 Site", data={CONF_SITE: True})
+
+    async def async_step_account(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Log in and pick the inverter."""
         errors: dict[str, str] = {}
 
         if user_input is not None:
-
+            if self._api is not None:
+                await self._api.close()
+                self._api = None
             try:
-                info = await validate_input(self.hass, user_input)
+                self._api = await async_login(self.hass, user_input)
             except CannotConnect:
                 errors["base"] = "cannot_connect"
             except InvalidAuth:
@@ -130,14 +248,83 @@ class EG4InverterConfigFlow(ConfigFlow, domain=DOMAIN):
                 _LOGGER.exception("Unexpected exception")
                 errors["base"] = "unknown"
 
-            if "base" not in errors:
-                await self.async_set_unique_id(info.get("title"))
-                self._abort_if_unique_id_configured()
-                return self.async_create_entry(title=info["title"], data=user_input)
+            serial_number = user_input.get(CONF_SERIAL_NUMBER)
+            if "base" not in errors and serial_number:
+                if serial_number not in {x.serialNum for x in self._api.get_inverters()}:
+                    errors[CONF_SERIAL_NUMBER] = "inverter_not_found"
+            if not errors:
+                self._input_data = user_input
+                if serial_number:
+                    return await self._async_create_inverter_entry(serial_number)
+                return await self.async_step_inverter()
 
         return self.async_show_form(
-            step_id="user", data_schema=STEP_USER_DATA_SCHEMA, errors=errors
+            step_id="account", data_schema=STEP_USER_DATA_SCHEMA, errors=errors
+        )
+
+    async def async_step_inverter(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Pick one of the account's inverters, probed for live data."""
+        if user_input is not None:
+            return await self._async_create_inverter_entry(
+                user_input[CONF_SERIAL_NUMBER]
+            )
+
+        configured = self._configured_serials()
+        inverters = [
+            inverter
+            for inverter in self._api.get_inverters()
+            if inverter.serialNum not in configured
+        ]
+        if not inverters:
+            return self.async_abort(reason="already_configured")
+        if len(inverters) == 1:
+            return await self._async_create_inverter_entry(inverters[0].serialNum)
+
+        probes = await async_probe_inverters(
+            self._api, [inverter.serialNum for inverter in inverters]
         )
+        _LOGGER.debug("EG4 inverter probes: %s", probes)
+        # Responsive inverters first, fastest first
+        inverters.sort(
+            key=lambda inv: (probes[inv.serialNum]["status"] != "ok", probes[inv.serialNum]["ms"] or 0)
+        )
+        choices = {
+            inverter.serialNum: _probe_label(inverter, probes[inverter.serialNum])
+            for inverter in inverters
+        }
+        return self.async_show_form(
+            step_id="inverter",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(
+                        CONF_SERIAL_NUMBER, default=inverters[0].serialNum
+                    ): vol.In(choices)
+                }
+            ),
+        )
+
+    @callback
+    def _configured_serials(self) -> set[str]:
+        """Serials of the existing entries, whatever their unique_id."""
+        return {
+            entry.data.get(CONF_SERIAL_NUMBER)
+            for entry in self._async_current_entries(include_ignore=False)
+        }
+
+    async def _async_create_inverter_entry(self, serial_number: str) -> ConfigFlowResult:
+        """Create the entry for one inverter and hand it the logged-in client."""
+        await self.async_set_unique_id(serial_number)
+        self._abort_if_unique_id_configured()
+        # Entries that could not be migrated still carry the old unique_id
+        if serial_number in self._configured_serials():
+            return self.async_abort(reason="already_configured")
+        data = {**self._input_data, CONF_SERIAL_NUMBER: serial_number}
+        # Set up before this flow is removed, see EG4DataCoordinator
+        self.hass.data.setdefault(DATA_LOGGED_IN_APIS, {})[self.flow_id] = self._api
+        self._api = None
+        return self.async_create_entry(title=f"EG4 Inverter {serial_number}", data=data)
 
     async def async_step_reconfigure(
         self, user_input: dict[str, Any] | None = None
@@ -147,6 +334,8 @@ class EG4InverterConfigFlow(ConfigFlow, domain=DOMAIN):
         config_entry = self.hass.config_entries.async_get_entry(
             self.context["entry_id"]
         )
+        if config_entry.data.get(CONF_SITE):
+            return self.async_abort(reason="not_supported")
 
         if user_input is not None:
             try:
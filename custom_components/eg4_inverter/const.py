@@ -12,6 +12,137 @@ CONF_IGNORE_SSL = "ignore_ssl"
 CONF_RUNTIME_INTERVAL_SECONDS = "runtime_interval_seconds"
 CONF_SETTINGS_INTERVAL_SECONDS = "settings_interval_seconds"
 
+CONF_BACKFILL_DAYS = "backfill_days"
+# Comma separated list of minutes, e.g. "5,15,60"
+CONF_ROLLING_WINDOWS = "rolling_windows"
+# Directory for the raw sample archive, relative to the config dir; empty is off
+CONF_ARCHIVE_DIR = "archive_dir"
+# Entities become unavailable when their data is older than this; 0 is off
+CONF_MAX_DATA_AGE_SECONDS = "max_data_age_seconds"
+# Every Nth update cycle is traced for the diagnostics download; 0 is off
+CONF_TRACE_SAMPLE_EVERY = "trace_sample_every"
+# Skip sensor writes within each definition's deadband; off by default
+CONF_DEADBAND_FILTERING = "deadband_filtering"
+
+# Developer options, not part of the config form: record portal traffic to
+# a file, or replay such a file instead of talking to the portal.
+CONF_RECORD_FILE = "record_file"
+CONF_REPLAY_FILE = "replay_file"
+# 1.0 replays at recorded latency; 10 runs ten times faster; 0 no waiting
+CONF_REPLAY_SPEED = "replay_speed"
+
 DEFAULT_RUNTIME_INTERVAL_SECONDS = 30
 DEFAULT_SETTINGS_INTERVAL_SECONDS = 1200
 DEFAULT_BASE_URL = "https://monitor.eg4electronics.com"
+DEFAULT_BACKFILL_DAYS = 7
+DEFAULT_ROLLING_WINDOWS = "5,15,60"
+DEFAULT_ARCHIVE_DIR = ""
+DEFAULT_MAX_DATA_AGE_SECONDS = 600
+DEFAULT_TRACE_SAMPLE_EVERY = 0
+DEFAULT_DEADBAND_FILTERING = False
+
+# Bus events fired on real transitions only, see events.py
+EVENT_STATUS_CHANGED = f"{DOMAIN}_status_changed"
+EVENT_GENERATOR_CHANGED = f"{DOMAIN}_generator_changed"
+EVENT_BATTERY_NOTICE_CHANGED = f"{DOMAIN}_battery_notice_changed"
+
+# Portal endpoints not wrapped by eg4_inverter_api
+SETTINGS_READ_ENDPOINT = "/WManage/web/maintain/remoteRead/read"
+HISTORY_DAY_POWER_ENDPOINT = "/WManage/api/analyze/chart/dayMultiLine"
+
+# Holding-register blocks read by the portal's remoteRead endpoint.
+SETTINGS_REGISTER_BLOCKS = (0, 127, 240, 500, 2000, 5000)
+SETTINGS_BLOCK_POINT_NUMBER = 127
+# How many stale (not written) blocks to re-read per runtime cycle
+SETTINGS_STALE_BLOCKS_PER_CYCLE = 1
+# A block that fails is retried after this, doubling per failure up to the max
+SETTINGS_BLOCK_RETRY_SECONDS = 300
+SETTINGS_BLOCK_RETRY_MAX_SECONDS = 6 * 3600
+
+# History backfill
+BACKFILL_MAX_CONCURRENT_DAYS = 3
+# Samples further apart than this are treated as missing data
+BACKFILL_MAX_SAMPLE_GAP_SECONDS = 900
+BACKFILL_STORAGE_VERSION = 1
+# Runs that retry hours which could not be anchored before they are given up
+BACKFILL_MAX_RETRIES = 3
+
+# Rolling statistics: how much runtime history the ring buffer keeps
+ROLLING_BUFFER_HOURS = 6
+
+# Integrated energy counters
+INTEGRATOR_STORAGE_VERSION = 1
+INTEGRATOR_SAVE_DELAY_SECONDS = 60
+# Samples further apart than this are not integrated, reconciliation fills in
+INTEGRATOR_MAX_GAP_SECONDS = 600
+# How far the counters may run ahead of / fall behind the portal totals
+INTEGRATOR_RECONCILE_TOLERANCE_KWH = 0.5
+
+# Battery fleet analytics
+ANALYTICS_STORAGE_VERSION = 1
+ANALYTICS_SAVE_DELAY_SECONDS = 300
+ANALYTICS_SOH_WINDOW_DAYS = 180
+# Days of SOH history needed before a trend is reported
+ANALYTICS_SOH_MIN_POINTS = 7
+# A module is an outlier if its deviation is this many stdevs from the rack
+ANALYTICS_OUTLIER_Z_SCORE = 2.0
+ANALYTICS_OUTLIER_MIN_DEVIATION_MV = 10
+
+# Portal connections (transport.py); keep-alive outlasts the poll interval
+# so the next poll reuses the connection instead of a new TLS handshake
+DATA_CONNECTOR_POOL = f"{DOMAIN}_connector_pool"
+TRANSPORT_LIMIT_PER_HOST = 8
+TRANSPORT_KEEPALIVE_SECONDS = 75
+TRANSPORT_DNS_CACHE_SECONDS = 300
+
+# Battery topology (topology.py)
+TOPOLOGY_STORAGE_VERSION = 1
+TOPOLOGY_SAVE_DELAY_SECONDS = 10
+# Sent with the entry id when a battery unit shows up that has no entities yet
+SIGNAL_BATTERIES_ADDED = f"{DOMAIN}_batteries_added_{{}}"
+
+# Local fan-out endpoints (views.py)
+FEED_QUEUE_SIZE = 4
+FEED_KEEPALIVE_SECONDS = 30
+
+# Poll recording / replay (replay.py)
+REPLAY_LOG_VERSION = 1
+RECORDER_FLUSH_LINES = 32
+
+# Performance metrics (metrics.py), latency histogram bucket bounds in seconds
+METRICS_LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# eg4_inverter.profile service (profiler.py)
+SERVICE_PROFILE = "profile"
+ATTR_CYCLES = "cycles"
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+PROFILE_DEFAULT_CYCLES = 5
+PROFILE_MAX_CYCLES = 100
+PROFILE_TOP_FUNCTIONS = 40
+
+# Debug tracing (tracing.py): JSON size of the sampled messages kept
+TRACE_BUFFER_BYTES = 256 * 1024
+
+# Headless collector (collector.py)
+COLLECTOR_MAX_CONCURRENT_POLLS = 8
+
+# Raw sample archive (archive.py): rows buffered before each write
+ARCHIVE_FLUSH_ROWS = 20
+
+# Deadband filtering (deadband.py): longest a filtered sensor stays silent
+DEADBAND_HEARTBEAT_SECONDS = 300
+
+# Inverter discovery in the config flow
+DISCOVERY_MAX_CONCURRENT_PROBES = 5
+DISCOVERY_PROBE_TIMEOUT_SECONDS = 10
+# hass.data key: logged-in API clients handed from the config flow to the new entry
+DATA_LOGGED_IN_APIS = f"{DOMAIN}_logged_in_apis"
+
+# Site aggregate entry (site.py)
+CONF_SITE = "site"
+DATA_SITE = f"{DOMAIN}_site"
+SIGNAL_SITE_MEMBERS_CHANGED = f"{DOMAIN}_site_members_changed"
+# Inverter updates arriving within this window are aggregated once
+SITE_DEBOUNCE_SECONDS = 2
+# An inverter whose runtime data is older than this many poll intervals is left out
+SITE_STALE_INTERVALS = 3
@@ -1,16 +1,34 @@
-import copy
+import asyncio
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
 
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.dispatcher import async_dispatcher_send
 from homeassistant.helpers.update_coordinator import (
     DataUpdateCoordinator,
     UpdateFailed,
 )
 from homeassistant.util import dt as dt_util
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
-from eg4_inverter_api import EG4InverterAPI
+from .archive import EG4ArchiveWriter, snapshot_row
+from .core import DATA_KINDS, POLLED_KINDS, EG4PollCore, derived_values
+from .registry import DEFINITIONS
+from .integrator import EnergyIntegrator
+from .analytics import BatteryFleetAnalytics
+from .events import EG4EventEmitter
+from .metrics import EG4Metrics
+from .tracing import EG4Tracer
+from .transport import (
+    PortalTransport,
+    RecordingTransport,
+    ReplayTransport,
+    async_get_connector_pool,
+)
+from .ringbuffer import RuntimeRingBuffer
+from .topology import BatteryTopology
 from .const import (
     DOMAIN,
     CONF_USERNAME,
@@ -20,13 +38,43 @@ from .const import (
     CONF_IGNORE_SSL,
     CONF_RUNTIME_INTERVAL_SECONDS,
     CONF_SETTINGS_INTERVAL_SECONDS,
+    CONF_ROLLING_WINDOWS,
+    CONF_ARCHIVE_DIR,
+    CONF_MAX_DATA_AGE_SECONDS,
+    CONF_TRACE_SAMPLE_EVERY,
+    CONF_DEADBAND_FILTERING,
+    CONF_RECORD_FILE,
+    CONF_REPLAY_FILE,
+    CONF_REPLAY_SPEED,
     DEFAULT_RUNTIME_INTERVAL_SECONDS,
     DEFAULT_SETTINGS_INTERVAL_SECONDS,
+    DEFAULT_ROLLING_WINDOWS,
+    DEFAULT_MAX_DATA_AGE_SECONDS,
+    DEFAULT_TRACE_SAMPLE_EVERY,
+    DEFAULT_DEADBAND_FILTERING,
+    ROLLING_BUFFER_HOURS,
+    DATA_LOGGED_IN_APIS,
+    SIGNAL_BATTERIES_ADDED,
 )
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def parse_rolling_windows(value) -> tuple[int, ...]:
+    """Parse the rolling windows option ("5,15,60") into sorted minutes."""
+    if isinstance(value, str):
+        value = value.split(",")
+    windows = set()
+    for item in value or ():
+        try:
+            minutes = int(str(item).strip())
+        except ValueError:
+            continue
+        if 0 < minutes <= ROLLING_BUFFER_HOURS * 60:
+            windows.add(minutes)
+    return tuple(sorted(windows))
+
+
 class EG4DataCoordinator(DataUpdateCoordinator):
     """Manages login and fetching data from EG4 Inverter API."""
 
@@ -34,145 +82,312 @@ class EG4DataCoordinator(DataUpdateCoordinator):
         """Initialize the coordinator with config entry data."""
         self.hass = hass
         self.entry = entry
-        session = async_get_clientsession(hass)
 
         username = entry.data[CONF_USERNAME]
         password = entry.data[CONF_PASSWORD]
         base_url = entry.data[CONF_BASE_URL]
         self.serial_number = entry.data.get(CONF_SERIAL_NUMBER, 30)
-        self.ignore_ssl = entry.data.get(CONF_IGNORE_SSL, False)
-
-        self.api = EG4InverterAPI(
-            username, password, base_url=base_url, session=session
+        # Shared by every entity of this entry
+        self.device_info = DeviceInfo(
+            identifiers={(DOMAIN, entry.entry_id)},
+            name="EG4 Inverter",
+            manufacturer="EG4",
         )
+        self.ignore_ssl = entry.data.get(CONF_IGNORE_SSL, False)
 
-        self._logged_in = False
         self._update_interval = timedelta(
             seconds=entry.data.get(
                 CONF_RUNTIME_INTERVAL_SECONDS, DEFAULT_RUNTIME_INTERVAL_SECONDS
             )
         )
+
+        logged_in = False
+        if entry.data.get(CONF_REPLAY_FILE):
+            speed = entry.data.get(CONF_REPLAY_SPEED, 1.0)
+            _LOGGER.warning(
+                "Replaying %s at %sx, the portal is not contacted",
+                entry.data[CONF_REPLAY_FILE],
+                speed,
+            )
+            transport = ReplayTransport(entry.data[CONF_REPLAY_FILE], speed)
+            if speed > 0:
+                self._update_interval = self._update_interval / speed
+        elif entry.data.get(CONF_RECORD_FILE):
+            _LOGGER.warning("Recording portal traffic to %s", entry.data[CONF_RECORD_FILE])
+            transport = RecordingTransport(
+                async_get_connector_pool(hass), entry.data[CONF_RECORD_FILE], self.ignore_ssl
+            )
+        else:
+            transport = PortalTransport(async_get_connector_pool(hass), self.ignore_ssl)
+            # The config flow that just created this entry leaves its client behind
+            # (keyed by its flow_id; the flow is still in progress during setup)
+            apis = hass.data.get(DATA_LOGGED_IN_APIS, {})
+            self.api = None
+            for flow in hass.config_entries.flow.async_progress_by_handler(
+                DOMAIN, match_context={"unique_id": entry.unique_id}
+            ):
+                self.api = apis.pop(flow["flow_id"], None) or self.api
+            logged_in = self.api is not None
+        if not logged_in:
+            self.api = transport.create_api(username, password, base_url)
+        self.metrics = EG4Metrics()
+        self.metrics.instrument(self.api)
+        self.tracer = EG4Tracer(
+            _LOGGER, entry.data.get(CONF_TRACE_SAMPLE_EVERY, DEFAULT_TRACE_SAMPLE_EVERY)
+        )
+        # Whether sensors apply their definitions' deadbands (deadband.py)
+        self.deadband_filtering = entry.data.get(
+            CONF_DEADBAND_FILTERING, DEFAULT_DEADBAND_FILTERING
+        )
         self._settings_interval = timedelta(
             seconds=entry.data.get(
                 CONF_SETTINGS_INTERVAL_SECONDS, DEFAULT_SETTINGS_INTERVAL_SECONDS
             )
         )
 
+        # Older data makes its entities unavailable, 0 never does
+        self.max_data_age = entry.data.get(
+            CONF_MAX_DATA_AGE_SECONDS, DEFAULT_MAX_DATA_AGE_SECONDS
+        )
+
         super().__init__(
             hass,
             _LOGGER,
             name="EG4DataCoordinator",
             update_interval=self._update_interval,
         )
-        self._last_settings_fetch = None
+        self.core = EG4PollCore(
+            self.api,
+            self.serial_number,
+            # Verification is set on the transport's connector, never at login
+            ignore_ssl=False,
+            settings_interval=self._settings_interval,
+            tracer=self.tracer,
+            logged_in=logged_in,
+        )
+
+        self.rolling_windows = parse_rolling_windows(
+            entry.data.get(CONF_ROLLING_WINDOWS, DEFAULT_ROLLING_WINDOWS)
+        )
+        self.runtime_history = RuntimeRingBuffer(
+            [d.key for d in DEFINITIONS.group("runtime") if d.rolling],
+            ROLLING_BUFFER_HOURS * 3600 / self._update_interval.total_seconds(),
+        )
+        self.energy_integrator = EnergyIntegrator(hass, entry, DEFINITIONS.group("integrated"))
+        self._integrated = {}
+        self.battery_analytics = BatteryFleetAnalytics(hass, entry)
+        self._battery_analytics = {}
+        # Known battery units, persisted; the per-battery entities are made from it
+        self.battery_topology = BatteryTopology(hass, entry)
+        # Units of the latest battery snapshot by batIndex
+        self._battery_units = {}
+        self.event_emitter = EG4EventEmitter(hass, entry.entry_id, self.serial_number)
+        archive_dir = entry.data.get(CONF_ARCHIVE_DIR)
+        self.archive = None
+        if archive_dir:
+            self.archive = EG4ArchiveWriter(hass.config.path(archive_dir), self.serial_number)
+            # One writer thread keeps appends in order and ahead of close
+            self._archive_executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="eg4_archive"
+            )
+            self._archive_pending = set()
+        # Set up by async_setup_entry, serves the local HTTP endpoints
+        self.feed = None
+        # Set by the profile service while it profiles this coordinator
+        self.profile_session = None
+        # Kinds served from the cache during the latest cycle
+        self.cached_kinds = frozenset()
+        self._shut_down = False
+
+    async def async_shutdown(self) -> None:
+        """Close the portal session, poll recording and archive when the entry unloads."""
+        if self._shut_down:
+            return
+        self._shut_down = True
+        await super().async_shutdown()
+        await self.api.close()
+        if self.archive is not None:
+            if self._archive_pending:
+                await asyncio.wait(set(self._archive_pending))
+            await self.hass.loop.run_in_executor(self._archive_executor, self.archive.close)
+            self._archive_executor.shutdown(wait=False)
 
-        self._cached_settings = None
-        self._cached_runtime = None
-        self._cached_energy = None
-        self._cached_battery = None
-        self._using_cache = False
+    @callback
+    def _async_archive(self, timestamp: float, row: dict) -> None:
+        future = self.hass.loop.run_in_executor(
+            self._archive_executor, self.archive.append, timestamp, row
+        )
+        self._archive_pending.add(future)
+        future.add_done_callback(self._archive_done)
+
+    @callback
+    def _archive_done(self, future) -> None:
+        self._archive_pending.discard(future)
+        if not future.cancelled() and future.exception() is not None:
+            _LOGGER.error(
+                "Writing the archive of %s failed: %s", self.serial_number, future.exception()
+            )
+
+    async def _async_setup(self):
+        """Restore persisted state before the first refresh."""
+        await self.energy_integrator.async_load()
+        await self.battery_analytics.async_load()
+        await self.battery_topology.async_load()
+
+    async def _async_refresh(self, *args, **kwargs) -> None:
+        """Refresh and notify listeners, under the profiler if one is attached."""
+        session = self.profile_session
+        if session is None or not session.start(self):
+            await super()._async_refresh(*args, **kwargs)
+            return
+        try:
+            await super()._async_refresh(*args, **kwargs)
+        finally:
+            session.stop(self)
 
     async def _async_update_data(self):
         """Fetch data from the EG4 Inverter API, called by HA every 'update_interval' seconds."""
-        # Perform login and inverter selection only once
-        if not self._logged_in:
-            await self._async_login_and_select_inverter()
-            self._logged_in = True
+        start = time.monotonic()
+        self.tracer.begin_cycle()
+        try:
+            data = await self._async_fetch_data()
+        except Exception:
+            self.metrics.end_cycle(time.monotonic() - start, failed=True)
+            raise
+        self.metrics.end_cycle(time.monotonic() - start)
+        data["metrics"] = self.metrics.summary()
+        return data
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Notify entities, timing the fan-out and counting state writes."""
+        writes = self.metrics.entity_writes
+        start = time.monotonic()
+        super().async_update_listeners()
+        self.metrics.listeners.add(time.monotonic() - start)
+        self.metrics.entity_writes_last = self.metrics.entity_writes - writes
 
-        self._using_cache = False
+    async def _async_fetch_data(self):
+        """One poll of runtime, battery and energy data plus due settings."""
         try:
-            _LOGGER.debug("Getting EG4 Data")
-            _LOGGER.debug("Getting Inverter Data")
-            inverter_info = self.api.get_selected_inverter()
-            _LOGGER.debug(f"Got Inverter Data: {inverter_info}")
-
-            _LOGGER.debug("Getting Runtime Data")
-            try:
-                runtime_data = await self.api.get_inverter_runtime_async()
-                if runtime_data != None:
-                    self._cached_runtime = copy.deepcopy(runtime_data)
-                else:
-                    self._using_cache = True               
-                    raise Exception("Use Cache")
-            except:
-                _LOGGER.debug(f"Using Cached runtime Data")
-                runtime_data = self._cached_runtime
-            _LOGGER.debug(f"Got Runtime Data: {runtime_data}")
-
-            _LOGGER.debug("Getting battery Data")
-            try:
-                battery_data = await self.api.get_inverter_battery_async()
-                if battery_data != None:
-                    self._cached_battery = copy.deepcopy(battery_data)
-                else:
-                    self._using_cache = True               
-                    raise Exception("Use Cache")
-            except:
-                _LOGGER.debug(f"Using Cached battery Data")
-                battery_data = self._cached_battery
-            
-            _LOGGER.debug(f"Got battery Data: {battery_data}")
-            _LOGGER.debug(f"Got battery Unit Data: {battery_data.battery_units}")
-
-            _LOGGER.debug("Getting energy Data")
-            try:
-                energy_data = await self.api.get_inverter_energy_async()
-                if energy_data != None:
-                    self._cached_energy = copy.deepcopy(energy_data)
-                else:
-                    self._using_cache = True               
-                    raise Exception("Use Cache")
-            except:
-                _LOGGER.debug(f"Using Cached energy Data")
-                energy_data = self._cached_energy
-            _LOGGER.debug(f"Got energy Data: {energy_data}")
-            if energy_data is None:
-                raise Exception
+            poll = await self.core.async_poll()
         except Exception as err:
             raise UpdateFailed(f"Error fetching runtime data: {err}") from err
+        for kind in POLLED_KINDS:
+            self.metrics.record_fetch(kind, kind not in poll["fresh"])
+        self.cached_kinds = frozenset(POLLED_KINDS) - poll["fresh"]
 
+        runtime_data = poll["runtime"]
+        battery_data = poll["battery"]
+        energy_data = poll["energy"]
         now = dt_util.utcnow()
-        need_settings = False
-
-        if (
-            self._last_settings_fetch is None
-            or (now - self._last_settings_fetch) >= self._settings_interval
-        ):
-            need_settings = True
-
-        if need_settings:
-            try:
-                settings_data = await self.api.read_settings_async()
-                self._cached_settings = copy.deepcopy(settings_data)
-                self._last_settings_fetch = now
-            except Exception as err:
-                _LOGGER.warning("Failed to update settings: %s", err)
+        # Only fresh samples are integrated, never the cached fallback
+        if "runtime" in poll["fresh"]:
+            self.runtime_history.append(now.timestamp(), runtime_data)
+            self._integrated = self.energy_integrator.update(
+                now.timestamp(), runtime_data, energy_data
+            )
+            if self.archive is not None:
+                self._async_archive(now.timestamp(), snapshot_row(poll))
+        battery_units = getattr(battery_data, "battery_units", None) or []
+        self._battery_units = {unit.batIndex: unit for unit in battery_units}
+        if "battery" in poll["fresh"]:
+            self._battery_analytics = self.battery_analytics.update(
+                now.timestamp(), battery_units
+            )
+            added = self.battery_topology.update(battery_units)
+            # Before the first refresh the platforms read the topology themselves
+            if added and self.data is not None:
+                async_dispatcher_send(
+                    self.hass, SIGNAL_BATTERIES_ADDED.format(self.entry.entry_id), added
+                )
 
-        else:
-            settings_data = self._cached_settings
+        try:
+            await self.core.async_refresh_settings(now)
+        except Exception as err:
+            _LOGGER.warning("Failed to update settings: %s", err)
+
+        self.event_emitter.async_process(runtime_data, battery_data)
 
         return {
-            "inverter": inverter_info,
+            "inverter": poll["inverter"],
             "runtime": runtime_data,
             "battery": battery_data,
             "energy": energy_data,
-            "settings": settings_data,
+            "settings": self.core.settings,
+            "rolling": self._rolling_stats(now),
+            "derived": derived_values(runtime_data),
+            "integrated": self._integrated,
+            "battery_analytics": self._battery_analytics,
+            "age": self._data_ages(),
         }
 
-    async def _async_login_and_select_inverter(self):
-        """Login to the EG4 API and set the inverter serial number."""
-        _LOGGER.debug("Logging into EG4 and setting inverter serial")
-        await self.api.login(ignore_ssl=self.ignore_ssl)
-        self.api.set_selected_inverter(serialNum=self.serial_number)
-        _LOGGER.debug(
-            "Successfully logged in and selected inverter %s", self.serial_number
-        )
+    def _data_ages(self) -> dict:
+        """Whole seconds since each kind last came from the portal."""
+        now = time.time()
+        ages = {}
+        for kind in self.core.fetched_at:
+            age = self.core.data_age(kind, now)
+            ages[kind] = None if age is None else int(age)
+        return ages
+
+    def battery_unit(self, index):
+        """The latest snapshot of battery unit ``index``, None if it did not report."""
+        return self._battery_units.get(index)
+
+    def data_age(self, kind: str) -> float | None:
+        """Seconds since the portal data behind snapshot key ``kind`` was fetched."""
+        return self.core.data_age(DATA_KINDS.get(kind, kind))
+
+    def is_stale(self, kind: str) -> bool:
+        """Whether the data behind snapshot key ``kind`` is past the maximum age.
+
+        Settings are re-read once per settings interval by design, so they
+        may be older by that much.
+        """
+        kind = DATA_KINDS.get(kind)
+        if kind is None or not self.max_data_age:
+            return False
+        age = self.core.data_age(kind)
+        if age is None:
+            return False
+        limit = self.max_data_age
+        if kind == "settings":
+            limit += self._settings_interval.total_seconds()
+        return age > limit
+
+    def _rolling_stats(self, now) -> dict:
+        """Rolling statistics per tracked key and window, e.g. "ppv1_15m"."""
+        timestamp = now.timestamp()
+        return {
+            f"{key}_{minutes}m": self.runtime_history.stats(key, minutes * 60, timestamp)
+            for key in self.runtime_history.keys
+            for minutes in self.rolling_windows
+        }
+
+    @property
+    def changed_settings(self) -> set:
+        """Setting keys whose value changed during the latest refresh."""
+        return self.core.changed_settings
+
+    def mark_settings_dirty(self, keys=None) -> None:
+        """Flag the blocks holding ``keys`` (or all blocks) for the next read."""
+        self.core.mark_settings_dirty(keys)
+
+    async def async_portal_request(self, endpoint: str, payload: str) -> dict:
+        """POST to a portal endpoint and return the raw response dict, see the core."""
+        return await self.core.async_portal_request(endpoint, payload)
+
+    async def force_refresh_settings(self, keys=None):
+        """Public method to immediately refresh settings (e.g., after a write).
 
-    async def force_refresh_settings(self):
-        """Public method to immediately refresh settings (e.g., after a write)."""
+        Pass the written ``keys`` to re-read only the blocks that hold them.
+        """
+        self.core.mark_settings_dirty(keys)
         try:
-            settings_data = await self.api.read_settings_async()
-            self._cached_settings = settings_data
-            self._last_settings_fetch = dt_util.utcnow()
+            await self.core.async_refresh_settings(dt_util.utcnow())
         except Exception as err:
             _LOGGER.error("Error force-refreshing settings: %s", err)
+        if self.data is not None:
+            self.data["settings"] = self.core.settings
+            self.async_update_listeners()
@@ -0,0 +1,338 @@
+"""Polling, caching and parsing of one inverter, without Home Assistant.
+
+EG4DataCoordinator runs this inside Home Assistant; collector.py runs many
+of them under a single event loop.
+"""
+
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+
+from eg4_inverter_api.constants import (
+    INVERTER_BATTERY_ENDPOINT,
+    INVERTER_ENERGY_ENDPOINT,
+    INVERTER_RUNTIME_ENDPOINT,
+)
+from eg4_inverter_api.exceptions import EG4APIError
+from eg4_inverter_api.models import InverterParameters
+
+from .const import (
+    DEFAULT_SETTINGS_INTERVAL_SECONDS,
+    SETTINGS_BLOCK_POINT_NUMBER,
+    SETTINGS_BLOCK_RETRY_MAX_SECONDS,
+    SETTINGS_BLOCK_RETRY_SECONDS,
+    SETTINGS_READ_ENDPOINT,
+    SETTINGS_REGISTER_BLOCKS,
+    SETTINGS_STALE_BLOCKS_PER_CYCLE,
+)
+from .registry import DEFINITIONS
+from .snapshot import BatterySnapshot, Snapshot
+from .tracing import EG4Tracer
+from .util import coerce_value, parse_float
+
+_LOGGER = logging.getLogger(__name__)
+
+# Keys in a remoteRead response that describe the request, not a setting
+SETTINGS_RESPONSE_META_KEYS = frozenset(
+    ("success", "valueFrame", "inverterSn", "startRegister", "pointNumber")
+)
+_MISSING = object()
+
+# Snapshot parts fetched every poll, in order
+POLLED_KINDS = ("runtime", "battery", "energy")
+# Portal endpoint of each and the snapshot.py view of its response
+POLL_ENDPOINTS = {
+    "runtime": (INVERTER_RUNTIME_ENDPOINT, Snapshot),
+    "battery": (INVERTER_BATTERY_ENDPOINT, BatterySnapshot),
+    "energy": (INVERTER_ENERGY_ENDPOINT, Snapshot),
+}
+# Portal data each snapshot part is computed from, for its data age
+DATA_KINDS = {
+    "runtime": "runtime",
+    "derived": "runtime",
+    "integrated": "runtime",
+    "rolling": "runtime",
+    "battery": "battery",
+    "battery_analytics": "battery",
+    "energy": "energy",
+    "settings": "settings",
+}
+
+
+def _read(data, key):
+    try:
+        return getattr(data, key)
+    except AttributeError:
+        return data.get(key) if isinstance(data, dict) else None
+
+
+def iter_numeric_values(data: dict, groups):
+    """Yield ``(group, key, battery_index, value)`` for every numeric value.
+
+    ``groups`` are snapshot keys with definitions in the registry.
+    Per-battery values come last with group "battery_unit"; battery_index
+    is None for everything else.
+    """
+    for group in groups:
+        source = data.get(group)
+        if source is None:
+            continue
+        for definition in DEFINITIONS.group(group, "sensor"):
+            value = parse_float(coerce_value(definition, _read(source, definition.key)))
+            if value is not None:
+                yield group, definition.key, None, value
+
+    per_battery = DEFINITIONS.group("battery_unit", "sensor")
+    for unit in getattr(data.get("battery"), "battery_units", None) or []:
+        index = getattr(unit, "batIndex", "")
+        for definition in per_battery:
+            value = parse_float(coerce_value(definition, getattr(unit, definition.key, None)))
+            if value is not None:
+                yield "battery_unit", definition.key, index, value
+
+
+def derived_values(runtime) -> dict:
+    """Compute every derived value from one parse of the inputs."""
+    values = {key: parse_float(getattr(runtime, key, None)) for key in DEFINITIONS.inputs("derived")}
+    return {d.key: d.calc(values) for d in DEFINITIONS.group("derived")}
+
+
+class EG4PollCore:
+    """Fetch runtime, battery, energy and settings data for one inverter.
+
+    Each poll falls back to the previous snapshot of a part the portal did
+    not return. Settings are read in holding-register blocks, spread over
+    successive polls (see ``_settings_blocks_due``).
+    """
+
+    def __init__(
+        self,
+        api,
+        serial_number,
+        ignore_ssl: bool = False,
+        settings_interval: timedelta = timedelta(seconds=DEFAULT_SETTINGS_INTERVAL_SECONDS),
+        tracer: EG4Tracer | None = None,
+        logged_in: bool = False,
+    ) -> None:
+        self.api = api
+        self.serial_number = serial_number
+        self.ignore_ssl = ignore_ssl
+        self.tracer = tracer or EG4Tracer(_LOGGER)
+        # True for an api that already holds a portal session, e.g. from setup
+        self._logged_in = logged_in
+        self._selected = False
+        self._cache = dict.fromkeys(POLLED_KINDS)
+        # Epoch time each kind (and "settings") last came from the portal
+        self.fetched_at = dict.fromkeys((*POLLED_KINDS, "settings"))
+
+        self._settings_interval = settings_interval
+        self.settings = None
+        self.last_settings_fetch = None
+        self._settings_block_fetched = {}
+        self._settings_block_keys = {}
+        self._dirty_settings_blocks = set()
+        # Block -> (consecutive failures, time it may be read again)
+        self._settings_block_retry = {}
+        # Block -> time of the latest read, successful or not
+        self._settings_block_attempted = {}
+        # Setting keys whose value changed during the latest settings refresh
+        self.changed_settings = set()
+
+    async def async_login(self) -> None:
+        """Login to the EG4 API, unless already logged in, and set the inverter serial number."""
+        _LOGGER.debug("Logging into EG4 and setting inverter serial")
+        if not self._logged_in:
+            await self.api.login(ignore_ssl=self.ignore_ssl)
+            self._logged_in = True
+        self.api.set_selected_inverter(serialNum=self.serial_number)
+        self._selected = True
+        _LOGGER.debug(
+            "Successfully logged in and selected inverter %s", self.serial_number
+        )
+
+    async def _async_fetch(self, kind: str):
+        """One part of the snapshot and whether it is fresh (not cached).
+
+        The response is wrapped, not turned into a model object, and never
+        modified afterwards, so the cache holds the same object.
+        """
+        trace = self.tracer.debug
+        trace("Getting %s Data", kind)
+        endpoint, view = POLL_ENDPOINTS[kind]
+        try:
+            response = await self.async_portal_request(
+                endpoint, f"serialNum={self.serial_number}"
+            )
+        except Exception as err:
+            trace("Fetching %s Data failed: %s", kind, err)
+            response = None
+        if not response or not response.get("success"):
+            trace("Using Cached %s Data", kind)
+            return self._cache[kind], False
+        data = self._cache[kind] = view(response)
+        self.fetched_at[kind] = time.time()
+        trace("Got %s Data: %s", kind, lambda: response)
+        return data, True
+
+    async def async_poll(self) -> dict:
+        """Poll the inverter once.
+
+        Returns the inverter, runtime, battery and energy parts plus
+        "fresh", the kinds that came from the portal rather than the cache.
+        Raises if there is no battery or energy data at all.
+        """
+        if not self._selected:
+            await self.async_login()
+
+        self.tracer.debug("Getting EG4 Data")
+        inverter = self.api.get_selected_inverter()
+        self.tracer.debug("Got Inverter Data: %s", inverter)
+
+        result = {"inverter": inverter, "fresh": set()}
+        for kind in POLLED_KINDS:
+            data, fresh = await self._async_fetch(kind)
+            result[kind] = data
+            if fresh:
+                result["fresh"].add(kind)
+
+        if result["battery"] is None:
+            raise EG4APIError("No battery data")
+        self.tracer.debug(
+            "Got battery Unit Data: %s", lambda: result["battery"].battery_units
+        )
+        if result["energy"] is None:
+            raise EG4APIError("No energy data")
+        return result
+
+    def data_age(self, kind: str, now: float | None = None) -> float | None:
+        """Seconds since ``kind`` last came from the portal, None if never."""
+        fetched_at = self.fetched_at.get(kind)
+        if fetched_at is None:
+            return None
+        return (time.time() if now is None else now) - fetched_at
+
+    # ---------------------------------------------------------------------
+    # Settings
+    # ---------------------------------------------------------------------
+    def _settings_blocks_due(self, now) -> list[int]:
+        """Return the register blocks to read this cycle.
+
+        Blocks marked as written are always re-read. Stale blocks are spread
+        over successive cycles, oldest first, so only the very first read pulls
+        the whole parameter set. Blocks that failed wait out their backoff and
+        then queue by the time of that failed read, so they cannot hold up
+        the others.
+        """
+        blocks = [
+            b
+            for b in SETTINGS_REGISTER_BLOCKS
+            if b not in self._settings_block_retry or self._settings_block_retry[b][1] <= now
+        ]
+        if self.settings is None:
+            return blocks
+
+        due = [b for b in blocks if b in self._dirty_settings_blocks]
+        stale = [
+            b
+            for b in blocks
+            if b not in self._dirty_settings_blocks
+            and (
+                b not in self._settings_block_fetched
+                or (now - self._settings_block_fetched[b]) >= self._settings_interval
+            )
+        ]
+        stale.sort(
+            key=lambda b: (
+                b in self._settings_block_attempted,
+                self._settings_block_attempted.get(b, now),
+            )
+        )
+        return due + stale[:SETTINGS_STALE_BLOCKS_PER_CYCLE]
+
+    def _settings_block_failed(self, start_register: int, now, err) -> None:
+        failures = self._settings_block_retry.get(start_register, (0, now))[0] + 1
+        delay = min(
+            SETTINGS_BLOCK_RETRY_SECONDS * 2 ** (failures - 1), SETTINGS_BLOCK_RETRY_MAX_SECONDS
+        )
+        self._settings_block_retry[start_register] = (failures, now + timedelta(seconds=delay))
+        _LOGGER.warning(
+            "%s: reading settings block %s failed (%s), retrying in %ss",
+            self.serial_number,
+            start_register,
+            err,
+            delay,
+        )
+
+    async def async_portal_request(self, endpoint: str, payload: str) -> dict:
+        """POST to a portal endpoint, bypassing the API client's model wrappers.
+
+        The response stays the decoded dict: polls wrap it in a Snapshot, and
+        the settings and history reads, which have no wrapper, use it as is.
+        ``_request`` is internal to the library, whose version is pinned in
+        manifest.json.
+        """
+        return await self.api._request(
+            "POST", f"{self.api._base_url}{endpoint}", payload
+        )
+
+    async def _async_read_settings_block(self, start_register: int) -> dict:
+        """Read one block of holding registers from the portal."""
+        payload = (
+            f"inverterSn={self.serial_number}&startRegister={start_register}"
+            f"&pointNumber={SETTINGS_BLOCK_POINT_NUMBER}&autoRetry=true"
+        )
+        response = await self.async_portal_request(SETTINGS_READ_ENDPOINT, payload)
+        if not response.get("success"):
+            raise EG4APIError(
+                f"Reading settings block {start_register} failed: {response.get('error')}"
+            )
+        return response
+
+    async def async_refresh_settings(self, now: datetime | None = None) -> None:
+        """Read the due blocks and merge them into ``settings``.
+
+        Only keys whose value differs from the cache are written, and they are
+        collected in ``changed_settings`` so setting entities can skip writes.
+        A block that fails is backed off and the remaining blocks still read.
+        """
+        now = now or datetime.now(timezone.utc)
+        self.changed_settings = set()
+        blocks = self._settings_blocks_due(now)
+        if not blocks:
+            return
+        settings = self.settings or InverterParameters()
+        for start_register in blocks:
+            self._settings_block_attempted[start_register] = now
+            try:
+                response = await self._async_read_settings_block(start_register)
+            except Exception as err:
+                self._settings_block_failed(start_register, now, err)
+                continue
+            keys = {k for k in response if k not in SETTINGS_RESPONSE_META_KEYS}
+            changed = {
+                k: response[k]
+                for k in keys
+                if getattr(settings, k, _MISSING) != response[k]
+            }
+            settings.from_dict(changed)
+            self.changed_settings.update(changed)
+
+            self._settings_block_keys[start_register] = keys
+            self._settings_block_fetched[start_register] = now
+            self._dirty_settings_blocks.discard(start_register)
+            self._settings_block_retry.pop(start_register, None)
+            self.settings = settings
+            self.last_settings_fetch = now
+            self.fetched_at["settings"] = now.timestamp()
+
+    def mark_settings_dirty(self, keys=None) -> None:
+        """Flag the blocks holding ``keys`` (or all blocks) for the next read."""
+        if keys is None:
+            self._dirty_settings_blocks.update(SETTINGS_REGISTER_BLOCKS)
+            return
+        keys = set(keys)
+        blocks = [b for b, known in self._settings_block_keys.items() if known & keys]
+        if len(blocks) == 0:
+            # Unknown key, we can't tell which block it lives in
+            blocks = SETTINGS_REGISTER_BLOCKS
+        self._dirty_settings_blocks.update(blocks)
@@ -0,0 +1,58 @@
+"""Significant-change filter for sensor state writes."""
+
+from .const import DEADBAND_HEARTBEAT_SECONDS
+from .util import parse_float
+
+
+class Deadband:
+    """Decide whether a new value differs enough from the last published one.
+
+    A value is significant when it moved by at least ``absolute`` (in the
+    sensor's unit) or ``relative`` percent of the last published value,
+    whichever is larger. Comparing against the last *published* value, not
+    the last seen one, means slow drift is still published once it adds up.
+    ``heartbeat`` seconds after the last publish, any value is significant.
+    """
+
+    __slots__ = ("absolute", "relative", "heartbeat", "_value", "_available", "_published_at")
+
+    def __init__(
+        self,
+        absolute: float = 0.0,
+        relative: float = 0.0,
+        heartbeat: float = DEADBAND_HEARTBEAT_SECONDS,
+    ) -> None:
+        self.absolute = absolute
+        self.relative = relative / 100
+        self.heartbeat = heartbeat
+        self._value = None
+        self._available = None
+        self._published_at = None
+
+    @classmethod
+    def from_definition(cls, definition) -> "Deadband | None":
+        """The deadband a registry.EntityDef asks for, None if it has none."""
+        if definition.deadband is None and definition.deadband_pct is None:
+            return None
+        return cls(
+            definition.deadband or 0.0,
+            definition.deadband_pct or 0.0,
+            definition.heartbeat,
+        )
+
+    def significant(self, value, available: bool, now: float) -> bool:
+        """Whether to publish ``value``; if so it becomes the reference."""
+        number = parse_float(value)
+        last = self._value
+        if (
+            available == self._available
+            and number is not None
+            and last is not None
+            and now - self._published_at < self.heartbeat
+            and abs(number - last) < max(self.absolute, self.relative * abs(last))
+        ):
+            return False
+        self._value = number
+        self._available = available
+        self._published_at = now
+        return True
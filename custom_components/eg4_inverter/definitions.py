@@ -1,23 +1,69 @@
 # definitions.py
 
-from homeassistant.const import (
-    PERCENTAGE,
-    UnitOfPower,
-    UnitOfElectricPotential,
-    UnitOfTemperature,
-    UnitOfEnergy,
-    UnitOfFrequency,
-    UnitOfTime,
-    UnitOfMass,
+try:
+    from homeassistant.const import (
+        PERCENTAGE,
+        EntityCategory,
+        UnitOfPower,
+        UnitOfElectricPotential,
+        UnitOfTemperature,
+        UnitOfEnergy,
+        UnitOfFrequency,
+        UnitOfTime,
+        UnitOfMass,
+    )
+
+    from homeassistant.components.sensor import SensorDeviceClass, SensorStateClass
+    from homeassistant.components.binary_sensor import BinarySensorDeviceClass
+except ImportError:
+    # Headless collector without Home Assistant installed
+    from .ha_compat import (
+        PERCENTAGE,
+        EntityCategory,
+        UnitOfPower,
+        UnitOfElectricPotential,
+        UnitOfTemperature,
+        UnitOfEnergy,
+        UnitOfFrequency,
+        UnitOfTime,
+        UnitOfMass,
+        SensorDeviceClass,
+        SensorStateClass,
+        BinarySensorDeviceClass,
+    )
+
+from .const import (
+    EVENT_BATTERY_NOTICE_CHANGED,
+    EVENT_GENERATOR_CHANGED,
+    EVENT_STATUS_CHANGED,
 )
 
-from homeassistant.components.sensor import SensorDeviceClass, SensorStateClass
-from homeassistant.components.binary_sensor import BinarySensorDeviceClass
+
+def _total(*values):
+    """Sum of the values that are present, None if none are."""
+    present = [v for v in values if v is not None]
+    return sum(present) if present else None
+
+
+def _difference(a, b):
+    if a is None or b is None:
+        return None
+    return a - b
+
+
+def _ratio_percent(part, whole):
+    """part/whole as a percentage clamped to 0..100, None when whole <= 0."""
+    if part is None or whole is None or whole <= 0:
+        return None
+    return round(min(max(part / whole, 0.0), 1.0) * 100, 1)
 
 # -------------------------------------------------------------------------
 # 1) ENERGY SENSORS
 #    Data from coordinator.data["energy"]
 #    Original fields in get_inverter_energy_async() sample
+#    "history_field" names the portal's intraday power series (W) that
+#    backfill.py integrates into hourly statistics; "history_sign" flips
+#    signed series (e.g. grid import vs export).
 # -------------------------------------------------------------------------
 ENERGY_SENSORS = [
     {
@@ -48,6 +94,7 @@ ENERGY_SENSORS = [
         "description": "Lifetime energy generated (kWh)",
         "device_class": SensorDeviceClass.ENERGY,
         "state_class": SensorStateClass.TOTAL,
+        "history_field": "solarPv",
     },
     {
         "type": "sensor",
@@ -68,6 +115,7 @@ ENERGY_SENSORS = [
         "description": "Lifetime battery discharge (kWh)",
         "device_class": SensorDeviceClass.ENERGY,
         "state_class": SensorStateClass.TOTAL,
+        "history_field": "batteryDischarging",
     },
     {
         "type": "sensor",
@@ -82,12 +130,14 @@ ENERGY_SENSORS = [
     {
         "type": "sensor",
         "key": "totalChargingText",
-        "name": "Battery Discharging Total",
+        "name": "Battery Charging Total",
         "unit": UnitOfEnergy.KILO_WATT_HOUR,
         "icon": "mdi:battery-charging",
         "description": "Lifetime battery charge (kWh)",
         "device_class": SensorDeviceClass.ENERGY,
         "state_class": SensorStateClass.TOTAL,
+        "history_field": "batteryDischarging",
+        "history_sign": -1,
     },
     {
         "type": "sensor",
@@ -108,6 +158,7 @@ ENERGY_SENSORS = [
         "description": "Lifetime energy consumed by the home (kWh)",
         "device_class": SensorDeviceClass.ENERGY,
         "state_class": SensorStateClass.TOTAL,
+        "history_field": "consumption",
     },
     {
         "type": "sensor",
@@ -128,6 +179,7 @@ ENERGY_SENSORS = [
         "description": "Lifetime energy imported from the grid (kWh)",
         "device_class": SensorDeviceClass.ENERGY,
         "state_class": SensorStateClass.TOTAL,
+        "history_field": "gridPower",
     },
     {
         "type": "sensor",
@@ -148,6 +200,8 @@ ENERGY_SENSORS = [
         "description": "Lifetime energy exported to the grid (kWh)",
         "device_class": SensorDeviceClass.ENERGY,
         "state_class": SensorStateClass.TOTAL,
+        "history_field": "gridPower",
+        "history_sign": -1,
     },
     {
         "type": "sensor",
@@ -174,6 +228,14 @@ ENERGY_SENSORS = [
 # 2) RUNTIME SENSORS
 #    Data from coordinator.data["runtime"]
 #    Original fields in get_inverter_runtime_async() sample
+#    "event" names the bus event fired when the raw value changes.
+#    "rolling": True keeps the field in the coordinator's ring buffer and
+#    adds a rolling statistics sensor per configured window.
+#    "deadband" (in the sensor's unit) and/or "deadband_pct" (of the last
+#    published value) skip state writes for smaller changes; "heartbeat"
+#    (seconds, default DEADBAND_HEARTBEAT_SECONDS) bounds the silence.
+#    Any sensor definition, derived and per-battery ones included, can set them.
+#    They only apply to entries with the deadband_filtering option turned on.
 # -------------------------------------------------------------------------
 RUNTIME_SENSORS = [
     {
@@ -190,6 +252,7 @@ RUNTIME_SENSORS = [
         "name": "Inverter Status Text",
         "unit": None,
         "icon": "mdi:information-outline",
+        "event": EVENT_STATUS_CHANGED,
     },
     {
         "type": "sensor",
@@ -213,6 +276,7 @@ RUNTIME_SENSORS = [
         "unit": UnitOfElectricPotential.VOLT,
         "scale": 0.01,  # if 2098 => 20.98, adjust if needed
         "icon": "mdi:solar-panel",
+        "deadband": 1,
     },
     {
         "type": "sensor",
@@ -221,6 +285,7 @@ RUNTIME_SENSORS = [
         "unit": UnitOfElectricPotential.VOLT,
         "scale": 0.01,
         "icon": "mdi:solar-panel",
+        "deadband": 1,
     },
     {
         "type": "sensor",
@@ -229,6 +294,7 @@ RUNTIME_SENSORS = [
         "unit": UnitOfElectricPotential.VOLT,
         "scale": 0.01,
         "icon": "mdi:solar-panel",
+        "deadband": 1,
     },
     {
         "type": "sensor",
@@ -236,6 +302,9 @@ RUNTIME_SENSORS = [
         "name": "PV1 Power",
         "unit": UnitOfPower.WATT,
         "icon": "mdi:flash",
+        "rolling": True,
+        "deadband": 10,
+        "deadband_pct": 2,
     },
     {
         "type": "sensor",
@@ -243,6 +312,9 @@ RUNTIME_SENSORS = [
         "name": "PV2 Power",
         "unit": UnitOfPower.WATT,
         "icon": "mdi:flash",
+        "rolling": True,
+        "deadband": 10,
+        "deadband_pct": 2,
     },
     {
         "type": "sensor",
@@ -250,6 +322,9 @@ RUNTIME_SENSORS = [
         "name": "PV3 Power",
         "unit": UnitOfPower.WATT,
         "icon": "mdi:flash",
+        "rolling": True,
+        "deadband": 10,
+        "deadband_pct": 2,
     },
     {
         "type": "sensor",
@@ -257,6 +332,7 @@ RUNTIME_SENSORS = [
         "name": "AC Voltage",
         "unit": UnitOfElectricPotential.VOLT,
         "scale": 0.1,
+        "deadband": 1,
     },
     {
         "type": "sensor",
@@ -264,6 +340,7 @@ RUNTIME_SENSORS = [
         "name": "EPS Voltage",
         "unit": UnitOfElectricPotential.VOLT,
         "scale": 0.1,
+        "deadband": 1,
     },
     {
         "type": "sensor",
@@ -271,6 +348,7 @@ RUNTIME_SENSORS = [
         "name": "AC Frequency",
         "unit": UnitOfFrequency.HERTZ,
         "scale": 0.01,
+        "deadband": 0.05,
     },
     {
         "type": "sensor",
@@ -278,6 +356,7 @@ RUNTIME_SENSORS = [
         "name": "EPS Frequency",
         "unit": UnitOfFrequency.HERTZ,
         "scale": 0.01,
+        "deadband": 0.05,
     },
     {
         "type": "sensor",
@@ -285,6 +364,9 @@ RUNTIME_SENSORS = [
         "name": "Power to Grid",
         "unit": UnitOfPower.WATT,
         "icon": "mdi:transmission-tower-export",
+        "rolling": True,
+        "deadband": 10,
+        "deadband_pct": 2,
     },
     {
         "type": "sensor",
@@ -292,6 +374,8 @@ RUNTIME_SENSORS = [
         "name": "Power to User Load",
         "unit": UnitOfPower.WATT,
         "icon": "mdi:home-import-outline",
+        "deadband": 10,
+        "deadband_pct": 2,
     },
     {
         "type": "sensor",
@@ -318,18 +402,23 @@ RUNTIME_SENSORS = [
         "name": "Battery Voltage (Raw)",
         "unit": UnitOfElectricPotential.VOLT,
         "scale": 0.1,  # 530 => 53.0
+        "deadband": 0.2,
     },
     {
         "type": "sensor",
         "key": "pCharge",
         "name": "Battery Charging Power",
         "unit": UnitOfPower.WATT,
+        "deadband": 10,
+        "deadband_pct": 2,
     },
     {
         "type": "sensor",
         "key": "pDisCharge",
         "name": "Battery Discharging Power",
         "unit": UnitOfPower.WATT,
+        "deadband": 10,
+        "deadband_pct": 2,
     },
     {
         "type": "sensor",
@@ -337,6 +426,9 @@ RUNTIME_SENSORS = [
         "name": "Battery Power (Net)",
         "unit": UnitOfPower.WATT,
         "description": "Negative => Discharging, Positive => Charging",
+        "rolling": True,
+        "deadband": 10,
+        "deadband_pct": 2,
     },
     {
         "type": "sensor",
@@ -355,12 +447,16 @@ RUNTIME_SENSORS = [
         "key": "acCouplePower",
         "name": "AC Coupled Power", # Micro-inverters are connected to the Inverter's Generator AC port
         "unit": UnitOfPower.WATT,
+        "deadband": 10,
+        "deadband_pct": 2,
     },
     {
         "type": "sensor",
         "key": "genPower",
         "name": "Generator Power",
         "unit": UnitOfPower.WATT,
+        "deadband": 10,
+        "deadband_pct": 2,
     },
     {
         "type": "sensor",
@@ -382,6 +478,9 @@ RUNTIME_SENSORS = [
         "name": "Consumption Power",
         "unit": UnitOfPower.WATT,
         "description": "Load consumption power if provided",
+        "rolling": True,
+        "deadband": 10,
+        "deadband_pct": 2,
     },
     {
         "type": "sensor",
@@ -396,12 +495,14 @@ RUNTIME_SENSORS = [
         "name": "Generator Dry Contact",
         "calc": lambda runtime: bool(runtime.genDryContact == "ON"),
         "device_class": BinarySensorDeviceClass.CONNECTIVITY,
+        "event": EVENT_GENERATOR_CHANGED,
     },
     {
         "type": "binary_sensor",
         "key": "_12KUsingGenerator",
         "name": "12K Generator State",
         "device_class": BinarySensorDeviceClass.CONNECTIVITY,
+        "event": EVENT_GENERATOR_CHANGED,
     },
     {
         "type": "binary_sensor",
@@ -418,6 +519,153 @@ RUNTIME_SENSORS = [
 ]
 
 
+# -------------------------------------------------------------------------
+# 2b) DERIVED POWER-FLOW SENSORS
+#    Data from coordinator.data["derived"], computed once per snapshot.
+#    The coordinator parses every "inputs" field of the runtime data once and
+#    passes them to each "calc" as a dict of floats (None when missing).
+# -------------------------------------------------------------------------
+DERIVED_SENSORS = [
+    {
+        "type": "sensor",
+        "key": "pvPower",
+        "name": "PV Power (Total)",
+        "unit": UnitOfPower.WATT,
+        "icon": "mdi:solar-power",
+        "device_class": SensorDeviceClass.POWER,
+        "state_class": SensorStateClass.MEASUREMENT,
+        "inputs": ("ppv1", "ppv2", "ppv3"),
+        "calc": lambda v: _total(v["ppv1"], v["ppv2"], v["ppv3"]),
+        "deadband": 10,
+        "deadband_pct": 2,
+    },
+    {
+        "type": "sensor",
+        "key": "gridNetPower",
+        "name": "Grid Power (Net)",
+        "unit": UnitOfPower.WATT,
+        "icon": "mdi:transmission-tower",
+        "device_class": SensorDeviceClass.POWER,
+        "state_class": SensorStateClass.MEASUREMENT,
+        "description": "Positive => Importing, Negative => Exporting",
+        "inputs": ("pToUser", "pToGrid"),
+        "calc": lambda v: _difference(v["pToUser"], v["pToGrid"]),
+        "deadband": 10,
+        "deadband_pct": 2,
+    },
+    {
+        "type": "sensor",
+        "key": "batteryNetPower",
+        "name": "Battery Flow (Net)",
+        "unit": UnitOfPower.WATT,
+        "icon": "mdi:battery-sync",
+        "device_class": SensorDeviceClass.POWER,
+        "state_class": SensorStateClass.MEASUREMENT,
+        "description": "Positive => Charging, Negative => Discharging",
+        "inputs": ("pCharge", "pDisCharge"),
+        "calc": lambda v: _difference(v["pCharge"], v["pDisCharge"]),
+        "deadband": 10,
+        "deadband_pct": 2,
+    },
+    {
+        "type": "sensor",
+        "key": "selfConsumptionRatio",
+        "name": "PV Self-Consumption Ratio",
+        "unit": PERCENTAGE,
+        "icon": "mdi:home-lightning-bolt",
+        "state_class": SensorStateClass.MEASUREMENT,
+        "description": "Share of PV power not exported to the grid",
+        "inputs": ("ppv1", "ppv2", "ppv3", "pToGrid"),
+        "calc": lambda v: _ratio_percent(
+            _difference(_total(v["ppv1"], v["ppv2"], v["ppv3"]), v["pToGrid"]),
+            _total(v["ppv1"], v["ppv2"], v["ppv3"]),
+        ),
+    },
+]
+
+
+# -------------------------------------------------------------------------
+# 2c) INTEGRATED ENERGY SENSORS
+#    Data from coordinator.data["integrated"]. Runtime power "inputs" (W) are
+#    integrated with the trapezoid rule by integrator.EnergyIntegrator and kept
+#    close to the portal's lifetime "reconcile_key" total.
+# -------------------------------------------------------------------------
+INTEGRATED_ENERGY_SENSORS = [
+    {
+        "type": "sensor",
+        "key": "pvEnergy",
+        "name": "Solar Generation Total (Integrated)",
+        "unit": UnitOfEnergy.KILO_WATT_HOUR,
+        "icon": "mdi:solar-power",
+        "description": "Lifetime PV energy integrated from ppv1-3 (kWh)",
+        "device_class": SensorDeviceClass.ENERGY,
+        "state_class": SensorStateClass.TOTAL_INCREASING,
+        "inputs": ("ppv1", "ppv2", "ppv3"),
+        "reconcile_key": "totalYieldingText",
+    },
+    {
+        "type": "sensor",
+        "key": "chargeEnergy",
+        "name": "Battery Charging Total (Integrated)",
+        "unit": UnitOfEnergy.KILO_WATT_HOUR,
+        "icon": "mdi:battery-charging",
+        "description": "Lifetime battery charge integrated from pCharge (kWh)",
+        "device_class": SensorDeviceClass.ENERGY,
+        "state_class": SensorStateClass.TOTAL_INCREASING,
+        "inputs": ("pCharge",),
+        "reconcile_key": "totalChargingText",
+    },
+    {
+        "type": "sensor",
+        "key": "dischargeEnergy",
+        "name": "Battery Discharging Total (Integrated)",
+        "unit": UnitOfEnergy.KILO_WATT_HOUR,
+        "icon": "mdi:battery-heart",
+        "description": "Lifetime battery discharge integrated from pDisCharge (kWh)",
+        "device_class": SensorDeviceClass.ENERGY,
+        "state_class": SensorStateClass.TOTAL_INCREASING,
+        "inputs": ("pDisCharge",),
+        "reconcile_key": "totalDischargingText",
+    },
+    {
+        "type": "sensor",
+        "key": "importEnergy",
+        "name": "Imported from Grid Total (Integrated)",
+        "unit": UnitOfEnergy.KILO_WATT_HOUR,
+        "icon": "mdi:transmission-tower-import",
+        "description": "Lifetime grid import integrated from pToUser (kWh)",
+        "device_class": SensorDeviceClass.ENERGY,
+        "state_class": SensorStateClass.TOTAL_INCREASING,
+        "inputs": ("pToUser",),
+        "reconcile_key": "totalImportText",
+    },
+    {
+        "type": "sensor",
+        "key": "exportEnergy",
+        "name": "Exported to Grid Total (Integrated)",
+        "unit": UnitOfEnergy.KILO_WATT_HOUR,
+        "icon": "mdi:transmission-tower-export",
+        "description": "Lifetime grid export integrated from pToGrid (kWh)",
+        "device_class": SensorDeviceClass.ENERGY,
+        "state_class": SensorStateClass.TOTAL_INCREASING,
+        "inputs": ("pToGrid",),
+        "reconcile_key": "totalExportText",
+    },
+    {
+        "type": "sensor",
+        "key": "consumptionEnergy",
+        "name": "Energy Consumption Total (Integrated)",
+        "unit": UnitOfEnergy.KILO_WATT_HOUR,
+        "icon": "mdi:home-import-outline",
+        "description": "Lifetime consumption integrated from consumptionPower (kWh)",
+        "device_class": SensorDeviceClass.ENERGY,
+        "state_class": SensorStateClass.TOTAL_INCREASING,
+        "inputs": ("consumptionPower",),
+        "reconcile_key": "totalUsageText",
+    },
+]
+
+
 # -------------------------------------------------------------------------
 # 3) BATTERY SUMMARY SENSORS
 #    Data from coordinator.data["battery"] (the high-level summary),
@@ -463,6 +711,7 @@ BATTERY_SUMMARY_SENSORS = [
 
 
 # "per-battery" definitions that apply to multiple platforms
+# ("event" works as in RUNTIME_SENSORS, with the battery index in the payload)
 PER_BATTERY_DEFS = [
     {
         "type": "sensor",
@@ -482,12 +731,14 @@ PER_BATTERY_DEFS = [
         "name": "Battery {binfo.batIndex} Voltage",
         "unit": UnitOfElectricPotential.VOLT,
         "scale": 0.01,  # 5333 => 53.33 if needed
+        "deadband": 0.05,
     },
     {
         "type": "sensor",
         "key": "current",
         "name": "Battery {binfo.batIndex} Current",
         "unit": "A",  # negative => discharge
+        "deadband": 0.5,
     },
     {
         "type": "sensor",
@@ -540,6 +791,7 @@ PER_BATTERY_DEFS = [
         "key": "noticeInfo",
         "name": "Battery {binfo.batIndex} Notice Text",
         "unit": None,
+        "event": EVENT_BATTERY_NOTICE_CHANGED,
     },
     {
         "type": "binary_sensor",
@@ -550,12 +802,346 @@ PER_BATTERY_DEFS = [
     },
 ]
 
+# -------------------------------------------------------------------------
+# 4b) BATTERY ANALYTICS SENSORS
+#    Data from coordinator.data["battery_analytics"], computed once per
+#    battery snapshot by analytics.BatteryFleetAnalytics across all units.
+#    "attributes" lists other keys of that dict exposed as state attributes.
+# -------------------------------------------------------------------------
+BATTERY_ANALYTICS_SENSORS = [
+    {
+        "type": "sensor",
+        "key": "cellVoltageSpread",
+        "name": "Battery Rack Cell Voltage Spread",
+        "unit": UnitOfElectricPotential.VOLT,
+        "icon": "mdi:battery-alert-variant-outline",
+        "state_class": SensorStateClass.MEASUREMENT,
+        "description": "Highest cell voltage minus lowest cell voltage across all modules",
+    },
+    {
+        "type": "sensor",
+        "key": "cellTemperatureSpread",
+        "name": "Battery Rack Cell Temperature Spread",
+        "unit": UnitOfTemperature.CELSIUS,
+        "icon": "mdi:thermometer-lines",
+        "state_class": SensorStateClass.MEASUREMENT,
+        "description": "Highest cell temperature minus lowest cell temperature across all modules",
+    },
+    {
+        "type": "sensor",
+        "key": "worstModule",
+        "name": "Battery Rack Most Imbalanced Module",
+        "unit": None,
+        "icon": "mdi:battery-unknown",
+        "description": "batIndex of the module whose cell voltage deviates most from the rack mean",
+        "attributes": ("module_deviation_mv", "outliers"),
+    },
+    {
+        "type": "sensor",
+        "key": "sohMean",
+        "name": "Battery Rack SoH",
+        "unit": PERCENTAGE,
+        "state_class": SensorStateClass.MEASUREMENT,
+    },
+    {
+        "type": "sensor",
+        "key": "sohTrend",
+        "name": "Battery Rack SoH Trend",
+        "unit": "%/30d",
+        "icon": "mdi:chart-line",
+        "description": "Least-squares SoH slope over the persisted daily history",
+        "attributes": ("soh_history_days",),
+    },
+]
+
+# -------------------------------------------------------------------------
+# 4c) PERFORMANCE DIAGNOSTIC SENSORS
+#    Data from coordinator.data["metrics"], a summary of metrics.EG4Metrics
+#    as of the end of the previous cycle. Disabled by default, the full
+#    histograms are in the diagnostics download.
+# -------------------------------------------------------------------------
+METRICS_SENSORS = [
+    {
+        "type": "sensor",
+        "key": "cycleDuration",
+        "name": "Update Cycle Duration",
+        "unit": UnitOfTime.MILLISECONDS,
+        "icon": "mdi:timer-outline",
+        "state_class": SensorStateClass.MEASUREMENT,
+        "entity_category": EntityCategory.DIAGNOSTIC,
+        "enabled_default": False,
+    },
+    {
+        "type": "sensor",
+        "key": "portalTime",
+        "name": "Portal Time per Cycle",
+        "unit": UnitOfTime.MILLISECONDS,
+        "icon": "mdi:cloud-clock-outline",
+        "state_class": SensorStateClass.MEASUREMENT,
+        "entity_category": EntityCategory.DIAGNOSTIC,
+        "enabled_default": False,
+        "description": "Sum of portal request latencies during the last cycle",
+    },
+    {
+        "type": "sensor",
+        "key": "listenerDuration",
+        "name": "Entity Update Duration",
+        "unit": UnitOfTime.MILLISECONDS,
+        "icon": "mdi:timer-cog-outline",
+        "state_class": SensorStateClass.MEASUREMENT,
+        "entity_category": EntityCategory.DIAGNOSTIC,
+        "enabled_default": False,
+    },
+    {
+        "type": "sensor",
+        "key": "entityWrites",
+        "name": "State Writes per Cycle",
+        "unit": None,
+        "icon": "mdi:database-edit-outline",
+        "state_class": SensorStateClass.MEASUREMENT,
+        "entity_category": EntityCategory.DIAGNOSTIC,
+        "enabled_default": False,
+    },
+    {
+        "type": "sensor",
+        "key": "portalErrors",
+        "name": "Portal Errors",
+        "unit": None,
+        "icon": "mdi:cloud-alert",
+        "state_class": SensorStateClass.TOTAL_INCREASING,
+        "entity_category": EntityCategory.DIAGNOSTIC,
+        "enabled_default": False,
+        "description": "Failed and timed out portal requests since startup",
+    },
+    {
+        "type": "sensor",
+        "key": "cacheFallbackRate",
+        "name": "Cache Fallback Rate",
+        "unit": PERCENTAGE,
+        "icon": "mdi:cached",
+        "state_class": SensorStateClass.MEASUREMENT,
+        "entity_category": EntityCategory.DIAGNOSTIC,
+        "enabled_default": False,
+        "description": "Share of fetches answered from the previous snapshot",
+    },
+]
+
+# -------------------------------------------------------------------------
+# 4d) SITE AGGREGATE SENSORS
+#    Data from site.EG4SiteCoordinator, one pass over the snapshots of every
+#    configured inverter. "source" is the (data key, field) summed across
+#    inverters, "weight" makes it a mean weighted by another field.
+#    Inverters that failed or fell behind are left out of power and SoC;
+#    "complete": True values (daily energy) are None until all are current,
+#    so a missing inverter never looks like a meter reset.
+# -------------------------------------------------------------------------
+SITE_SENSORS = [
+    {
+        "type": "sensor",
+        "key": "pvPower",
+        "name": "Site PV Power",
+        "unit": UnitOfPower.WATT,
+        "icon": "mdi:solar-power",
+        "device_class": SensorDeviceClass.POWER,
+        "state_class": SensorStateClass.MEASUREMENT,
+        "source": ("derived", "pvPower"),
+        "deadband": 10,
+        "deadband_pct": 2,
+    },
+    {
+        "type": "sensor",
+        "key": "consumptionPower",
+        "name": "Site Consumption Power",
+        "unit": UnitOfPower.WATT,
+        "icon": "mdi:home-lightning-bolt",
+        "device_class": SensorDeviceClass.POWER,
+        "state_class": SensorStateClass.MEASUREMENT,
+        "source": ("runtime", "consumptionPower"),
+        "deadband": 10,
+        "deadband_pct": 2,
+    },
+    {
+        "type": "sensor",
+        "key": "gridImportPower",
+        "name": "Site Grid Import Power",
+        "unit": UnitOfPower.WATT,
+        "icon": "mdi:transmission-tower-import",
+        "device_class": SensorDeviceClass.POWER,
+        "state_class": SensorStateClass.MEASUREMENT,
+        "source": ("runtime", "pToUser"),
+        "deadband": 10,
+        "deadband_pct": 2,
+    },
+    {
+        "type": "sensor",
+        "key": "gridExportPower",
+        "name": "Site Grid Export Power",
+        "unit": UnitOfPower.WATT,
+        "icon": "mdi:transmission-tower-export",
+        "device_class": SensorDeviceClass.POWER,
+        "state_class": SensorStateClass.MEASUREMENT,
+        "source": ("runtime", "pToGrid"),
+        "deadband": 10,
+        "deadband_pct": 2,
+    },
+    {
+        "type": "sensor",
+        "key": "batteryNetPower",
+        "name": "Site Battery Flow (Net)",
+        "unit": UnitOfPower.WATT,
+        "icon": "mdi:battery-sync",
+        "device_class": SensorDeviceClass.POWER,
+        "state_class": SensorStateClass.MEASUREMENT,
+        "source": ("derived", "batteryNetPower"),
+        "deadband": 10,
+        "deadband_pct": 2,
+    },
+    {
+        "type": "sensor",
+        "key": "soc",
+        "name": "Site Battery State of Charge",
+        "unit": PERCENTAGE,
+        "device_class": SensorDeviceClass.BATTERY,
+        "state_class": SensorStateClass.MEASUREMENT,
+        "description": "SoC of every inverter weighted by its battery capacity",
+        "source": ("runtime", "soc"),
+        "weight": ("runtime", "batCapacity"),
+    },
+    {
+        "type": "sensor",
+        "key": "todayYielding",
+        "name": "Site Solar Generation Today",
+        "unit": UnitOfEnergy.KILO_WATT_HOUR,
+        "icon": "mdi:solar-power",
+        "device_class": SensorDeviceClass.ENERGY,
+        "state_class": SensorStateClass.TOTAL_INCREASING,
+        "source": ("energy", "todayYieldingText"),
+        "complete": True,
+    },
+    {
+        "type": "sensor",
+        "key": "todayUsage",
+        "name": "Site Energy Consumption Today",
+        "unit": UnitOfEnergy.KILO_WATT_HOUR,
+        "icon": "mdi:home-import-outline",
+        "device_class": SensorDeviceClass.ENERGY,
+        "state_class": SensorStateClass.TOTAL_INCREASING,
+        "source": ("energy", "todayUsageText"),
+        "complete": True,
+    },
+    {
+        "type": "sensor",
+        "key": "todayImport",
+        "name": "Site Grid Import Today",
+        "unit": UnitOfEnergy.KILO_WATT_HOUR,
+        "icon": "mdi:transmission-tower-import",
+        "device_class": SensorDeviceClass.ENERGY,
+        "state_class": SensorStateClass.TOTAL_INCREASING,
+        "source": ("energy", "todayImportText"),
+        "complete": True,
+    },
+    {
+        "type": "sensor",
+        "key": "todayExport",
+        "name": "Site Grid Export Today",
+        "unit": UnitOfEnergy.KILO_WATT_HOUR,
+        "icon": "mdi:transmission-tower-export",
+        "device_class": SensorDeviceClass.ENERGY,
+        "state_class": SensorStateClass.TOTAL_INCREASING,
+        "source": ("energy", "todayExportText"),
+        "complete": True,
+    },
+    {
+        "type": "sensor",
+        "key": "todayCharging",
+        "name": "Site Battery Charging Today",
+        "unit": UnitOfEnergy.KILO_WATT_HOUR,
+        "icon": "mdi:battery-charging",
+        "device_class": SensorDeviceClass.ENERGY,
+        "state_class": SensorStateClass.TOTAL_INCREASING,
+        "source": ("energy", "todayChargingText"),
+        "complete": True,
+    },
+    {
+        "type": "sensor",
+        "key": "todayDischarging",
+        "name": "Site Battery Discharging Today",
+        "unit": UnitOfEnergy.KILO_WATT_HOUR,
+        "icon": "mdi:battery-heart",
+        "device_class": SensorDeviceClass.ENERGY,
+        "state_class": SensorStateClass.TOTAL_INCREASING,
+        "source": ("energy", "todayDischargingText"),
+        "complete": True,
+    },
+    {
+        "type": "sensor",
+        "key": "membersOnline",
+        "name": "Site Inverters Online",
+        "unit": None,
+        "icon": "mdi:lan-connect",
+        "state_class": SensorStateClass.MEASUREMENT,
+        "description": "Inverters whose data is current, the others are listed",
+        "attributes": ("members", "membersMissing"),
+    },
+]
+
+# -------------------------------------------------------------------------
+# 4e) DATA AGE SENSORS
+#    Data from coordinator.data["age"]: seconds since each part of the
+#    snapshot last came from the portal rather than the cache.
+# -------------------------------------------------------------------------
+DATA_AGE_SENSORS = [
+    {
+        "type": "sensor",
+        "key": "runtime",
+        "name": "Runtime Data Age",
+        "unit": UnitOfTime.SECONDS,
+        "icon": "mdi:clock-alert-outline",
+        "device_class": SensorDeviceClass.DURATION,
+        "state_class": SensorStateClass.MEASUREMENT,
+        "entity_category": EntityCategory.DIAGNOSTIC,
+        "enabled_default": True,
+    },
+    {
+        "type": "sensor",
+        "key": "battery",
+        "name": "Battery Data Age",
+        "unit": UnitOfTime.SECONDS,
+        "icon": "mdi:clock-alert-outline",
+        "device_class": SensorDeviceClass.DURATION,
+        "state_class": SensorStateClass.MEASUREMENT,
+        "entity_category": EntityCategory.DIAGNOSTIC,
+        "enabled_default": False,
+    },
+    {
+        "type": "sensor",
+        "key": "energy",
+        "name": "Energy Data Age",
+        "unit": UnitOfTime.SECONDS,
+        "icon": "mdi:clock-alert-outline",
+        "device_class": SensorDeviceClass.DURATION,
+        "state_class": SensorStateClass.MEASUREMENT,
+        "entity_category": EntityCategory.DIAGNOSTIC,
+        "enabled_default": False,
+    },
+    {
+        "type": "sensor",
+        "key": "settings",
+        "name": "Settings Data Age",
+        "unit": UnitOfTime.SECONDS,
+        "icon": "mdi:clock-alert-outline",
+        "device_class": SensorDeviceClass.DURATION,
+        "state_class": SensorStateClass.MEASUREMENT,
+        "entity_category": EntityCategory.DIAGNOSTIC,
+        "enabled_default": False,
+    },
+]
+
 SETTING_SENSORS = [
     {
         "type": "sensor",
         "key": "HOLD_EPS_FREQ_SET",
         "name": "EG4 EPS Frequency Setting",
-        "unit": None,
         "unit": UnitOfFrequency.HERTZ,
         "scale": 1,
     },
@@ -563,7 +1149,6 @@ SETTING_SENSORS = [
         "type": "sensor",
         "key": "HOLD_EPS_VOLT_SET",
         "name": "EG4 EPS Voltage Setting",
-        "unit": None,
         "unit": UnitOfElectricPotential.VOLT,
         "scale": 1,
     }
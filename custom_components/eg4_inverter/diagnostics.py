@@ -0,0 +1,51 @@
+"""Diagnostics download for an EG4 inverter config entry."""
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    DOMAIN,
+    CONF_PASSWORD,
+    CONF_RECORD_FILE,
+    CONF_REPLAY_FILE,
+    CONF_SERIAL_NUMBER,
+    CONF_USERNAME,
+)
+from .util import to_plain
+
+# Credentials, serial numbers and anything else that identifies the site
+TO_REDACT = {
+    CONF_USERNAME,
+    CONF_PASSWORD,
+    CONF_SERIAL_NUMBER,
+    CONF_RECORD_FILE,
+    CONF_REPLAY_FILE,
+    "serialNum",
+    "inverterSn",
+    "batterySn",
+    "batteryKey",
+    "plantId",
+    "plantName",
+    "title",
+    "unique_id",
+}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict:
+    """Return performance metrics and the latest snapshot, redacted."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "coordinator": {
+            "last_update_success": coordinator.last_update_success,
+            "update_interval_seconds": coordinator.update_interval.total_seconds()
+            if coordinator.update_interval
+            else None,
+        },
+        "metrics": coordinator.metrics.as_dict(),
+        "trace": async_redact_data(coordinator.tracer.as_list(), TO_REDACT),
+        "data": async_redact_data(to_plain(coordinator.data or {}), TO_REDACT),
+    }
@@ -0,0 +1,64 @@
+"""Fire bus events when tracked values actually change."""
+
+import logging
+
+from homeassistant.core import HomeAssistant
+
+from .registry import DEFINITIONS
+
+_LOGGER = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class EG4EventEmitter:
+    """Diff successive snapshots and fire one event per real transition.
+
+    Fields are the runtime and per-battery definitions with an "event".
+    The first snapshot only primes the state, and cached fallbacks repeat
+    the previous values, so neither fires anything.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str, serial_number) -> None:
+        self._hass = hass
+        self._entry_id = entry_id
+        self._serial_number = serial_number
+        self._runtime_fields = [(d.key, d.event) for d in DEFINITIONS.group("runtime") if d.event]
+        self._battery_fields = [(d.key, d.event) for d in DEFINITIONS.group("battery_unit") if d.event]
+        self._previous = {}
+
+    def _fire(self, event_type, key, old_value, new_value, **extra) -> None:
+        _LOGGER.debug("%s: %s %r -> %r", event_type, key, old_value, new_value)
+        self._hass.bus.async_fire(
+            event_type,
+            {
+                "entry_id": self._entry_id,
+                "serial_number": self._serial_number,
+                "key": key,
+                "old_value": old_value,
+                "new_value": new_value,
+                **extra,
+            },
+        )
+
+    def async_process(self, runtime, battery) -> None:
+        """Compare a snapshot with the previous one and fire transitions."""
+        current = {}
+        if runtime is not None:
+            for key, event_type in self._runtime_fields:
+                value = getattr(runtime, key, None)
+                current[(key, None)] = value
+                old = self._previous.get((key, None), _MISSING)
+                if old is not _MISSING and old != value:
+                    self._fire(event_type, key, old, value)
+
+        for unit in getattr(battery, "battery_units", None) or []:
+            index = getattr(unit, "batIndex", None)
+            for key, event_type in self._battery_fields:
+                value = getattr(unit, key, None)
+                current[(key, index)] = value
+                old = self._previous.get((key, index), _MISSING)
+                if old is not _MISSING and old != value:
+                    self._fire(event_type, key, old, value, battery_index=index)
+
+        self._previous = current
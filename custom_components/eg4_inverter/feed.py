@@ -0,0 +1,114 @@
+"""Serialize each coordinator update once for local consumers."""
+
+import asyncio
+import logging
+import re
+
+from homeassistant.core import callback
+from homeassistant.helpers.json import json_bytes
+
+from .const import FEED_QUEUE_SIZE
+from .core import iter_numeric_values
+from .util import to_plain
+
+_LOGGER = logging.getLogger(__name__)
+
+# Definition groups exported as Prometheus gauges, by coordinator.data key
+METRIC_GROUPS = (
+    "energy",
+    "runtime",
+    "battery",
+    "settings",
+    "derived",
+    "integrated",
+    "battery_analytics",
+    "metrics",
+)
+
+
+def _metric_name(group: str, key: str) -> str:
+    snake = re.sub(r"(?<=[a-z0-9])([A-Z])", r"_\1", key.lstrip("_")).lower()
+    return f"eg4_{group}_{re.sub(r'[^a-z0-9_]', '_', snake)}"
+
+
+def _label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def prometheus_lines(serial, data: dict) -> dict[str, list[str]]:
+    """Numeric values of one snapshot, grouped by metric name."""
+    metrics = {}
+    serial = _label(serial)
+    for group, key, battery, value in iter_numeric_values(data, METRIC_GROUPS):
+        if battery is None:
+            labels = f'{{serial="{serial}"}}'
+        else:
+            labels = f'{{serial="{serial}",battery="{_label(battery)}"}}'
+        metrics.setdefault(_metric_name(group, key), []).append(f"{labels} {value}")
+    return metrics
+
+
+class EG4Feed:
+    """Latest snapshot of one coordinator as JSON and Prometheus text.
+
+    Both forms are built at most once per coordinator update, however many
+    local consumers read them, and pushed to stream subscribers as they
+    arrive. Slow subscribers drop their oldest queued update.
+    """
+
+    def __init__(self, coordinator) -> None:
+        self._coordinator = coordinator
+        self._json = None
+        self._metrics = None
+        self._subscribers = set()
+        self._unsub = coordinator.async_add_listener(self._handle_update)
+
+    @callback
+    def _handle_update(self) -> None:
+        self._json = None
+        self._metrics = None
+        if not self._subscribers:
+            return
+        payload = self.json()
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(payload)
+
+    def json(self) -> bytes:
+        if self._json is None:
+            self._json = json_bytes(
+                {
+                    "serial_number": self._coordinator.serial_number,
+                    "last_update_success": self._coordinator.last_update_success,
+                    "data": to_plain(self._coordinator.data or {}),
+                }
+            )
+        return self._json
+
+    def metrics(self) -> dict[str, list[str]]:
+        if self._metrics is None:
+            self._metrics = prometheus_lines(
+                self._coordinator.serial_number, self._coordinator.data or {}
+            )
+        return self._metrics
+
+    @callback
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=FEED_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        return queue
+
+    @callback
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    @callback
+    def async_close(self) -> None:
+        """Stop listening and tell open streams to finish (None sentinel)."""
+        self._unsub()
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(None)
+        self._subscribers.clear()
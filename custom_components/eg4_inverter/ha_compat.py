@@ -0,0 +1,66 @@
+"""Home Assistant enums used by definitions.py, for running without HA.
+
+The headless collector (collector.py) imports the sensor definitions in
+environments where Home Assistant is not installed. These mirror the
+values of the Home Assistant enums they stand in for.
+"""
+
+from enum import StrEnum
+
+PERCENTAGE = "%"
+
+
+class EntityCategory(StrEnum):
+    CONFIG = "config"
+    DIAGNOSTIC = "diagnostic"
+
+
+class UnitOfElectricPotential(StrEnum):
+    MILLIVOLT = "mV"
+    VOLT = "V"
+
+
+class UnitOfEnergy(StrEnum):
+    WATT_HOUR = "Wh"
+    KILO_WATT_HOUR = "kWh"
+
+
+class UnitOfFrequency(StrEnum):
+    HERTZ = "Hz"
+
+
+class UnitOfMass(StrEnum):
+    KILOGRAMS = "kg"
+
+
+class UnitOfPower(StrEnum):
+    WATT = "W"
+    KILO_WATT = "kW"
+
+
+class UnitOfTemperature(StrEnum):
+    CELSIUS = "°C"
+
+
+class UnitOfTime(StrEnum):
+    MILLISECONDS = "ms"
+    SECONDS = "s"
+
+
+class SensorDeviceClass(StrEnum):
+    BATTERY = "battery"
+    DURATION = "duration"
+    ENERGY = "energy"
+    POWER = "power"
+
+
+class SensorStateClass(StrEnum):
+    MEASUREMENT = "measurement"
+    TOTAL = "total"
+    TOTAL_INCREASING = "total_increasing"
+
+
+class BinarySensorDeviceClass(StrEnum):
+    BATTERY_CHARGING = "battery_charging"
+    CONNECTIVITY = "connectivity"
+    TAMPER = "tamper"
@@ -0,0 +1,96 @@
+"""High-resolution energy counters integrated from runtime power."""
+
+import logging
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    DOMAIN,
+    INTEGRATOR_MAX_GAP_SECONDS,
+    INTEGRATOR_RECONCILE_TOLERANCE_KWH,
+    INTEGRATOR_SAVE_DELAY_SECONDS,
+    INTEGRATOR_STORAGE_VERSION,
+)
+from .util import parse_float
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class EnergyIntegrator:
+    """Trapezoidal integration of runtime power (W) into lifetime kWh.
+
+    Each counter in ``definitions`` sums its "inputs" runtime fields into a
+    power value per sample and integrates it over the actual time between
+    samples. Counters start at the portal's lifetime total and are kept
+    within a tolerance of it ("reconcile_key"): they are pulled up when they
+    fall behind (e.g. after an outage) and held while they run ahead, so
+    they never decrease. State is persisted in a Store.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, definitions) -> None:
+        self._definitions = list(definitions)
+        self._store = Store(
+            hass, INTEGRATOR_STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.energy"
+        )
+        self.totals = {}
+        self._last_sample = {}
+
+    async def async_load(self) -> None:
+        """Restore the counters and the last sample from storage."""
+        data = await self._store.async_load() or {}
+        self.totals = {
+            key: float(value) for key, value in data.get("totals", {}).items()
+        }
+        self._last_sample = {
+            key: tuple(value) for key, value in data.get("last_sample", {}).items()
+        }
+
+    def _data_to_save(self) -> dict:
+        return {
+            "totals": self.totals,
+            "last_sample": {key: list(value) for key, value in self._last_sample.items()},
+        }
+
+    @staticmethod
+    def _power(definition, runtime) -> float | None:
+        values = [parse_float(getattr(runtime, key, None)) for key in definition.inputs]
+        values = [v for v in values if v is not None]
+        if not values:
+            return None
+        return max(sum(values), 0.0)
+
+    def update(self, timestamp: float, runtime, energy) -> dict:
+        """Integrate one runtime sample taken at ``timestamp`` (epoch seconds)."""
+        for definition in self._definitions:
+            key = definition.key
+            power = self._power(definition, runtime)
+            portal = parse_float(getattr(energy, definition.reconcile_key, None))
+            total = self.totals.get(key)
+            if total is None:
+                total = portal
+
+            last = self._last_sample.get(key)
+            if power is not None:
+                self._last_sample[key] = (timestamp, power)
+            if total is None:
+                continue
+
+            if power is not None and last is not None:
+                seconds = timestamp - last[0]
+                if 0 < seconds <= INTEGRATOR_MAX_GAP_SECONDS:
+                    total += (last[1] + power) / 2 * seconds / 3_600_000
+
+            if portal is not None:
+                if total < portal - INTEGRATOR_RECONCILE_TOLERANCE_KWH:
+                    total = portal - INTEGRATOR_RECONCILE_TOLERANCE_KWH
+                elif total > portal + INTEGRATOR_RECONCILE_TOLERANCE_KWH:
+                    total = max(
+                        self.totals.get(key, 0.0),
+                        portal + INTEGRATOR_RECONCILE_TOLERANCE_KWH,
+                    )
+            self.totals[key] = total
+
+        self._store.async_delay_save(self._data_to_save, INTEGRATOR_SAVE_DELAY_SECONDS)
+        return {key: round(value, 4) for key, value in self.totals.items()}
@@ -0,0 +1,217 @@
+"""Performance metrics of one coordinator, for diagnostics and sensors."""
+
+import asyncio
+import bisect
+import logging
+import time
+
+from .const import METRICS_LATENCY_BUCKETS
+from .transport import response_size
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class LatencyHistogram:
+    """Fixed-bucket histogram of durations in seconds."""
+
+    def __init__(self, buckets=METRICS_LATENCY_BUCKETS) -> None:
+        self._bounds = tuple(buckets)
+        # One count per bound plus the overflow bucket
+        self._counts = [0] * (len(self._bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = None
+
+    def add(self, seconds: float) -> None:
+        self._counts[bisect.bisect_left(self._bounds, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q: float) -> float | None:
+        """Upper bound of the bucket holding the ``q`` quantile."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self._bounds, self._counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.max
+
+    def as_dict(self) -> dict:
+        buckets = {f"le_{bound}": count for bound, count in zip(self._bounds, self._counts)}
+        buckets["le_inf"] = self._counts[-1]
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 1) if self.count else None,
+            "p50_ms": _ms(self.quantile(0.5)),
+            "p95_ms": _ms(self.quantile(0.95)),
+            "max_ms": _ms(self.max) if self.count else None,
+            "last_ms": _ms(self.last),
+            "buckets": buckets,
+        }
+
+
+def _ms(seconds: float | None) -> float | None:
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+class EndpointMetrics:
+    """Latency, failures and response sizes of one portal endpoint."""
+
+    def __init__(self) -> None:
+        self.latency = LatencyHistogram()
+        self.errors = 0
+        self.timeouts = 0
+        self.bytes_total = 0
+        self.bytes_last = None
+        # Calls whose body size is known
+        self.sized = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "latency": self.latency.as_dict(),
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "bytes_last": self.bytes_last,
+            "bytes_mean": round(self.bytes_total / self.sized) if self.sized else None,
+        }
+
+
+class EG4Metrics:
+    """Counters and histograms describing how one coordinator performs.
+
+    Portal calls are timed per endpoint by wrapping the API's login and
+    request methods (``instrument``). The coordinator reports cycle and
+    listener durations and cache fallbacks, entities report their writes.
+    """
+
+    def __init__(self) -> None:
+        self.endpoints = {}
+        self.cycle = LatencyHistogram()
+        self.listeners = LatencyHistogram()
+        self.cycles_failed = 0
+        # Per data kind (runtime, battery, energy): fetches and cache fallbacks
+        self.fetches = {}
+        self.fallbacks = {}
+        self.entity_writes = 0
+        self.entity_writes_last = None
+        # Writes skipped by a deadband (deadband.py)
+        self.entity_writes_suppressed = 0
+        # Time spent waiting on the portal during the current / last cycle
+        self._cycle_portal = 0.0
+        self.portal_last = None
+        self._started = time.monotonic()
+
+    def _endpoint(self, name: str) -> EndpointMetrics:
+        metrics = self.endpoints.get(name)
+        if metrics is None:
+            metrics = self.endpoints[name] = EndpointMetrics()
+        return metrics
+
+    def record_call(self, name, seconds, size=None, error=None) -> None:
+        metrics = self._endpoint(name)
+        metrics.latency.add(seconds)
+        self._cycle_portal += seconds
+        if isinstance(error, (asyncio.TimeoutError, TimeoutError)):
+            metrics.timeouts += 1
+        elif error is not None:
+            metrics.errors += 1
+        if size is not None:
+            metrics.bytes_last = size
+            metrics.bytes_total += size
+            metrics.sized += 1
+
+    def instrument(self, api) -> None:
+        """Time every login and portal request made by ``api``.
+
+        Wraps the client's internal ``_request``; the library version is
+        pinned in manifest.json for that reason.
+        """
+        base_url = api._base_url
+        login = api.login
+        request = api._request
+
+        async def timed_login(*args, **kwargs):
+            start = time.monotonic()
+            try:
+                result = await login(*args, **kwargs)
+            except Exception as err:
+                self.record_call("login", time.monotonic() - start, error=err)
+                raise
+            self.record_call("login", time.monotonic() - start)
+            return result
+
+        async def timed_request(method, url, payload=None):
+            name = url[len(base_url):] if url.startswith(base_url) else url
+            # Set by the pooled transport's response class; replayed responses
+            # have no body and are not sized
+            response_size.set(None)
+            start = time.monotonic()
+            try:
+                response = await request(method, url, payload)
+            except Exception as err:
+                self.record_call(name, time.monotonic() - start, error=err)
+                raise
+            self.record_call(name, time.monotonic() - start, response_size.get())
+            return response
+
+        api.login = timed_login
+        api._request = timed_request
+
+    def end_cycle(self, seconds: float, failed: bool = False) -> None:
+        self.cycle.add(seconds)
+        if failed:
+            self.cycles_failed += 1
+        self.portal_last = self._cycle_portal
+        self._cycle_portal = 0.0
+
+    def record_fetch(self, kind: str, fallback: bool) -> None:
+        self.fetches[kind] = self.fetches.get(kind, 0) + 1
+        if fallback:
+            self.fallbacks[kind] = self.fallbacks.get(kind, 0) + 1
+
+    def record_entity_write(self) -> None:
+        self.entity_writes += 1
+
+    def record_entity_write_suppressed(self) -> None:
+        self.entity_writes_suppressed += 1
+
+    def cache_fallback_rate(self) -> float | None:
+        """Share of fetches answered from the cache, in percent."""
+        fetches = sum(self.fetches.values())
+        if not fetches:
+            return None
+        return round(sum(self.fallbacks.values()) / fetches * 100, 2)
+
+    def summary(self) -> dict:
+        """Small set of values exposed as diagnostic sensors."""
+        return {
+            "cycleDuration": _ms(self.cycle.last),
+            "portalTime": _ms(self.portal_last),
+            "listenerDuration": _ms(self.listeners.last),
+            "portalErrors": sum(m.errors + m.timeouts for m in self.endpoints.values()),
+            "cacheFallbackRate": self.cache_fallback_rate(),
+            "entityWrites": self.entity_writes_last,
+        }
+
+    def as_dict(self) -> dict:
+        """Everything, for the diagnostics download."""
+        return {
+            "uptime_seconds": round(time.monotonic() - self._started),
+            "cycle": self.cycle.as_dict(),
+            "cycles_failed": self.cycles_failed,
+            "listeners": self.listeners.as_dict(),
+            "endpoints": {name: m.as_dict() for name, m in sorted(self.endpoints.items())},
+            "fetches": dict(self.fetches),
+            "cache_fallbacks": dict(self.fallbacks),
+            "cache_fallback_rate": self.cache_fallback_rate(),
+            "entity_writes_total": self.entity_writes,
+            "entity_writes_last_cycle": self.entity_writes_last,
+            "entity_writes_suppressed_total": self.entity_writes_suppressed,
+        }
@@ -0,0 +1,89 @@
+"""cProfile around coordinator refreshes, for the profile service."""
+
+import asyncio
+import cProfile
+import io
+import logging
+import pstats
+import time
+
+from homeassistant.core import HomeAssistant
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class EG4ProfileSession:
+    """Profile the next ``cycles`` refreshes of each given coordinator.
+
+    One cProfile.Profile is shared by all coordinators (only one profiler
+    can be active per thread). It is enabled while at least one of them is
+    refreshing, which covers the fetch and the listener fan-out; other
+    event loop work that runs meanwhile is captured as well.
+    """
+
+    def __init__(self, hass: HomeAssistant, coordinators, cycles: int) -> None:
+        self._profile = cProfile.Profile()
+        self._remaining = {coordinator: cycles for coordinator in coordinators}
+        self._active = 0
+        self._done = hass.loop.create_future()
+        self.cycles = cycles
+        self.cycles_profiled = 0
+        self.profiled_seconds = 0.0
+        self._enabled_at = None
+
+    def start(self, coordinator) -> bool:
+        """Called when a refresh begins; False if it should not be profiled."""
+        if self._done.done() or self._remaining.get(coordinator, 0) <= 0:
+            return False
+        if self._active == 0:
+            self._enabled_at = time.perf_counter()
+            self._profile.enable()
+        self._active += 1
+        return True
+
+    def stop(self, coordinator) -> None:
+        """Called when a refresh started with start() has finished."""
+        self._active -= 1
+        if self._active == 0:
+            self._profile.disable()
+            self.profiled_seconds += time.perf_counter() - self._enabled_at
+        self._remaining[coordinator] -= 1
+        self.cycles_profiled += 1
+        if not self._done.done() and all(n <= 0 for n in self._remaining.values()):
+            self._done.set_result(None)
+
+    async def async_wait(self, timeout: float) -> bool:
+        """Wait for every coordinator to finish its cycles; False on timeout."""
+        try:
+            async with asyncio.timeout(timeout):
+                await asyncio.shield(self._done)
+        except TimeoutError:
+            return False
+        return True
+
+    def close(self) -> None:
+        """Stop profiling even if refreshes are still in flight."""
+        if self._active:
+            self._profile.disable()
+            self.profiled_seconds += time.perf_counter() - self._enabled_at
+            self._active = 0
+        if not self._done.done():
+            self._done.set_result(None)
+
+    def write(self, stats_path: str, summary_path: str, top: int) -> None:
+        """Dump the stats and a top-functions summary. Blocking."""
+        self._profile.dump_stats(stats_path)
+        out = io.StringIO()
+        out.write(
+            f"EG4 inverter profile: {self.cycles_profiled} refresh(es) of "
+            f"{len(self._remaining)} coordinator(s), "
+            f"{self.profiled_seconds:.3f}s profiled\n"
+            f"Stats file: {stats_path}\n\n"
+        )
+        stats = pstats.Stats(self._profile, stream=out)
+        stats.strip_dirs()
+        for sort in ("cumulative", "tottime"):
+            out.write(f"===== Top {top} by {sort} =====\n")
+            stats.sort_stats(sort).print_stats(top)
+        with open(summary_path, "w", encoding="utf-8") as summary:
+            summary.write(out.getvalue())
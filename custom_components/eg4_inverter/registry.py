@@ -0,0 +1,238 @@
+"""Typed registry of the entity definitions, built and validated on first use.
+
+definitions.py stays the place to add or edit entities; this module turns
+its dict lists into frozen EntityDef objects once, checks them, and indexes
+them by snapshot group and platform so nothing re-scans the lists later.
+definitions.py is only imported when the registry is first read, so modules
+that merely reference DEFINITIONS do not pay for the tables at import.
+"""
+
+from collections.abc import Callable
+from dataclasses import dataclass, fields
+
+from .const import DEADBAND_HEARTBEAT_SECONDS
+
+PLATFORMS = ("sensor", "binary_sensor")
+
+# Each coordinator.data key and the definitions.py list its values are
+# read with; "battery_unit" is every entry of data["battery"].battery_units.
+GROUP_SOURCES = (
+    ("energy", "ENERGY_SENSORS"),
+    ("runtime", "RUNTIME_SENSORS"),
+    ("derived", "DERIVED_SENSORS"),
+    ("integrated", "INTEGRATED_ENERGY_SENSORS"),
+    ("settings", "SETTING_SENSORS"),
+    ("battery", "BATTERY_SUMMARY_SENSORS"),
+    ("battery_analytics", "BATTERY_ANALYTICS_SENSORS"),
+    ("metrics", "METRICS_SENSORS"),
+    ("age", "DATA_AGE_SENSORS"),
+    ("battery_unit", "PER_BATTERY_DEFS"),
+    ("site", "SITE_SENSORS"),
+)
+
+# Units a device class may be measured in
+_DEVICE_CLASS_UNITS = {
+    "power": {"W", "kW"},
+    "energy": {"Wh", "kWh"},
+    "battery": {"%"},
+    "duration": {"ms", "s"},
+}
+# Groups whose "event" keys events.py watches
+_EVENT_GROUPS = ("runtime", "battery_unit")
+
+
+class DefinitionError(ValueError):
+    """definitions.py holds an invalid entity definition."""
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class EntityDef:
+    """One entity definition; the fields are the keys used in definitions.py."""
+
+    group: str
+    platform: str
+    key: str
+    name: str
+    unit: str | None = None
+    scale: float = 1.0
+    icon: str | None = None
+    device_class: str | None = None
+    state_class: str | None = None
+    entity_category: str | None = None
+    enabled_default: bool = True
+    description: str | None = None
+    # Sensors: value from a function instead of the raw field
+    calc: Callable | None = None
+    co2_parse: bool = False
+    # Significant-change filter, see deadband.py
+    deadband: float | None = None
+    deadband_pct: float | None = None
+    heartbeat: float = DEADBAND_HEARTBEAT_SECONDS
+    rolling: bool = False
+    event: str | None = None
+    attributes: tuple[str, ...] = ()
+    # Derived and integrated sensors: the runtime fields they are computed from
+    inputs: tuple[str, ...] = ()
+    reconcile_key: str | None = None
+    # History backfill of energy totals
+    history_field: str | None = None
+    history_sign: int = 1
+    # Site sensors: (group, key) summed across inverters, optional weight
+    source: tuple[str, str] | None = None
+    weight: tuple[str, str] | None = None
+    complete: bool = False
+
+    @property
+    def numeric(self) -> bool:
+        """Whether raw values are parsed as numbers."""
+        return bool(self.unit) or self.scale != 1.0
+
+
+_FIELDS = frozenset(f.name for f in fields(EntityDef)) - {"group", "platform"}
+
+
+def _build(group: str, raw: dict, problems: list[str]) -> EntityDef | None:
+    where = f"{group}.{raw.get('key', '?')}"
+    unknown = set(raw) - _FIELDS - {"type"}
+    if unknown:
+        problems.append(f"{where}: unknown keys {sorted(unknown)}")
+        return None
+    values = {k: v for k, v in raw.items() if k != "type"}
+    for key in ("inputs", "attributes"):
+        if key in values:
+            values[key] = tuple(values[key])
+    values.setdefault("name", raw.get("key"))
+    try:
+        return EntityDef(group=group, platform=raw.get("type"), **values)
+    except TypeError as err:
+        problems.append(f"{where}: {err}")
+        return None
+
+
+def _validate(definitions: list[EntityDef], problems: list[str]) -> None:
+    keys = set()
+    names = {}
+    for d in definitions:
+        where = f"{d.group}.{d.key}"
+        if d.platform not in PLATFORMS:
+            problems.append(f"{where}: type must be one of {PLATFORMS}, not {d.platform!r}")
+        if (d.group, d.key) in keys:
+            problems.append(f"{where}: duplicate key")
+        keys.add((d.group, d.key))
+
+        # Entity names must be unique on their device; per-battery entities
+        # are on the inverter's device too
+        device = "site" if d.group == "site" else "inverter"
+        if (device, d.name) in names:
+            problems.append(
+                f"{where}: name {d.name!r} already used by {names[device, d.name]}"
+            )
+        names[device, d.name] = where
+
+        if d.platform == "binary_sensor" and (d.unit or d.scale != 1.0):
+            problems.append(f"{where}: binary sensors have no unit or scale")
+        if d.scale != 1.0 and not d.unit:
+            problems.append(f"{where}: scaled values need a unit")
+        allowed = _DEVICE_CLASS_UNITS.get(d.device_class)
+        if allowed is not None and d.unit not in allowed:
+            problems.append(f"{where}: unit {d.unit!r} does not fit device class {d.device_class}")
+        if (d.deadband is not None or d.deadband_pct is not None) and not d.numeric:
+            problems.append(f"{where}: deadbands need a numeric value")
+        if d.rolling and not d.numeric:
+            problems.append(f"{where}: rolling statistics need a numeric value")
+        if d.event and d.group not in _EVENT_GROUPS:
+            problems.append(f"{where}: events are only watched in {_EVENT_GROUPS}")
+        if d.group == "derived" and (d.calc is None or not d.inputs):
+            problems.append(f"{where}: derived values need calc and inputs")
+        if d.group == "integrated" and (not d.inputs or d.reconcile_key is None):
+            problems.append(f"{where}: integrated values need inputs and reconcile_key")
+        if d.history_field and d.group != "energy":
+            problems.append(f"{where}: only energy totals are backfilled")
+
+    # Bindings to other definitions
+    for d in definitions:
+        where = f"{d.group}.{d.key}"
+        for binding in (d.source, d.weight):
+            if binding is not None and tuple(binding) not in keys:
+                problems.append(f"{where}: {binding} is not a defined value")
+        if d.reconcile_key is not None and ("energy", d.reconcile_key) not in keys:
+            problems.append(f"{where}: reconcile_key {d.reconcile_key!r} is not an energy value")
+
+
+class DefinitionRegistry:
+    """Every EntityDef, indexed by group and platform.
+
+    Built from ``sources``, (group, definition list) pairs, or from
+    GROUP_SOURCES on first access when none are given.
+    """
+
+    __slots__ = ("_sources", "_all", "_by_group", "_by_key", "_inputs")
+
+    def __init__(self, sources=None) -> None:
+        self._sources = sources
+        self._all = None
+
+    def load(self) -> "DefinitionRegistry":
+        """Build and validate the definitions now unless already done."""
+        if self._all is not None:
+            return self
+        sources = self._sources
+        if sources is None:
+            from . import definitions
+
+            sources = [(group, getattr(definitions, name)) for group, name in GROUP_SOURCES]
+
+        problems = []
+        built = [_build(group, raw, problems) for group, raws in sources for raw in raws]
+        definitions = [d for d in built if d is not None]
+        _validate(definitions, problems)
+        if problems:
+            raise DefinitionError(
+                "Invalid entity definitions:\n  " + "\n  ".join(problems)
+            )
+
+        self._by_group = {}
+        self._inputs = {}
+        for group, _ in sources:
+            members = tuple(d for d in definitions if d.group == group)
+            self._by_group[group, None] = members
+            for platform in PLATFORMS:
+                self._by_group[group, platform] = tuple(
+                    d for d in members if d.platform == platform
+                )
+            self._inputs[group] = tuple(sorted({key for d in members for key in d.inputs}))
+        self._by_key = {(d.group, d.key): d for d in definitions}
+        self._all = tuple(definitions)
+        return self
+
+    def __iter__(self):
+        return iter(self.load()._all)
+
+    def __len__(self) -> int:
+        return len(self.load()._all)
+
+    @property
+    def groups(self) -> tuple[str, ...]:
+        """Group names, in the order entities are created."""
+        return tuple(group for group, platform in self.load()._by_group if platform is None)
+
+    def group(self, group: str, platform: str | None = None) -> tuple[EntityDef, ...]:
+        """The definitions of ``group``, optionally only those of ``platform``."""
+        if self._all is None:
+            self.load()
+        return self._by_group[group, platform]
+
+    def get(self, group: str, key: str) -> EntityDef:
+        """The definition of ``key`` in ``group``."""
+        if self._all is None:
+            self.load()
+        return self._by_key[group, key]
+
+    def inputs(self, group: str) -> tuple[str, ...]:
+        """Runtime fields the definitions of ``group`` are computed from."""
+        if self._all is None:
+            self.load()
+        return self._inputs[group]
+
+
+DEFINITIONS = DefinitionRegistry()
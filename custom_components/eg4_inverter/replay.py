@@ -0,0 +1,203 @@
+"""Record portal traffic to disk and replay it without a network."""
+
+import asyncio
+import gzip
+import json
+import logging
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from eg4_inverter_api import EG4InverterAPI
+from eg4_inverter_api.exceptions import EG4APIError, EG4AuthError
+
+from .const import RECORDER_FLUSH_LINES, REPLAY_LOG_VERSION
+
+_LOGGER = logging.getLogger(__name__)
+
+# Inverter attributes that _extract_inverters() derives from the plant
+_PLANT_FIELDS = ("plantId", "plantName")
+
+
+def _login_response(inverters) -> dict:
+    """Rebuild a login response from the parsed inverter objects."""
+    plants = {}
+    for inverter in inverters:
+        plant = plants.setdefault(
+            inverter.plantId,
+            {"plantId": inverter.plantId, "name": inverter.plantName, "inverters": []},
+        )
+        plant["inverters"].append(
+            {
+                k: v
+                for k, v in vars(inverter).items()
+                if k not in _PLANT_FIELDS and not k.startswith("_main")
+            }
+        )
+    return {"success": True, "plants": list(plants.values())}
+
+
+class PollRecorder:
+    """Append portal exchanges to a gzip'd JSON-lines log.
+
+    The first line is a header; every other line is one exchange with its
+    offset from the start of the recording, the endpoint path, the request
+    payload, how long the portal took and its JSON response (or the error).
+    Lines are buffered and written on a single worker thread, in order.
+    """
+
+    def __init__(self, path: str, base_url: str) -> None:
+        self._path = path
+        self._base_url = base_url
+        self._started = time.monotonic()
+        self._buffer = []
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="eg4_recorder")
+        self._write(
+            [{"version": REPLAY_LOG_VERSION, "base_url": base_url, "recorded_at": time.time()}],
+            mode="wt",
+        )
+
+    def _write(self, entries, mode="at") -> None:
+        lines = "".join(json.dumps(e, separators=(",", ":")) + "\n" for e in entries)
+        self._executor.submit(self._write_lines, lines, mode)
+
+    def _write_lines(self, lines: str, mode: str) -> None:
+        with gzip.open(self._path, mode, encoding="utf-8") as log:
+            log.write(lines)
+
+    def add(self, kind, url, payload, elapsed, response=None, error=None) -> None:
+        path = url[len(self._base_url):] if url.startswith(self._base_url) else url
+        self._buffer.append(
+            {
+                "t": round(time.monotonic() - self._started, 3),
+                "kind": kind,
+                "path": path,
+                "payload": payload,
+                "elapsed": round(elapsed, 4),
+                "response": response,
+                "error": error,
+            }
+        )
+        if len(self._buffer) >= RECORDER_FLUSH_LINES:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._buffer:
+            self._write(self._buffer)
+            self._buffer = []
+
+    def close(self) -> None:
+        self.flush()
+        self._executor.shutdown(wait=False)
+
+
+class RecordingEG4InverterAPI(EG4InverterAPI):
+    """EG4InverterAPI that records every exchange with a PollRecorder."""
+
+    def __init__(self, *args, recorder: PollRecorder, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.recorder = recorder
+
+    async def login(self, ignore_ssl=False) -> None:
+        start = time.monotonic()
+        try:
+            await super().login(ignore_ssl=ignore_ssl)
+        except Exception as err:
+            self.recorder.add("login", self._login_url, None, time.monotonic() - start, error=repr(err))
+            raise
+        self.recorder.add(
+            "login",
+            self._login_url,
+            None,
+            time.monotonic() - start,
+            response=_login_response(self._inverters),
+        )
+
+    async def _request(self, method, url, payload=None):
+        start = time.monotonic()
+        try:
+            response = await super()._request(method, url, payload)
+        except Exception as err:
+            self.recorder.add("request", url, payload, time.monotonic() - start, error=repr(err))
+            raise
+        self.recorder.add("request", url, payload, time.monotonic() - start, response=response)
+        return response
+
+    async def close(self):
+        self.recorder.close()
+        await super().close()
+
+
+def load_log(path: str) -> tuple[dict, list[dict]]:
+    """Read a recording; returns the header and the exchanges. Blocking."""
+    with gzip.open(path, "rt", encoding="utf-8") as log:
+        lines = [json.loads(line) for line in log if line.strip()]
+    if not lines or lines[0].get("version") != REPLAY_LOG_VERSION:
+        raise ValueError(f"{path} is not an EG4 poll recording")
+    return lines[0], lines[1:]
+
+
+class ReplayEG4InverterAPI(EG4InverterAPI):
+    """EG4InverterAPI that answers from a recording instead of the portal.
+
+    Exchanges are matched by endpoint path and payload and handed out in
+    recorded order, looping when exhausted. Each one waits for the
+    recorded latency divided by ``speed`` so load tests see real traffic
+    shapes (``speed=0`` answers immediately). Recorded errors are raised
+    again as EG4APIError.
+    """
+
+    def __init__(self, *args, log_path: str, speed: float = 1.0, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._log_path = log_path
+        self._speed = speed
+        self._loaded = False
+        self._by_request = defaultdict(list)
+        self._by_path = defaultdict(list)
+        self._cursors = defaultdict(int)
+
+    async def _async_load(self) -> None:
+        _, entries = await asyncio.get_running_loop().run_in_executor(
+            None, load_log, self._log_path
+        )
+        for entry in entries:
+            self._by_request[(entry["kind"], entry["path"], entry["payload"])].append(entry)
+            self._by_path[(entry["kind"], entry["path"])].append(entry)
+        self._loaded = True
+
+    def _next(self, kind, url, payload) -> dict:
+        path = url[len(self._base_url):] if url.startswith(self._base_url) else url
+        key = (kind, path, payload)
+        candidates = self._by_request.get(key)
+        if not candidates:
+            key = (kind, path)
+            candidates = self._by_path.get(key)
+        if not candidates:
+            raise EG4APIError(f"Nothing recorded for {path}")
+        entry = candidates[self._cursors[key] % len(candidates)]
+        self._cursors[key] += 1
+        return entry
+
+    async def _replay(self, entry) -> dict:
+        if self._speed > 0:
+            await asyncio.sleep(entry["elapsed"] / self._speed)
+        if entry["error"] is not None:
+            raise EG4APIError(f"Replayed error: {entry['error']}")
+        return entry["response"]
+
+    async def login(self, ignore_ssl=False) -> None:
+        if not self._loaded:
+            await self._async_load()
+        self._ignore_ssl = ignore_ssl
+        entry = self._next("login", self._login_url, None)
+        try:
+            response = await self._replay(entry)
+        except EG4APIError as err:
+            raise EG4AuthError(str(err)) from err
+        self._inverters = self._extract_inverters(response)
+
+    async def _request(self, method, url, payload=None):
+        return await self._replay(self._next("request", url, payload))
+
+    async def close(self):
+        return None
@@ -0,0 +1,73 @@
+"""Fixed-size history of numeric runtime samples."""
+
+import math
+from array import array
+
+from .util import parse_float
+
+
+class RuntimeRingBuffer:
+    """Array-backed ring buffer holding the last ``capacity`` samples.
+
+    Every tracked key gets its own ``array('d')`` column next to a column of
+    sample timestamps, all preallocated, so memory use is exactly
+    ``capacity * (len(keys) + 1) * 8`` bytes no matter how long HA runs.
+    Missing values are stored as NaN and skipped by the statistics.
+    """
+
+    def __init__(self, keys, capacity: int) -> None:
+        self.keys = tuple(keys)
+        self.capacity = max(int(capacity), 1)
+        self._times = array("d", [0.0]) * self.capacity
+        self._columns = {key: array("d", [math.nan]) * self.capacity for key in self.keys}
+        self._next = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the sample arrays."""
+        return self._times.itemsize * self.capacity * (len(self.keys) + 1)
+
+    def append(self, timestamp: float, sample) -> None:
+        """Store one sample, reading each tracked key as an attribute."""
+        slot = self._next
+        self._times[slot] = timestamp
+        for key, column in self._columns.items():
+            value = parse_float(getattr(sample, key, None))
+            column[slot] = math.nan if value is None else value
+        self._next = (slot + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def window(self, key: str, seconds: float, now: float) -> list[float]:
+        """Return the values of ``key`` sampled within the last ``seconds``."""
+        column = self._columns[key]
+        cutoff = now - seconds
+        values = []
+        slot = self._next
+        for _ in range(self._size):
+            slot = (slot - 1) % self.capacity
+            if self._times[slot] < cutoff:
+                break
+            value = column[slot]
+            if not math.isnan(value):
+                values.append(value)
+        return values
+
+    def stats(self, key: str, seconds: float, now: float) -> dict | None:
+        """Min/max/mean/p95 of ``key`` over a window, None without samples."""
+        values = self.window(key, seconds, now)
+        if not values:
+            return None
+        values.sort()
+        # Nearest-rank percentile
+        p95 = values[max(math.ceil(0.95 * len(values)) - 1, 0)]
+        return {
+            "min": values[0],
+            "max": values[-1],
+            "mean": math.fsum(values) / len(values),
+            "p95": p95,
+            "samples": len(values),
+        }
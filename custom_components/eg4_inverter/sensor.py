@@ -1,48 +1,54 @@
+import functools
 import logging
+import time
 from typing import Any, Dict
 from homeassistant.components.sensor import (
-    SensorDeviceClass,
     SensorEntity,
+    SensorEntityDescription,
     SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.typing import DiscoveryInfoType
-
-from homeassistant.const import (
-    PERCENTAGE,
-    UnitOfPower,
-    UnitOfElectricPotential,
-    UnitOfTemperature,
-    UnitOfEnergy,
-    UnitOfFrequency,
-    UnitOfTime,
-    UnitOfMass,
-)
+
 from .coordinator import EG4DataCoordinator
-from .const import DOMAIN
-from .definitions import (
-    PER_BATTERY_DEFS,
-    BATTERY_SUMMARY_SENSORS,
-    ENERGY_SENSORS,
-    RUNTIME_SENSORS,
-    SETTING_SENSORS,
-)
+from .const import CONF_SITE, DATA_SITE, DOMAIN, SIGNAL_BATTERIES_ADDED
+from .core import DATA_KINDS
+from .deadband import Deadband
+from .registry import DEFINITIONS, EntityDef
+from .topology import BatteryInfo
+from .util import coerce_value
 
 _LOGGER = logging.getLogger(__name__)
 
+# Snapshot groups with one sensor per definition, in creation order
+INVERTER_GROUPS = (
+    "energy",
+    "runtime",
+    "derived",
+    "integrated",
+    "settings",
+    "battery",
+    "battery_analytics",
+    "metrics",
+    "age",
+)
 
-def parse_float(value: Any, scale: float = 1.0) -> float | None:
-    """Helper to convert strings/numbers to float, applying a scale if needed."""
-    try:
-        if isinstance(value, str):
-            value = value.strip()
-            if not value or value == "--":
-                return None
-        return float(value) * scale
-    except (ValueError, TypeError):
-        return None
+
+@functools.cache
+def sensor_description(definition: EntityDef) -> SensorEntityDescription:
+    """The entity description of a definition, shared by every entry."""
+    return SensorEntityDescription(
+        key=definition.key,
+        name=definition.name,
+        icon=definition.icon,
+        device_class=definition.device_class,
+        state_class=definition.state_class,
+        native_unit_of_measurement=definition.unit,
+        entity_category=definition.entity_category,
+        entity_registry_enabled_default=definition.enabled_default,
+    )
 
 
 # -------------------------------------------------------------------------
@@ -55,55 +61,52 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up EG4 inverter sensors from a config entry."""
-    coordinator: EG4DataCoordinator = hass.data[DOMAIN][entry.entry_id]
+    if entry.data.get(CONF_SITE):
+        site = hass.data[DATA_SITE]
+        async_add_entities(
+            EG4SiteSensor(site, entry, definition)
+            for definition in DEFINITIONS.group("site", "sensor")
+        )
+        return
 
-    entities = []
-
-    # 4.1) ENERGY SENSORS
-    for sensor_def in ENERGY_SENSORS:
-        if sensor_def.get("type", "") == "sensor":
-            entities.append(
-                EG4InverterSensor(coordinator, entry, sensor_def, parent_key="energy")
-            )
-
-    # 4.2) RUNTIME SENSORS
-    for sensor_def in RUNTIME_SENSORS:
-        if sensor_def.get("type", "") == "sensor":
-            entities.append(
-                EG4InverterSensor(coordinator, entry, sensor_def, parent_key="runtime")
-            )
-
-    # 4.3) SETTINGS SENSORS
-    for sensor_def in SETTING_SENSORS:
-        if sensor_def.get("type", "") == "sensor":
-            entities.append(
-                EG4InverterSensor(coordinator, entry, sensor_def, parent_key="settings")
-            )
-
-    # 4.4) BATTERY SUMMARY SENSORS
-    for sensor_def in BATTERY_SUMMARY_SENSORS:
-        if sensor_def.get("type", "") == "sensor":
-            entities.append(
-                EG4InverterSensor(coordinator, entry, sensor_def, parent_key="battery")
-            )
-
-    # 4.5) PER-BATTERY UNITS
-    #     If you want a sensor for each battery in battery_units, create them here:
-    battery_data = coordinator.data.get("battery", {})
-    battery_units = battery_data.battery_units or []
-    for binfo in battery_units:
-        for subdef in PER_BATTERY_DEFS:
-            subdef = subdef.copy()
-            if subdef["type"] != "sensor":
-                continue
-            name_template = subdef.get("name", "")
-            dynamic_name = name_template.format(binfo=binfo)
-            if name_template != dynamic_name:
-                subdef["name"] = dynamic_name
-            entities.append(EG4PerBatterySensor(coordinator, entry, binfo, subdef))
+    coordinator: EG4DataCoordinator = hass.data[DOMAIN][entry.entry_id]
 
+    # 4.1-4.4) One sensor per definition of each group read from the snapshot
+    entities = [
+        EG4InverterSensor(coordinator, entry, definition)
+        for group in INVERTER_GROUPS
+        for definition in DEFINITIONS.group(group, "sensor")
+    ]
+
+    # 4.5) ROLLING STATISTICS over the coordinator's runtime ring buffer
+    for definition in DEFINITIONS.group("runtime", "sensor"):
+        if not definition.rolling:
+            continue
+        for minutes in coordinator.rolling_windows:
+            entities.append(EG4RollingSensor(coordinator, entry, definition, minutes))
+
+    # 4.6) PER-BATTERY UNITS, from the persisted topology rather than the
+    #     first battery response; units that show up later are added then
+    def battery_sensors(units):
+        return [
+            EG4PerBatterySensor(coordinator, entry, binfo, definition)
+            for binfo in units
+            for definition in DEFINITIONS.group("battery_unit", "sensor")
+        ]
+
+    entities.extend(battery_sensors(coordinator.battery_topology.units))
     async_add_entities(entities)
 
+    @callback
+    def async_add_batteries(units) -> None:
+        async_add_entities(battery_sensors(units))
+
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, SIGNAL_BATTERIES_ADDED.format(entry.entry_id), async_add_batteries
+        )
+    )
+
 
 # -------------------------------------------------------------------------
 # 5) BASE SENSOR CLASSES
@@ -111,10 +114,19 @@ async def async_setup_entry(
 class EG4BaseSensor(SensorEntity):
     """Common base for EG4 sensors that integrates with the coordinator."""
 
+    # Changes every poll while the data is cached, keep it out of the recorder
+    _unrecorded_attributes = frozenset({"data_age"})
+
     def __init__(self, coordinator, entry):
         """Initialize the base sensor."""
         self._coordinator = coordinator
-        self._entry = entry
+        # One dict per device, shared by all of its entities
+        self._attr_device_info = coordinator.device_info
+        # Set from the definition's "deadband"/"deadband_pct"/"heartbeat"
+        # when the entry has deadband filtering on
+        self._deadband = None
+        # Snapshot key whose data age applies to this sensor, see core.DATA_KINDS
+        self._data_kind = None
 
     @property
     def should_poll(self) -> bool:
@@ -124,79 +136,115 @@ class EG4BaseSensor(SensorEntity):
     async def async_added_to_hass(self):
         """When entity is added to HA, subscribe to coordinator updates."""
         self.async_on_remove(
-            self._coordinator.async_add_listener(self.async_write_ha_state)
+            self._coordinator.async_add_listener(self._handle_coordinator_update)
         )
 
-    @property
-    def available(self) -> bool:
-        """Return true if coordinator was able to update successfully."""
-        return self._coordinator.last_update_success
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state, unless the deadband says the change is insignificant."""
+        if self._deadband is not None and not self._deadband.significant(
+            self.native_value, self.available, time.monotonic()
+        ):
+            self._coordinator.metrics.record_entity_write_suppressed()
+            return
+        self.async_write_ha_state()
+
+    @callback
+    def async_write_ha_state(self) -> None:
+        """Write state, counted in the coordinator's metrics."""
+        self._coordinator.metrics.record_entity_write()
+        super().async_write_ha_state()
 
     @property
-    def device_info(self):
-        """Put all sensors under one device in the UI."""
-        return {
-            "identifiers": {(DOMAIN, self._entry.entry_id)},
-            "name": "EG4 Inverter",
-            "manufacturer": "EG4",
-        }
+    def available(self) -> bool:
+        """Return true if the last update succeeded and the data is not too old."""
+        if not self._coordinator.last_update_success:
+            return False
+        return self._data_kind is None or not self._coordinator.is_stale(self._data_kind)
+
+    def _data_age_attributes(self) -> Dict[str, Any]:
+        """The data age, only while this sensor's data comes from the cache."""
+        if (
+            self._data_kind is None
+            or DATA_KINDS[self._data_kind] not in self._coordinator.cached_kinds
+        ):
+            return {}
+        age = self._coordinator.data_age(self._data_kind)
+        return {"data_age": None if age is None else int(age)}
 
 
 class EG4InverterSensor(EG4BaseSensor):
     """A sensor for a single data point in either energy, runtime, or battery summary."""
 
-    def __init__(self, coordinator, entry, sensor_def: Dict[str, Any], parent_key: str):
+    def __init__(self, coordinator, entry, definition: EntityDef):
         super().__init__(coordinator, entry)
-        self._sensor_def = sensor_def
-        self._parent_key = parent_key
+        self._definition = definition
+        self._parent_key = definition.group
+        self._data_kind = DATA_KINDS.get(definition.group)
 
         # Build a unique_id from the config entry + sensor key
-        self._attr_unique_id = f"{entry.entry_id}_{parent_key}_{sensor_def['key']}"
-        self._attr_name = sensor_def.get("name", sensor_def["key"])
+        self._attr_unique_id = f"{entry.entry_id}_{definition.group}_{definition.key}"
+        # Name, icon, unit and classes come from the shared description
+        self.entity_description = sensor_description(definition)
+        if coordinator.deadband_filtering:
+            self._deadband = Deadband.from_definition(definition)
+        self._last_available = None
 
-        # Optional icon or device_class
-        icon = sensor_def.get("icon")
-        if icon:
-            self._attr_icon = icon
-
-        self._attr_device_class = sensor_def.get("device_class")
-        self._attr_state_class = sensor_def.get("state_class")
+    async def async_added_to_hass(self):
+        """Settings sensors only listen for changes to their own key."""
+        if self._parent_key != "settings":
+            await super().async_added_to_hass()
+            return
+        self.async_on_remove(
+            self._coordinator.async_add_listener(self._handle_settings_update)
+        )
 
-        # Unit of measurement
-        self._unit = sensor_def.get("unit")
-        self._scale = sensor_def.get("scale", 1.0)
-        calc = sensor_def.get("calc")
-        if calc:
-            self._calc = calc
-
-    @property
-    def native_unit_of_measurement(self):
-        return self._unit
+    @callback
+    def _handle_settings_update(self) -> None:
+        """Write state only if this setting changed or availability flipped."""
+        available = self.available
+        if (
+            available == self._last_available
+            and self._definition.key not in self._coordinator.changed_settings
+        ):
+            return
+        self._last_available = available
+        self.async_write_ha_state()
 
     @property
     def native_value(self):
         data = self._coordinator.data.get(self._parent_key, {})
         try:
-            raw_value = getattr(data, self._sensor_def["key"])
+            raw_value = getattr(data, self._definition.key)
         except Exception as e:
             try:
-                raw_value = data.get(self._sensor_def["key"])
+                raw_value = data.get(self._definition.key)
             except Exception as e2:
-                _LOGGER.error(f"{self._sensor_def} with error {e2}")
-                _LOGGER.error(f"Data {vars(data)}")
+                _LOGGER.error(
+                    "Cannot read %s from %s data: %s",
+                    self._definition.key,
+                    self._parent_key,
+                    e2,
+                )
+                self._coordinator.tracer.debug(
+                    "%s data was: %s", self._parent_key, lambda: getattr(data, "__dict__", data)
+                )
                 return None
 
-        # Special case: parse CO2/Coal text like "367.69 kG"
-        if self._sensor_def.get("co2_parse"):
-            # Extract float portion
-            return parse_float(str(raw_value).split(" ")[0], 1.0)
+        return coerce_value(self._definition, raw_value)
+
+    @property
+    def extra_state_attributes(self):
+        """Expose the definition's "attributes" keys from the same data dict."""
+        keys = self._definition.attributes
+        if not keys:
+            return self._data_age_attributes() or None
+        data = self._coordinator.data.get(self._parent_key) or {}
+        return {key: data.get(key) for key in keys}
 
-        # Otherwise, try to parse as float if the sensor is numeric
-        if self._unit or self._scale != 1.0:
-            return parse_float(raw_value, self._scale)
 
-        # If it's truly a string (like "statusText"), just return it
-        return raw_value
+class EG4SiteSensor(EG4InverterSensor):
+    """A site total across all inverters, on the site coordinator's own device."""
 
 
 class EG4PerBatterySensor(EG4BaseSensor):
@@ -206,46 +254,83 @@ class EG4PerBatterySensor(EG4BaseSensor):
         self,
         coordinator,
         entry,
-        battery_info: Dict[str, Any],
-        sensor_def: Dict[str, Any],
+        battery_info: BatteryInfo,
+        definition: EntityDef,
     ):
         super().__init__(coordinator, entry)
-        self._sensor_def = sensor_def.copy()
+        # The module-level definition, not a copy; only the name is per battery
+        self._definition = definition
         self._bat_index = battery_info.batIndex
+        self._data_kind = "battery"
 
-        key = sensor_def["key"]
+        key = definition.key
         self._attr_unique_id = f"{entry.entry_id}_battery_{self._bat_index}_{key}"
-        self._attr_name = sensor_def.get("name", f"{self._bat_index} {key}")
-        self._unit = sensor_def.get("unit")
-        self._scale = sensor_def.get("scale", 1.0)
-        self._attr_device_class = sensor_def.get("device_class")
-        self._attr_state_class = sensor_def.get("state_class")
-        icon = sensor_def.get("icon")
-        if icon:
-            self._attr_icon = icon
-        calc = sensor_def.get("calc")
-        if calc:
-            self._calc = calc
+        self.entity_description = sensor_description(definition)
+        self._attr_name = definition.name.format(binfo=battery_info)
+        if coordinator.deadband_filtering:
+            self._deadband = Deadband.from_definition(definition)
 
     @property
-    def native_unit_of_measurement(self):
-        return self._unit
+    def available(self) -> bool:
+        """Unavailable while the unit is missing from the battery data."""
+        return super().available and self._coordinator.battery_unit(self._bat_index) is not None
 
     @property
     def native_value(self):
-        battery_data = self._coordinator.data.get("battery", {})
-        battery_units = getattr(battery_data, "battery_units", [])
-
-        # Lookup battery by index
-        target = next((b for b in battery_units if getattr(b, "batIndex", None) == self._bat_index), None)
+        target = self._coordinator.battery_unit(self._bat_index)
         if target is None:
             return None
 
         try:
-            raw_value = getattr(target, self._sensor_def["key"])
+            raw_value = getattr(target, self._definition.key)
         except Exception:
-            raw_value = target.get(self._sensor_def["key"])
+            raw_value = target.get(self._definition.key)
+
+        return coerce_value(self._definition, raw_value)
+
+    @property
+    def extra_state_attributes(self):
+        return self._data_age_attributes() or None
+
+
+class EG4RollingSensor(EG4BaseSensor):
+    """Rolling mean of a runtime value, with min/max/p95 as attributes."""
+
+    # Recomputed every poll, keep them out of the recorder
+    _unrecorded_attributes = frozenset(
+        {"min", "max", "p95", "samples", "window_minutes", "data_age"}
+    )
 
-        if self._unit or self._scale != 1.0:
-            return parse_float(raw_value, self._scale)
-        return raw_value
+    def __init__(self, coordinator, entry, definition: EntityDef, minutes: int):
+        super().__init__(coordinator, entry)
+        self._stats_key = f"{definition.key}_{minutes}m"
+        self._minutes = minutes
+        self._data_kind = "rolling"
+
+        self._attr_unique_id = f"{entry.entry_id}_rolling_{self._stats_key}"
+        self._attr_name = f"{definition.name} {minutes} min Mean"
+        self._attr_native_unit_of_measurement = definition.unit
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_icon = "mdi:chart-bell-curve-cumulative"
+
+    def _stats(self) -> Dict[str, Any] | None:
+        return self._coordinator.data.get("rolling", {}).get(self._stats_key)
+
+    @property
+    def native_value(self):
+        stats = self._stats()
+        if stats is None:
+            return None
+        return round(stats["mean"], 2)
+
+    @property
+    def extra_state_attributes(self):
+        stats = self._stats() or {}
+        return {
+            "min": stats.get("min"),
+            "max": stats.get("max"),
+            "p95": stats.get("p95"),
+            "samples": stats.get("samples", 0),
+            "window_minutes": self._minutes,
+            **self._data_age_attributes(),
+        }
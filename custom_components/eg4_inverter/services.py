@@ -0,0 +1,110 @@
+"""Services of the EG4 inverter integration."""
+
+import logging
+
+import voluptuous as vol
+
+from homeassistant.components import persistent_notification
+from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    ATTR_CONFIG_ENTRY_ID,
+    ATTR_CYCLES,
+    PROFILE_DEFAULT_CYCLES,
+    PROFILE_MAX_CYCLES,
+    PROFILE_TOP_FUNCTIONS,
+    SERVICE_PROFILE,
+)
+from .profiler import EG4ProfileSession
+
+_LOGGER = logging.getLogger(__name__)
+
+PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_CYCLES, default=PROFILE_DEFAULT_CYCLES): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=PROFILE_MAX_CYCLES)
+        ),
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+    }
+)
+
+
+async def _async_run_profile(
+    hass: HomeAssistant, session: EG4ProfileSession, coordinators
+) -> None:
+    cycles = session.cycles
+    stamp = dt_util.utcnow().strftime("%Y%m%dT%H%M%S")
+    notification_id = f"{DOMAIN}_profile_{stamp}"
+    persistent_notification.async_create(
+        hass,
+        f"Profiling the next {cycles} update cycle(s). This notification is "
+        "updated when the profile has been written.",
+        title="EG4 Inverter profile started",
+        notification_id=notification_id,
+    )
+    # Give every coordinator its cycles plus one interval of slack
+    timeout = max(
+        (c.update_interval.total_seconds() for c in coordinators if c.update_interval),
+        default=60,
+    ) * (cycles + 1) + 60
+
+    try:
+        if not await session.async_wait(timeout):
+            _LOGGER.warning(
+                "Profile timed out after %ss with %s refreshes, writing what was collected",
+                timeout,
+                session.cycles_profiled,
+            )
+    finally:
+        for coordinator in coordinators:
+            if coordinator.profile_session is session:
+                coordinator.profile_session = None
+        session.close()
+
+    stats_path = hass.config.path(f"{DOMAIN}_profile_{stamp}.prof")
+    summary_path = hass.config.path(f"{DOMAIN}_profile_{stamp}.txt")
+    await hass.async_add_executor_job(
+        session.write, stats_path, summary_path, PROFILE_TOP_FUNCTIONS
+    )
+    _LOGGER.info("Wrote EG4 profile to %s and %s", stats_path, summary_path)
+    persistent_notification.async_create(
+        hass,
+        f"Profiled {session.cycles_profiled} refresh(es). Wrote the cProfile "
+        f"stats to {stats_path} and a summary to {summary_path}.",
+        title="EG4 Inverter profile complete",
+        notification_id=notification_id,
+    )
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the integration's services."""
+
+    async def async_profile(call: ServiceCall) -> None:
+        coordinators = hass.data.get(DOMAIN, {})
+        entry_id = call.data.get(ATTR_CONFIG_ENTRY_ID)
+        if entry_id:
+            if entry_id not in coordinators:
+                raise HomeAssistantError(f"No loaded EG4 inverter entry {entry_id}")
+            selected = [coordinators[entry_id]]
+        else:
+            selected = list(coordinators.values())
+        if not selected:
+            raise HomeAssistantError("No EG4 inverter is loaded")
+        if any(c.profile_session is not None for c in selected):
+            raise HomeAssistantError("A profile is already running")
+
+        session = EG4ProfileSession(hass, selected, call.data[ATTR_CYCLES])
+        for coordinator in selected:
+            coordinator.profile_session = session
+        hass.async_create_background_task(
+            _async_run_profile(hass, session, selected),
+            f"{DOMAIN} profile",
+        )
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_PROFILE, async_profile, schema=PROFILE_SCHEMA
+    )
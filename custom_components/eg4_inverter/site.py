@@ -0,0 +1,170 @@
+"""Site totals across every configured inverter."""
+
+import logging
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+
+from .const import (
+    CONF_DEADBAND_FILTERING,
+    CONF_SITE,
+    DOMAIN,
+    SIGNAL_SITE_MEMBERS_CHANGED,
+    SITE_DEBOUNCE_SECONDS,
+    SITE_STALE_INTERVALS,
+)
+from .registry import DEFINITIONS
+from .metrics import EG4Metrics
+from .tracing import EG4Tracer
+from .util import coerce_value, parse_float
+
+_LOGGER = logging.getLogger(__name__)
+
+# Every (data key, field) read by the site sensors, in a fixed column order
+SITE_SOURCES = tuple(
+    sorted(
+        {
+            binding
+            for d in DEFINITIONS.group("site")
+            for binding in (d.source, d.weight)
+            if binding is not None
+        }
+    )
+)
+_COLUMN = {source: index for index, source in enumerate(SITE_SOURCES)}
+
+
+def _read(data: dict, source) -> float | None:
+    group, key = source
+    part = data.get(group)
+    if part is None:
+        return None
+    try:
+        raw = getattr(part, key)
+    except AttributeError:
+        raw = part.get(key) if isinstance(part, dict) else None
+    # Parsed the same way as the inverter's own sensor for that field
+    return parse_float(coerce_value(DEFINITIONS.get(group, key), raw))
+
+
+def aggregate_site(members) -> dict:
+    """Site values from ``(serial, data, current)`` per inverter.
+
+    Each current inverter's snapshot is read once into a row of
+    SITE_SOURCES; every site value is then reduced from its column.
+    """
+    rows = []
+    missing = []
+    for serial, data, current in members:
+        if not current or not data:
+            missing.append(serial)
+            continue
+        rows.append([_read(data, source) for source in SITE_SOURCES])
+    columns = list(zip(*rows)) if rows else [()] * len(SITE_SOURCES)
+
+    values = {}
+    for definition in DEFINITIONS.group("site"):
+        source = definition.source
+        if source is None:
+            continue
+        if definition.complete and missing:
+            values[definition.key] = None
+            continue
+        column = columns[_COLUMN[source]]
+        if definition.weight is not None:
+            pairs = [
+                (v, w)
+                for v, w in zip(column, columns[_COLUMN[definition.weight]])
+                if v is not None and w
+            ]
+            total = sum(w for _, w in pairs)
+            values[definition.key] = (
+                round(sum(v * w for v, w in pairs) / total, 1) if total else None
+            )
+        else:
+            present = [v for v in column if v is not None]
+            values[definition.key] = round(sum(present), 3) if present else None
+
+    values["membersOnline"] = len(rows)
+    values["members"] = len(rows) + len(missing)
+    values["membersMissing"] = missing
+    return values
+
+
+class EG4SiteCoordinator(DataUpdateCoordinator):
+    """Aggregates the inverter coordinators whenever they update.
+
+    It does not poll; updates of several inverters that arrive within
+    SITE_DEBOUNCE_SECONDS are aggregated once.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry) -> None:
+        super().__init__(hass, _LOGGER, name="EG4SiteCoordinator", update_interval=None)
+        self.entry = entry
+        self.device_info = DeviceInfo(
+            identifiers={(DOMAIN, entry.entry_id)},
+            name="EG4 Site",
+            manufacturer="EG4",
+        )
+        self.metrics = EG4Metrics()
+        self.tracer = EG4Tracer(_LOGGER)
+        # The site entry has no options; it filters if any inverter entry does
+        self.deadband_filtering = any(
+            other.data.get(CONF_DEADBAND_FILTERING)
+            for other in hass.config_entries.async_entries(DOMAIN)
+            if not other.data.get(CONF_SITE)
+        )
+        self._member_unsubs = []
+        self._debouncer = Debouncer(
+            hass,
+            _LOGGER,
+            cooldown=SITE_DEBOUNCE_SECONDS,
+            immediate=False,
+            function=self.async_aggregate,
+        )
+
+    @callback
+    def async_start(self) -> None:
+        """Follow the inverter coordinators as entries come and go."""
+        self.entry.async_on_unload(
+            async_dispatcher_connect(
+                self.hass, SIGNAL_SITE_MEMBERS_CHANGED, self._async_members_changed
+            )
+        )
+        self.entry.async_on_unload(self._async_stop)
+        self._async_members_changed()
+
+    @callback
+    def _async_stop(self) -> None:
+        for unsub in self._member_unsubs:
+            unsub()
+        self._member_unsubs = []
+        self._debouncer.async_cancel()
+
+    @callback
+    def _async_members_changed(self) -> None:
+        for unsub in self._member_unsubs:
+            unsub()
+        self._member_unsubs = [
+            coordinator.async_add_listener(self._debouncer.async_schedule_call)
+            for coordinator in self.hass.data.get(DOMAIN, {}).values()
+        ]
+        self._debouncer.async_schedule_call()
+
+    def _current(self, coordinator) -> bool:
+        age = coordinator.data_age("runtime")
+        if not coordinator.last_update_success or age is None:
+            return False
+        interval = coordinator.update_interval.total_seconds()
+        return age <= interval * SITE_STALE_INTERVALS
+
+    async def async_aggregate(self) -> None:
+        """Recompute the site values from the latest inverter snapshots."""
+        members = [
+            (c.serial_number, c.data, self._current(c))
+            for c in self.hass.data.get(DOMAIN, {}).values()
+        ]
+        self.async_set_updated_data({"site": aggregate_site(members)})
@@ -0,0 +1,61 @@
+"""Attribute access to portal responses without building model objects.
+
+The API client turns every response into a model object, copying each field
+into an attribute, and every battery unit into one more; core.py then had
+to deep-copy them all for its cache. A Snapshot keeps the decoded response
+dict and looks a field up only when it is read, with the attribute access
+sensor.py, binary_sensor.py and the rest already use. Snapshots are never
+modified, so the cache and executor threads can share them.
+"""
+
+from typing import Any
+
+
+class Snapshot:
+    """Read-only view of one decoded portal response."""
+
+    __slots__ = ("_raw",)
+
+    def __init__(self, raw: dict) -> None:
+        self._raw = raw
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for names that are not slots or methods; dunders are
+        # probed by copy/pickle before _raw is set
+        if name.startswith("__") or name == "_raw":
+            raise AttributeError(name)
+        try:
+            return self._raw[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._raw.get(key, default)
+
+    def to_dict(self) -> dict:
+        """The response fields, as the API models' to_dict() returns them."""
+        return dict(self._raw)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({len(self._raw)} fields)"
+
+
+class BatterySnapshot(Snapshot):
+    """Battery response; ``battery_units`` wraps "batteryArray" on first read."""
+
+    __slots__ = ("_units",)
+
+    def __init__(self, raw: dict) -> None:
+        super().__init__(raw)
+        self._units = None
+
+    @property
+    def battery_units(self) -> list[Snapshot]:
+        if self._units is None:
+            self._units = [Snapshot(unit) for unit in self._raw.get("batteryArray") or ()]
+        return self._units
+
+    def to_dict(self) -> dict:
+        data = {k: v for k, v in self._raw.items() if k != "batteryArray"}
+        data["battery_units"] = [dict(unit) for unit in self._raw.get("batteryArray") or ()]
+        return data
@@ -0,0 +1,88 @@
+"""Persisted battery topology, so per-battery entities do not wait for the portal."""
+
+import logging
+from dataclasses import asdict, dataclass
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, TOPOLOGY_SAVE_DELAY_SECONDS, TOPOLOGY_STORAGE_VERSION
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class BatteryInfo:
+    """What identifies one battery unit; field names as in the portal's units."""
+
+    batIndex: int
+    batteryKey: str | None = None
+    batterySn: str | None = None
+    fwVersionText: str | None = None
+
+
+def _info(unit) -> BatteryInfo:
+    return BatteryInfo(
+        batIndex=unit.batIndex,
+        batteryKey=getattr(unit, "batteryKey", None),
+        batterySn=getattr(unit, "batterySn", None),
+        fwVersionText=getattr(unit, "fwVersionText", None),
+    )
+
+
+class BatteryTopology:
+    """The battery units known for one entry, by index.
+
+    Loaded from storage before the first refresh, so the per-battery
+    entities can be created even when that refresh returns no battery data.
+    Every fresh battery snapshot is reconciled into it: new units are added,
+    changed serials or firmware are updated. Units that disappear are kept,
+    their entities just become unavailable.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
+        self._store = Store(
+            hass, TOPOLOGY_STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.batteries"
+        )
+        self._units = {}
+
+    async def async_load(self) -> None:
+        data = await self._store.async_load() or {}
+        self._units = {}
+        for unit in data.get("units", []):
+            try:
+                info = BatteryInfo(**unit)
+            except TypeError:
+                _LOGGER.debug("Ignoring stored battery unit %s", unit)
+                continue
+            self._units[info.batIndex] = info
+
+    def _data_to_save(self) -> dict:
+        return {"units": [asdict(info) for info in self.units]}
+
+    @property
+    def units(self) -> list[BatteryInfo]:
+        """Every known unit, ordered by index."""
+        return sorted(self._units.values(), key=lambda info: info.batIndex)
+
+    def update(self, battery_units) -> list[BatteryInfo]:
+        """Reconcile one fresh snapshot of ``battery_units``; returns the new units."""
+        added = []
+        changed = False
+        for unit in battery_units or []:
+            if getattr(unit, "batIndex", None) is None:
+                continue
+            info = _info(unit)
+            known = self._units.get(info.batIndex)
+            if known == info:
+                continue
+            if known is None:
+                added.append(info)
+            else:
+                _LOGGER.info("Battery %s changed: %s -> %s", info.batIndex, known, info)
+            self._units[info.batIndex] = info
+            changed = True
+        if changed:
+            self._store.async_delay_save(self._data_to_save, TOPOLOGY_SAVE_DELAY_SECONDS)
+        return added
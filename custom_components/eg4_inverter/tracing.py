@@ -0,0 +1,67 @@
+"""Lazy, sampled debug tracing of the update pipeline."""
+
+import json
+import logging
+import time
+from collections import deque
+
+from .const import DEFAULT_TRACE_SAMPLE_EVERY, TRACE_BUFFER_BYTES
+from .util import to_plain
+
+
+class EG4Tracer:
+    """Debug messages that cost nothing unless someone is looking.
+
+    Arguments are only evaluated, and callables among them only called,
+    when the message is actually used: when debug logging is enabled for
+    the logger, or when sampling is on (``sample_every`` > 0) and the cycle
+    is sampled. Sampled messages are kept for the diagnostics download, up
+    to ``max_bytes`` of JSON; the oldest are dropped first.
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        sample_every: int = DEFAULT_TRACE_SAMPLE_EVERY,
+        max_bytes: int = TRACE_BUFFER_BYTES,
+    ) -> None:
+        self._logger = logger
+        self._sample_every = max(sample_every, 0)
+        self._max_bytes = max_bytes
+        self._events = deque()
+        self._bytes = 0
+        self.cycle = 0
+        self.sampled = False
+
+    def begin_cycle(self) -> None:
+        """Start the next cycle; with sampling on, the first and every Nth are sampled."""
+        self.cycle += 1
+        self.sampled = bool(self._sample_every) and (self.cycle - 1) % self._sample_every == 0
+
+    def debug(self, msg: str, *args) -> None:
+        """Log/record ``msg % args``; callables in ``args`` are called lazily."""
+        log = self._logger.isEnabledFor(logging.DEBUG)
+        if not (log or self.sampled):
+            return
+        values = tuple(arg() if callable(arg) else arg for arg in args)
+        if log:
+            self._logger.debug(msg, *values)
+        if self.sampled:
+            plain = [to_plain(value) for value in values]
+            size = len(msg) + len(json.dumps(plain, default=str))
+            self._events.append((time.time(), self.cycle, msg, plain, size))
+            self._bytes += size
+            while self._bytes > self._max_bytes and len(self._events) > 1:
+                self._bytes -= self._events.popleft()[4]
+
+    def as_list(self) -> list[dict]:
+        """Buffered events with their arguments as plain (redactable) data."""
+        return [
+            {
+                "time": timestamp,
+                "cycle": cycle,
+                "message": msg,
+                "args": values,
+            }
+            for timestamp, cycle, msg, values, _ in self._events
+        ]
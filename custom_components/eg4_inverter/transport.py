@@ -0,0 +1,166 @@
+"""How an entry's API client reaches the portal.
+
+A transport creates the EG4InverterAPI of one entry. The portal transport
+gives each client its own session (the portal keeps the login in a cookie)
+on a connector shared by every client of the same base URL, so polls reuse
+kept-alive connections instead of paying a TCP and TLS handshake each. The
+recording and replay transports wrap the client from replay.py.
+
+SSL verification is set on the connector, so pooled clients log in with
+``ignore_ssl=False``: the library would otherwise swap our session for one
+of its own. Responses are compressed if the portal supports it; aiohttp
+asks for gzip and deflate (br with brotli installed) and decodes them.
+JSON bodies are decoded with orjson when it is installed, as it is with
+Home Assistant.
+"""
+
+from abc import ABC, abstractmethod
+from contextvars import ContextVar
+from urllib.parse import urlsplit
+
+import aiohttp
+from eg4_inverter_api import EG4InverterAPI
+
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+from .const import (
+    DATA_CONNECTOR_POOL,
+    TRANSPORT_DNS_CACHE_SECONDS,
+    TRANSPORT_KEEPALIVE_SECONDS,
+    TRANSPORT_LIMIT_PER_HOST,
+)
+from .replay import PollRecorder, RecordingEG4InverterAPI, ReplayEG4InverterAPI
+
+
+# Size of the last body read in the current task, for metrics.py. The API
+# client only returns the decoded response.
+response_size: ContextVar[int | None] = ContextVar("response_size", default=None)
+
+
+class _Response(aiohttp.ClientResponse):
+    """Decodes JSON with the fastest parser available."""
+
+    async def read(self) -> bytes:
+        body = await super().read()
+        response_size.set(len(body))
+        return body
+
+    async def json(self, *, loads=json_loads, **kwargs):
+        return await super().json(loads=loads, **kwargs)
+
+
+class ConnectorPool:
+    """One keep-alive connector per portal origin and SSL mode."""
+
+    def __init__(
+        self,
+        ssl_context=None,
+        ssl_context_no_verify=None,
+        limit_per_host: int = TRANSPORT_LIMIT_PER_HOST,
+    ) -> None:
+        # None lets aiohttp build its default contexts
+        self._ssl = {False: ssl_context or True, True: ssl_context_no_verify or False}
+        self._limit_per_host = limit_per_host
+        self._connectors = {}
+
+    def connector(self, base_url: str, ignore_ssl: bool = False) -> aiohttp.TCPConnector:
+        """The connector for ``base_url``, created on first use."""
+        parts = urlsplit(base_url)
+        key = (parts.scheme, parts.netloc, ignore_ssl)
+        connector = self._connectors.get(key)
+        if connector is None or connector.closed:
+            connector = aiohttp.TCPConnector(
+                limit=0,
+                limit_per_host=self._limit_per_host,
+                keepalive_timeout=TRANSPORT_KEEPALIVE_SECONDS,
+                use_dns_cache=True,
+                ttl_dns_cache=TRANSPORT_DNS_CACHE_SECONDS,
+                ssl=self._ssl[ignore_ssl],
+            )
+            self._connectors[key] = connector
+        return connector
+
+    def session(self, base_url: str, ignore_ssl: bool = False) -> aiohttp.ClientSession:
+        """A session with its own cookie jar on the shared connector."""
+        return aiohttp.ClientSession(
+            connector=self.connector(base_url, ignore_ssl),
+            connector_owner=False,
+            response_class=_Response,
+        )
+
+    async def async_close(self, *_) -> None:
+        """Close every connector; sessions on them stop working."""
+        connectors, self._connectors = self._connectors, {}
+        for connector in connectors.values():
+            await connector.close()
+
+
+class EG4Transport(ABC):
+    """Creates API clients; ``api.close()`` releases what they hold."""
+
+    @abstractmethod
+    def create_api(self, username: str, password: str, base_url: str) -> EG4InverterAPI:
+        """A new, not yet logged in, API client."""
+
+
+class PortalTransport(EG4Transport):
+    """Talks to the portal over a pooled connector."""
+
+    def __init__(self, pool: ConnectorPool, ignore_ssl: bool = False) -> None:
+        self._pool = pool
+        self._ignore_ssl = ignore_ssl
+
+    def create_api(self, username, password, base_url) -> EG4InverterAPI:
+        return EG4InverterAPI(
+            username,
+            password,
+            base_url=base_url,
+            session=self._pool.session(base_url, self._ignore_ssl),
+        )
+
+
+class RecordingTransport(PortalTransport):
+    """Talks to the portal and appends every exchange to ``path``."""
+
+    def __init__(self, pool: ConnectorPool, path: str, ignore_ssl: bool = False) -> None:
+        super().__init__(pool, ignore_ssl)
+        self._path = path
+
+    def create_api(self, username, password, base_url) -> EG4InverterAPI:
+        return RecordingEG4InverterAPI(
+            username,
+            password,
+            base_url=base_url,
+            session=self._pool.session(base_url, self._ignore_ssl),
+            recorder=PollRecorder(self._path, base_url),
+        )
+
+
+class ReplayTransport(EG4Transport):
+    """Answers from a recorded log; no network at all."""
+
+    def __init__(self, path: str, speed: float = 1.0) -> None:
+        self._path = path
+        self._speed = speed
+
+    def create_api(self, username, password, base_url) -> EG4InverterAPI:
+        return ReplayEG4InverterAPI(
+            username, password, base_url=base_url, log_path=self._path, speed=self._speed
+        )
+
+
+def async_get_connector_pool(hass) -> ConnectorPool:
+    """The connector pool shared by every entry, closed when Home Assistant stops."""
+    pool = hass.data.get(DATA_CONNECTOR_POOL)
+    if pool is None:
+        # Imported here so the headless collector does not need Home Assistant
+        from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+        from homeassistant.util.ssl import get_default_context, get_default_no_verify_context
+
+        pool = ConnectorPool(get_default_context(), get_default_no_verify_context())
+        hass.data[DATA_CONNECTOR_POOL] = pool
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, pool.async_close)
+    return pool
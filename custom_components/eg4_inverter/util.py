@@ -0,0 +1,47 @@
+from typing import Any
+
+from .snapshot import Snapshot
+
+# Bookkeeping attributes of the eg4_inverter_api models, not portal fields
+_MODEL_INTERNALS = frozenset(("_main_args", "_skip_args"))
+
+
+def parse_float(value: Any, scale: float = 1.0) -> float | None:
+    """Helper to convert strings/numbers to float, applying a scale if needed."""
+    try:
+        if isinstance(value, str):
+            value = value.strip()
+            if not value or value == "--":
+                return None
+        return float(value) * scale
+    except (ValueError, TypeError):
+        return None
+
+
+def coerce_value(definition, raw_value: Any) -> Any:
+    """Turn a raw API value into the state a registry.EntityDef describes."""
+    # Special case: parse CO2/Coal text like "367.69 kG"
+    if definition.co2_parse:
+        return parse_float(str(raw_value).split(" ")[0], 1.0)
+
+    # Otherwise, try to parse as float if the sensor is numeric
+    if definition.numeric:
+        return parse_float(raw_value, definition.scale)
+
+    # If it's truly a string (like "statusText"), just return it
+    return raw_value
+
+
+def to_plain(value):
+    """Recursively convert API model objects into JSON friendly values."""
+    if isinstance(value, Snapshot):
+        value = value.to_dict()
+    if isinstance(value, dict):
+        return {str(k): to_plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_plain(v) for v in value]
+    if hasattr(value, "__dict__"):
+        return {
+            k: to_plain(v) for k, v in vars(value).items() if k not in _MODEL_INTERNALS
+        }
+    return value
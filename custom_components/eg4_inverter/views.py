@@ -0,0 +1,94 @@
+"""Authenticated local HTTP endpoints serving the latest snapshot."""
+
+import asyncio
+import logging
+
+from aiohttp import web
+
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, FEED_KEEPALIVE_SECONDS
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _feeds(hass: HomeAssistant) -> dict:
+    return {
+        entry_id: coordinator.feed
+        for entry_id, coordinator in hass.data.get(DOMAIN, {}).items()
+        if coordinator.feed is not None
+    }
+
+
+def _feed_or_404(hass: HomeAssistant, entry_id: str):
+    feed = _feeds(hass).get(entry_id)
+    if feed is None:
+        raise web.HTTPNotFound()
+    return feed
+
+
+class EG4SnapshotView(HomeAssistantView):
+    """Latest coordinator snapshot of one entry as compact JSON."""
+
+    url = f"/api/{DOMAIN}/{{entry_id}}/snapshot"
+    name = f"api:{DOMAIN}:snapshot"
+
+    async def get(self, request: web.Request, entry_id: str) -> web.Response:
+        feed = _feed_or_404(request.app["hass"], entry_id)
+        return web.Response(body=feed.json(), content_type="application/json")
+
+
+class EG4StreamView(HomeAssistantView):
+    """Server-sent events stream with one event per coordinator update."""
+
+    url = f"/api/{DOMAIN}/{{entry_id}}/stream"
+    name = f"api:{DOMAIN}:stream"
+
+    async def get(self, request: web.Request, entry_id: str) -> web.StreamResponse:
+        feed = _feed_or_404(request.app["hass"], entry_id)
+        response = web.StreamResponse(
+            headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"}
+        )
+        await response.prepare(request)
+
+        queue = feed.subscribe()
+        try:
+            payload = feed.json()
+            while payload is not None:
+                await response.write(b"data: " + payload + b"\n\n")
+                while True:
+                    try:
+                        payload = await asyncio.wait_for(
+                            queue.get(), FEED_KEEPALIVE_SECONDS
+                        )
+                        break
+                    except TimeoutError:
+                        await response.write(b": keepalive\n\n")
+        except ConnectionResetError:
+            _LOGGER.debug("Stream client for %s went away", entry_id)
+        finally:
+            feed.unsubscribe(queue)
+        return response
+
+
+class EG4MetricsView(HomeAssistantView):
+    """Prometheus text exposition of every configured inverter."""
+
+    url = f"/api/{DOMAIN}/metrics"
+    name = f"api:{DOMAIN}:metrics"
+
+    async def get(self, request: web.Request) -> web.Response:
+        merged = {}
+        for feed in _feeds(request.app["hass"]).values():
+            for name, samples in feed.metrics().items():
+                merged.setdefault(name, []).extend(samples)
+
+        lines = []
+        for name in sorted(merged):
+            lines.append(f"# TYPE {name} gauge")
+            lines.extend(f"{name}{sample}" for sample in merged[name])
+        lines.append("")
+        return web.Response(
+            text="\n".join(lines), content_type="text/plain", charset="utf-8"
+        )